@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Admission control load test
+
+G well-behaved gates each send one gate entry (POST /api/gate/entry)
+every 200 ms, identified by X-Gate-Id. Meanwhile one camera loop floods
+the API with R gate entries per second over 32 connections, retrying
+forever like io_integration.simulate_camera_checkins without its sleep
+(every entry is a new plate, so each admitted one is a full write).
+The camera's offered load is the same in every run. Both clients run in
+the server's process and share its CPU; the camera calls the ASGI app
+directly to keep its own share small.
+
+Three runs of D seconds each:
+
+    - quiet:     gates only
+    - flood:     gates + camera, no admission control
+    - limited:   gates + camera, limits from configs/prod.yaml
+
+and the latency of the gates' requests (p50/p99) is reported, with what
+happened to the camera's requests.
+
+Requests go straight to the ASGI app (httpx ASGI transport), one worker.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_admission.py [G] [R] [D]
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+from parking_system.api.admission import AdmissionController, AdmissionMiddleware
+from parking_system.api.gate_routes import router as gate_router
+from parking_system.config import load_config
+from parking_system.core import read_cache, slot_manager
+from parking_system.database import db
+from parking_system.notifications import notification_dispatcher
+from parking_system.security.audit import audit_sink
+
+CAMERA_CONNECTIONS = 32
+SLOTS = 50000
+
+
+def make_app(controller: AdmissionController) -> FastAPI:
+    app = FastAPI()
+    app.include_router(gate_router)
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app
+
+
+async def gate(client, gate_id: str, deadline: float, latencies: list):
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/gate/entry",
+            json={"license_plate": f"{gate_id}-{i:05d}", "vehicle_type": "Car"},
+            headers={"X-Gate-Id": gate_id},
+        )
+        latencies.append((time.perf_counter() - start, response.status_code))
+        i += 1
+        await asyncio.sleep(max(0.0, 0.2 - (time.perf_counter() - start)))
+
+
+async def camera(app, connection: int, deadline: float, interval: float, statuses: Counter):
+    # Raw ASGI calls: a cheap client, so the run measures the server's work
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses[message["status"]] += 1
+
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        body = json.dumps({"license_plate": f"CAM{connection:02d}-{i:06d}", "vehicle_type": "Car"}).encode()
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http",
+            "path": "/api/gate/entry", "raw_path": b"/api/gate/entry", "root_path": "", "query_string": b"",
+            "headers": [(b"content-type", b"application/json"), (b"x-gate-id", b"camera-7")],
+            "client": ("camera", 0), "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+        i += 1
+        await asyncio.sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+
+async def drive(app, gates: int, camera_rate: float, duration: float):
+    latencies, statuses = [], Counter()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(gate(client, f"gate-{g}", deadline, latencies) for g in range(gates)),
+            *(camera(app, c, deadline, CAMERA_CONNECTIONS / camera_rate, statuses)
+              for c in range(CAMERA_CONNECTIONS if camera_rate else 0)),
+        )
+    return latencies, statuses
+
+
+def report(name: str, latencies: list, statuses: Counter, duration: float):
+    times = sorted(t for t, _ in latencies)
+    failed = sum(1 for _, status in latencies if status != 200)
+    p50 = times[len(times) // 2] * 1000
+    p99 = times[max(0, int(len(times) * 0.99) - 1)] * 1000
+    camera = ", ".join(f"{status}: {count / duration:.0f}/s" for status, count in sorted(statuses.items())) or "-"
+    print(f"  {name:<8} gates p50 {p50:7.2f} ms  p99 {p99:8.2f} ms  ({len(times)} req, {failed} non-200)   camera {camera}")
+
+
+def main():
+    gates = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    camera_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 800
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    limits = load_config("prod")["admission"]
+    runs = (
+        ("quiet", AdmissionController(), 0),
+        ("flood", AdmissionController(), camera_rate),
+        ("limited", AdmissionController(
+            rate_per_second=limits["rate_per_second"],
+            burst=limits["burst"],
+            max_concurrent_writes=limits["max_concurrent_writes"],
+        ), camera_rate),
+    )
+    print(f"{gates} gates at 5 req/s, camera at {camera_rate:.0f} req/s, {duration:.0f} s per run")
+    print(f"prod limits: {limits['rate_per_second']}/s per client, burst {limits['burst']}, "
+          f"{limits['max_concurrent_writes']} concurrent writes")
+    original = db.DB_FILE
+    try:
+        for name, controller, rate in runs:
+            with tempfile.TemporaryDirectory() as tmp:
+                db.DB_FILE = Path(tmp) / "bench.db"
+                db.init_db()
+                with db.get_conn() as conn:
+                    conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(SLOTS)))
+                slot_manager.load_free_slot_index()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    latencies, statuses = asyncio.run(drive(make_app(controller), gates, rate, duration))
+                    notification_dispatcher.flush()
+                    audit_sink.flush()
+                report(name, latencies, statuses, duration)
+                db.close_pools()
+    finally:
+        db.DB_FILE = original
+        read_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Allocation benchmark: table scan vs. in-memory free-slot index
+
+Builds a lot of N slots where only the last 2,000 are free (the worst case
+for `SELECT ... WHERE is_occupied=0 ORDER BY id LIMIT 1`), then times 1,000
+allocations with the legacy query and with slot_manager.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_allocation.py [N ...]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parking_system.database import db
+from parking_system.core import slot_manager
+
+ALLOCATIONS = 1000
+
+
+def seed(n_slots: int, n_vehicles: int):
+    with db.get_conn() as conn:
+        occupied = n_slots - 2 * ALLOCATIONS
+        conn.executemany(
+            "INSERT INTO slots (slot_type, level, is_occupied, vehicle_plate) VALUES (?, ?, ?, NULL)",
+            ((("compact", "large")[i % 2], i % 5 + 1, 1 if i < occupied else 0) for i in range(n_slots)),
+        )
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')",
+            ((f"BENCH{i:06d}",) for i in range(n_vehicles)),
+        )
+
+
+def legacy_allocate(vehicle_plate: str):
+    """The pre-index allocation path (full scan for the first free slot)."""
+    with db.get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM vehicles WHERE license_plate=?", (vehicle_plate,))
+        if not cur.fetchone():
+            raise ValueError("Vehicle does not exist")
+        cur.execute("SELECT * FROM slots WHERE is_occupied=0 ORDER BY id LIMIT 1")
+        slot = cur.fetchone()
+        if not slot:
+            raise ValueError("No available slots")
+        cur.execute("UPDATE slots SET is_occupied=1, vehicle_plate=? WHERE id=?", (vehicle_plate, slot["id"]))
+        cur.execute("UPDATE vehicles SET slot_id=? WHERE license_plate=?", (slot["id"], vehicle_plate))
+        cur.execute("SELECT * FROM slots WHERE id=?", (slot["id"],))
+        return dict(cur.fetchone())
+
+
+def run(n_slots: int, allocate) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        seed(n_slots, ALLOCATIONS)
+        slot_manager.load_free_slot_index()
+        start = time.perf_counter()
+        for i in range(ALLOCATIONS):
+            allocate(f"BENCH{i:06d}")
+        return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+    original = db.DB_FILE
+    try:
+        for n in sizes:
+            legacy = run(n, legacy_allocate)
+            indexed = run(n, slot_manager.allocate_slot)
+            print(
+                f"{n:>7} slots | legacy scan: {ALLOCATIONS / legacy:8.0f} alloc/s "
+                f"| free-slot index: {ALLOCATIONS / indexed:8.0f} alloc/s "
+                f"| speedup x{legacy / indexed:.1f}"
+            )
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Sync vs async API load comparison
+
+Drives the FastAPI app in-process (httpx ASGI transport) with C
+concurrent clients. Each client takes vehicles through register ->
+allocate -> check-in, and lists slots every few requests. The same
+workload runs against:
+
+    - sync:  the previous `def` routes, run on FastAPI's threadpool
+    - async: the current `async def` routes (database/async_db.py)
+
+and requests per second and p50/p99 latency are reported.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_async_api.py [VEHICLES] [CLIENTS]
+"""
+
+import asyncio
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import APIRouter, FastAPI, HTTPException
+
+from parking_system.api.schemas import VehicleCreate, VehiclePlate
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database import db
+from parking_system.notifications import notification_dispatcher
+from parking_system.security.audit import audit_sink
+
+
+def sync_app() -> FastAPI:
+    """The routes as they were before the async layer."""
+    router = APIRouter()
+
+    @router.get("/api/slots/")
+    def list_slots_api():
+        return slot_manager.list_slots()
+
+    @router.post("/api/vehicles/")
+    def register_vehicle_api(payload: VehicleCreate):
+        try:
+            return vehicle_manager.register_vehicle(payload.license_plate, payload.vehicle_type)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @router.post("/api/slots/allocate/")
+    def allocate_slot_api(payload: VehiclePlate):
+        try:
+            return slot_manager.allocate_slot(payload.license_plate)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @router.post("/api/vehicles/checkin/")
+    def checkin_vehicle_api(payload: VehiclePlate):
+        try:
+            return vehicle_manager.checkin_vehicle(payload.license_plate)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    return app
+
+
+async def client_loop(client, plates, latencies, errors):
+    async def call(method, url, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+    for i, plate in enumerate(plates):
+        await call("POST", "/api/vehicles/", json={"license_plate": plate, "vehicle_type": "Car"})
+        await call("POST", "/api/slots/allocate/", json={"license_plate": plate})
+        await call("POST", "/api/vehicles/checkin/", json={"license_plate": plate})
+        if i % 5 == 0:
+            await call("GET", "/api/slots/")
+
+
+async def drive(app, vehicles: int, clients: int):
+    plates = [f"LOAD{i:06d}" for i in range(vehicles)]
+    latencies, errors = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, plates[c::clients], latencies, errors) for c in range(clients)))
+        elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, sorted(latencies), errors
+
+
+def run(app, vehicles: int, clients: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        with db.get_conn() as conn:
+            conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(vehicles)))
+        slot_manager.load_free_slot_index()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = asyncio.run(drive(app, vehicles, clients))
+            notification_dispatcher.flush()
+            audit_sink.flush()
+        db.close_pools()
+        return result
+
+
+def report(name, rps, latencies, errors):
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"  {name:<6} {rps:7.0f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms   non-200: {len(errors)}")
+
+
+def main():
+    vehicles = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    original = db.DB_FILE
+    try:
+        print(f"{vehicles} vehicles, {clients} concurrent clients")
+        report("sync", *run(sync_app(), vehicles, clients))
+        report("async", *run(async_app(), vehicles, clients))
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Audit sink throughput benchmark
+
+Writes N audit entries through AuditSink in sync mode (one transaction
+per entry) and batched mode (group commit), including the final flush.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_audit.py [N]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parking_system.database import db
+from parking_system.security.audit import AuditSink
+
+
+def run(n: int, mode: str) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        sink = AuditSink(mode=mode, batch_size=200, flush_interval=1.0)
+        start = time.perf_counter()
+        for i in range(n):
+            sink.write((int(time.time()), "staff", "Staff", "CHECKIN_VEHICLE", f'{{"resource": "CAR{i}"}}'))
+        sink.close()
+        elapsed = time.perf_counter() - start
+        with db.get_conn() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM audit_logs").fetchone()[0] == n
+        return n / elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    original = db.DB_FILE
+    try:
+        for mode in ("sync", "batched"):
+            print(f"{mode:<8} {run(n, mode):>10,.0f} entries/s")
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Availability endpoint benchmark
+
+On a lot of S slots, measures requests per second on one core for:
+
+    - counting: GET /api/slots/ and counting free slots per level/type on
+      the client, as the dashboard and signage did before
+    - counters: GET /api/availability (maintained counters)
+
+Requests are sent straight to the ASGI app (no HTTP server or sockets),
+so the numbers are for the application stack alone. A sensor update
+changes one slot every W requests, so cached bodies get rebuilt.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_availability.py [S] [REQUESTS] [W]
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from parking_system.api.availability_routes import router as availability_router
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.core import read_cache, slot_manager
+from parking_system.database import db
+
+
+def make_request(path: str):
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [], "client": ("bench", 0), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    return scope, receive
+
+
+async def drive(app, path: str, requests: int, write_every: int, slots: int, count_client_side: bool) -> float:
+    scope, receive = make_request(path)
+    body = []
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    start = time.perf_counter()
+    for i in range(requests):
+        if write_every and i % write_every == 0:
+            slot_manager.set_slot_occupancy(i % slots + 1, (i // write_every) % 2 == 0)
+        body.clear()
+        await app(dict(scope), receive, send)
+        if count_client_side:
+            rows = json.loads(b"".join(body))
+            Counter((s["level"], s["slot_type"]) for s in rows if not s["is_occupied"])
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    slots = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    write_every = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(availability_router)
+    original = db.DB_FILE
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_FILE = Path(tmp) / "bench.db"
+            db.init_db()
+            with db.get_conn() as conn:
+                conn.executemany(
+                    "INSERT INTO slots (slot_type, level) VALUES (?, ?)",
+                    ((("compact", "regular", "large")[i % 3], i % 5 + 1) for i in range(slots)),
+                )
+            slot_manager.load_free_slot_index()
+            print(f"{slots} slots, one sensor update every {write_every} requests")
+            counting = asyncio.run(drive(app, "/api/slots/", max(requests // 100, 20), write_every, slots, True))
+            print(f"  counting  GET /api/slots/ + count   {counting:9.0f} req/s")
+            counters = asyncio.run(drive(app, "/api/availability", requests, write_every, slots, False))
+            print(f"  counters  GET /api/availability     {counters:9.0f} req/s")
+            db.close_pools()
+    finally:
+        db.DB_FILE = original
+        read_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Bulk allocation benchmark
+
+Allocates N vehicles one call at a time (one connection and transaction
+each) and with a single allocate_slots_bulk call.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_bulk_allocation.py [N]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parking_system.database import db
+from parking_system.core import slot_manager
+
+
+def fresh_lot(tmp: str, n: int):
+    db.DB_FILE = Path(tmp) / "bench.db"
+    db.init_db()
+    with db.get_conn() as conn:
+        conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(n)))
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')",
+            ((f"BUS{i:06d}",) for i in range(n)),
+        )
+    slot_manager.load_free_slot_index()
+    return [f"BUS{i:06d}" for i in range(n)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    original = db.DB_FILE
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            plates = fresh_lot(tmp, n)
+            start = time.perf_counter()
+            for plate in plates:
+                slot_manager.allocate_slot(plate)
+            single = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as tmp:
+            plates = fresh_lot(tmp, n)
+            start = time.perf_counter()
+            results = slot_manager.allocate_slots_bulk(plates)
+            bulk = time.perf_counter() - start
+            assert all("slot" in r for r in results)
+
+        print(f"{n} allocations | one call each: {single * 1000:8.1f} ms | bulk: {bulk * 1000:7.1f} ms | x{single / bulk:.0f}")
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Concurrent allocation stress benchmark
+
+Allocates every vehicle of a fresh lot from W threads or processes at once
+and reports throughput and double allocations (always expected to be 0).
+
+Usage:
+    PYTHONPATH=src python simulations/bench_concurrent_allocation.py [SLOTS]
+"""
+
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from parking_system.database import db
+from parking_system.core import slot_manager
+
+
+def seed(n: int):
+    with db.get_conn() as conn:
+        conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(n)))
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')",
+            ((f"CAR{i:06d}",) for i in range(n)),
+        )
+
+
+def allocate_all(plates):
+    done = 0
+    for plate in plates:
+        try:
+            slot_manager.allocate_slot(plate)
+            done += 1
+        except ValueError:
+            pass
+    return done
+
+
+def _process_main(db_file, plates, queue):
+    db.DB_FILE = db_file
+    slot_manager.load_free_slot_index()
+    queue.put(allocate_all(plates))
+
+
+def double_allocations() -> int:
+    with db.get_conn() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) - COUNT(DISTINCT vehicle_plate) FROM slots WHERE vehicle_plate IS NOT NULL"
+        ).fetchone()[0]
+
+
+def run(n: int, workers: int, mode: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        seed(n)
+        slot_manager.load_free_slot_index()
+        plates = [f"CAR{i:06d}" for i in range(n)]
+        chunks = [plates[i::workers] for i in range(workers)]
+        start = time.perf_counter()
+        if mode == "threads":
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                done = sum(pool.map(allocate_all, chunks))
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            queue = ctx.Queue()
+            procs = [ctx.Process(target=_process_main, args=(db.DB_FILE, c, queue)) for c in chunks]
+            for p in procs:
+                p.start()
+            done = sum(queue.get() for _ in procs)
+            for p in procs:
+                p.join()
+        elapsed = time.perf_counter() - start
+        return done / elapsed, double_allocations()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    original = db.DB_FILE
+    try:
+        for mode in ("threads", "processes"):
+            for workers in (1, 4, 16):
+                rate, doubles = run(n, workers, mode)
+                print(f"{mode:<9} x{workers:<3} {rate:8.0f} alloc/s  double allocations: {doubles}")
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Conditional GET benchmark
+
+Polls GET /api/slots/ on a lot of S slots, R times each way:
+
+    - before:   the listing as it was served before ETags (cached rows,
+                serialized by FastAPI on every request)
+    - full:     the current endpoint without If-None-Match (body cached
+                per version)
+    - 304:      the current endpoint with the ETag of the last response
+
+Requests go straight to the ASGI app, no HTTP server.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_conditional_get.py [S] [R]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from fastapi import APIRouter, FastAPI
+
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.core import read_cache, slot_manager
+from parking_system.database import db
+
+
+def before_app() -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/api/slots/", response_model=List[dict])
+    async def list_slots_api():
+        return await slot_manager.list_slots_async()
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+async def poll(app, requests: int, conditional: bool):
+    headers = []
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+            for key, value in message["headers"]:
+                if key == b"etag" and conditional:
+                    headers[:] = [(b"if-none-match", value)]
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/api/slots/", "raw_path": b"/api/slots/", "root_path": "", "query_string": b"",
+            "headers": list(headers), "client": ("bench", 0), "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests, status["code"]
+
+
+def main():
+    slots = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    app = FastAPI()
+    app.include_router(slot_router)
+    original = db.DB_FILE
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_FILE = Path(tmp) / "bench.db"
+            db.init_db()
+            with db.get_conn() as conn:
+                conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(slots)))
+            slot_manager.load_free_slot_index()
+            print(f"{slots} slots, {requests} polls each")
+            for name, target, conditional in (("before", before_app(), False), ("full", app, False), ("304", app, True)):
+                latency, status = asyncio.run(poll(target, requests, conditional))
+                print(f"  {name:<7} {latency * 1e3:8.3f} ms/request   (last status {status})")
+            db.close_pools()
+    finally:
+        db.DB_FILE = original
+        read_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
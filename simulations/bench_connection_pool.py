@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Connection pool benchmark
+
+Times N check-ins (vehicle_manager.checkin_vehicle) and N bare
+get_conn() round trips twice:
+
+    - unpooled: a new connection per get_conn() with SQLite defaults
+      (rollback journal, synchronous=FULL), as before the pool
+    - pooled:   reused connections with the `database.pragmas` tuning
+
+Usage:
+    PYTHONPATH=src python simulations/bench_connection_pool.py [N]
+"""
+
+import contextlib
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parking_system.config import get_config
+from parking_system.database import db
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.notifications import notification_dispatcher
+from parking_system.security.audit import audit_sink
+
+
+def make_pool(path: Path, pooled: bool) -> db.ConnectionPool:
+    if not pooled:
+        return db.ConnectionPool(path, size=0, pragmas={"foreign_keys": "on"})
+    pragmas = dict(db.DEFAULT_PRAGMAS)
+    pragmas.update((get_config().get("database") or {}).get("pragmas") or {})
+    return db.ConnectionPool(path, size=8, pragmas=pragmas)
+
+
+def run(n: int, pooled: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db._pools[str(db.DB_FILE)] = make_pool(db.DB_FILE, pooled)
+        db.init_db()
+        with db.get_conn() as conn:
+            conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(n)))
+        slot_manager.load_free_slot_index()
+        plates = [f"POOL{i:06d}" for i in range(n)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            for plate in plates:
+                vehicle_manager.register_vehicle(plate, "Car")
+                slot_manager.allocate_slot(plate)
+
+        round_trip = time.perf_counter()
+        for _ in range(n):
+            with db.get_conn() as conn:
+                conn.execute("SELECT 1").fetchone()
+        round_trip = (time.perf_counter() - round_trip) / n
+
+        latencies = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for plate in plates:
+                start = time.perf_counter()
+                vehicle_manager.checkin_vehicle(plate)
+                latencies.append(time.perf_counter() - start)
+            # Finish background work while the temp database still exists
+            notification_dispatcher.flush()
+            audit_sink.flush()
+        db.close_pools()
+        return round_trip, sorted(latencies)
+
+
+def report(name: str, round_trip: float, latencies: list) -> float:
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"  {name:<9} get_conn {round_trip * 1e6:7.1f} us   checkin p50 {p50:6.3f} ms   p99 {p99:6.3f} ms")
+    return p50
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    original = db.DB_FILE
+    try:
+        print(f"{n} check-ins")
+        before = report("unpooled", *run(n, pooled=False))
+        after = report("pooled", *run(n, pooled=True))
+        print(f"  check-in p50 latency reduced by {100 * (1 - after / before):.0f}%")
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Gate-to-barrier latency benchmark
+
+Compares the two-step gate path (register + allocate_slot +
+checkin_vehicle, three connections and commits) with the single
+transaction vehicle_manager.gate_entry, for N arriving vehicles.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_gate_entry.py [N]
+"""
+
+import contextlib
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parking_system.database import db
+from parking_system.core import slot_manager, vehicle_manager
+
+
+def legacy_entry(plate: str):
+    vehicle_manager.register_vehicle(plate, "Car")
+    slot_manager.allocate_slot(plate)
+    vehicle_manager.checkin_vehicle(plate)
+
+
+def fast_entry(plate: str):
+    vehicle_manager.gate_entry(plate, "Car")
+
+
+def run(n: int, entry) -> list:
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        with db.get_conn() as conn:
+            conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(n)))
+        slot_manager.load_free_slot_index()
+        latencies = []
+        # Notification/audit prints are the same for both paths; keep them off the console
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(n):
+                start = time.perf_counter()
+                entry(f"GATE{i:06d}")
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+
+def report(name: str, latencies: list):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"  {name:<28} p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+    return p50
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    original = db.DB_FILE
+    try:
+        print(f"{n} gate entries")
+        before = report("register+allocate+checkin", run(n, legacy_entry))
+        after = report("gate_entry", run(n, fast_entry))
+        print(f"  p50 latency reduced by {100 * (1 - after / before):.0f}%")
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
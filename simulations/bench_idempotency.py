@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Idempotent retry benchmark
+
+N vehicles are checked in and out through the API by a gate controller
+that retries every request R times (lost responses), with and without
+an Idempotency-Key. Reports the time per request and how often
+vehicle_manager actually ran.
+
+Requests go straight to the ASGI app, no HTTP server.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_idempotency.py [N] [R]
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from parking_system.api.idempotency import IdempotencyMiddleware
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import read_cache, slot_manager, vehicle_manager
+from parking_system.core.idempotency import IdempotencyStore
+from parking_system.database import db
+
+
+async def post(app, path: str, payload: dict, key: str = None) -> int:
+    body = json.dumps(payload).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if key:
+        headers.append((b"idempotency-key", key.encode()))
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("bench", 0), "server": ("bench", 80),
+    }
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status["code"]
+
+
+async def gate(app, vehicles: int, retries: int, use_keys: bool) -> dict:
+    counts = {"requests": 0, "ok": 0}
+    start = time.perf_counter()
+    for i in range(vehicles):
+        plate = f"{'K' if use_keys else 'N'}{i:05d}"
+        for action in ("checkin", "checkout"):
+            key = f"{plate}-{action}" if use_keys else None
+            for _ in range(1 + retries):
+                code = await post(app, f"/api/vehicles/{action}/", {"license_plate": plate}, key)
+                counts["requests"] += 1
+                counts["ok"] += code == 200
+    counts["ms_per_request"] = (time.perf_counter() - start) / counts["requests"] * 1e3
+    return counts
+
+
+def main():
+    vehicles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    retries = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    original = db.DB_FILE
+    runs = {"checkin": 0, "checkout": 0}
+    checkin, checkout = vehicle_manager.checkin_vehicle_async, vehicle_manager.checkout_vehicle_async
+
+    async def counted_checkin(*args, **kwargs):
+        runs["checkin"] += 1
+        return await checkin(*args, **kwargs)
+
+    async def counted_checkout(*args, **kwargs):
+        runs["checkout"] += 1
+        return await checkout(*args, **kwargs)
+
+    vehicle_manager.checkin_vehicle_async = counted_checkin
+    vehicle_manager.checkout_vehicle_async = counted_checkout
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_FILE = Path(tmp) / "bench.db"
+            db.init_db()
+            for prefix in "KN":
+                for i in range(vehicles):
+                    slot_manager.create_slot("compact", 1)
+                    vehicle_manager.register_vehicle(f"{prefix}{i:05d}", "Car")
+                    slot_manager.allocate_slot(f"{prefix}{i:05d}")
+            app = FastAPI()
+            app.include_router(vehicle_router)
+            app = IdempotencyMiddleware(app, store=IdempotencyStore())
+            print(f"{vehicles} vehicles in and out, each request sent {1 + retries} times")
+            for label, use_keys in (("no key", False), ("Idempotency-Key", True)):
+                runs.update(checkin=0, checkout=0)
+                counts = asyncio.run(gate(app, vehicles, retries, use_keys))
+                with db.get_conn() as conn:
+                    logs = conn.execute(
+                        "SELECT COUNT(*) FROM vehicle_logs WHERE license_plate LIKE ?", (("K" if use_keys else "N") + "%",)
+                    ).fetchone()[0]
+                print(
+                    f"  {label:<16} {counts['ms_per_request']:6.2f} ms/request   "
+                    f"200s {counts['ok']:5d}/{counts['requests']}   "
+                    f"vehicle_manager ran {runs['checkin'] + runs['checkout']:5d}x   log rows {logs}"
+                )
+            db.close_pools()
+    finally:
+        vehicle_manager.checkin_vehicle_async, vehicle_manager.checkout_vehicle_async = checkin, checkout
+        db.DB_FILE = original
+        read_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark and regression check
+
+Imports each entry point in a fresh interpreter under `python -X importtime`,
+R times, and reports the median time spent importing (cumulative time of
+the top-level imports after interpreter startup) and the median wall time
+of the process. It also lists the heavy packages each entry point loaded:
+one not expected for that entry point is a regression, and the script
+exits with status 1.
+
+    import parking_system.main     API module, app not built yet
+    create_app()                   the API (FastAPI and routers)
+    core managers                  what the CLI needs
+    IoT sensor reader              io_integration without MQTT
+    analytics modules              reports/prediction, nothing generated
+    run_full_pipeline.py           the pipeline script
+
+Usage:
+    PYTHONPATH=src python simulations/bench_import_time.py [R]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ("fastapi", "pandas", "numpy", "matplotlib", "sklearn", "paho")
+
+# (name, code, heavy packages it may load)
+ENTRY_POINTS = (
+    ("import parking_system.main", "import parking_system.main", ()),
+    ("create_app()", "from parking_system.main import create_app; create_app()", ("fastapi",)),
+    ("core managers", "import parking_system.core.slot_manager, parking_system.core.vehicle_manager", ()),
+    ("IoT sensor reader", "import parking_system.io_integration.sensor_reader", ()),
+    ("analytics modules", "import parking_system.analytics.reports, parking_system.analytics.prediction", ()),
+    ("run_full_pipeline.py", "import run_full_pipeline", ()),
+)
+
+
+def run(code: str):
+    """(import seconds, wall seconds, heavy packages loaded) of one fresh interpreter."""
+    probe = f"{code}\nimport json, sys\nprint(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return top_level_import_seconds(result.stderr), wall, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def top_level_import_seconds(report: str) -> float:
+    """Sum of the cumulative times of top-level imports made after startup (site)."""
+    total, started = 0, False
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue            # nested import, or the header
+        if started:
+            total += int(cumulative)
+        elif name.strip() == "site":
+            started = True
+    return total / 1e6
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"median of {repeat} fresh interpreters per entry point")
+    print(f"  {'entry point':<28} {'imports':>10} {'wall':>10}   heavy packages loaded")
+    regressions = []
+    for name, code, allowed in ENTRY_POINTS:
+        try:
+            runs = [run(code) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"  {name:<28} failed: {e}")
+            regressions.append(name)
+            continue
+        imports = statistics.median(r[0] for r in runs) * 1000
+        wall = statistics.median(r[1] for r in runs) * 1000
+        loaded = runs[-1][2]
+        unexpected = [m for m in loaded if m not in allowed]
+        if unexpected:
+            regressions.append(name)
+        flag = f"   <- unexpected: {', '.join(unexpected)}" if unexpected else ""
+        print(f"  {name:<28} {imports:7.1f} ms {wall:7.1f} ms   {', '.join(loaded) or '-'}{flag}")
+    if regressions:
+        print(f"regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+JSON response benchmark
+
+On a lot of N slots and N vehicles, times GET /api/slots/ and
+GET /api/vehicles/ served two ways:
+
+    - before:  rows loaded as dicts, validated against response_model and
+               encoded by FastAPI's jsonable_encoder + json (as before)
+    - fast:    the current routes (orjson when installed; filtered and
+               paged lists encoded by SQLite's json_object)
+
+for the full listing (one write before every request, so the body is
+rebuilt each time) and for a filtered listing with limit=10000.
+
+Requests go straight to the ASGI app, no HTTP server.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_json_responses.py [N ...] [--requests R]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import APIRouter, FastAPI
+
+from parking_system.api import responses
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import read_cache, slot_manager, vehicle_manager
+from parking_system.database import db
+
+
+def before_app() -> FastAPI:
+    router = APIRouter()
+
+    @router.get("/api/slots/", response_model=List[dict])
+    async def list_slots_api(is_occupied: Optional[bool] = None, limit: Optional[int] = None):
+        if is_occupied is None and limit is None:
+            return await slot_manager.list_slots_async()
+        return await slot_manager.query_slots_async(is_occupied=is_occupied, limit=limit)
+
+    @router.get("/api/vehicles/", response_model=List[dict])
+    async def list_vehicles_api(checked_in: Optional[bool] = None, limit: Optional[int] = None):
+        if checked_in is None and limit is None:
+            return await vehicle_manager.list_vehicles_async()
+        return await vehicle_manager.query_vehicles_async(checked_in=checked_in, limit=limit)
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def fast_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    return app
+
+
+async def drive(app, path: str, query: bytes, requests: int, first_id: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    start = time.perf_counter()
+    for i in range(requests):
+        if not query:
+            # Change the table so the full listing is encoded again
+            slot_manager.set_slot_occupancy(first_id + i % 100, i % 2 == 0)
+            read_cache.invalidate_vehicles()
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query,
+            "headers": [], "client": ("bench", 0), "server": ("bench", 80),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def run(rows: int, requests: int) -> None:
+    with db.get_conn() as conn:
+        conn.execute("DELETE FROM slots")
+        conn.execute("DELETE FROM vehicles")
+        conn.executemany(
+            "INSERT INTO slots (slot_type, level, is_occupied) VALUES (?, ?, ?)",
+            ((("compact", "regular", "large")[i % 3], i % 5 + 1, int(i % 7 == 0)) for i in range(rows)),
+        )
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type, checked_in) VALUES (?, ?, ?)",
+            ((f"PL{i:07d}", ("Car", "Bike", "Truck")[i % 3], int(i % 2)) for i in range(rows)),
+        )
+        first_id = conn.execute("SELECT MIN(id) FROM slots").fetchone()[0]
+    slot_manager.load_free_slot_index()
+    read_cache.clear()
+    apps = (("before", before_app()), ("fast", fast_app()))
+    print(f"{rows} slots and vehicles, {requests} requests each")
+    for path, filtered in (("/api/slots/", b"is_occupied=false&limit=10000"),
+                           ("/api/vehicles/", b"checked_in=false&limit=10000")):
+        for label, query in (("full", b""), ("filtered+limit", filtered)):
+            timings = {name: asyncio.run(drive(app, path, query, requests, first_id)) for name, app in apps}
+            print(
+                f"  {path:<15} {label:<15} before {timings['before'] * 1e3:8.2f} ms"
+                f"   fast {timings['fast'] * 1e3:8.2f} ms   x{timings['before'] / timings['fast']:.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("rows", nargs="*", type=int, default=[10_000, 100_000])
+    parser.add_argument("--requests", type=int, default=10)
+    args = parser.parse_args()
+    print(f"orjson: {'yes' if responses.orjson is not None else 'no (json fallback)'}")
+    original = db.DB_FILE
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_FILE = Path(tmp) / "bench.db"
+            db.init_db()
+            for rows in args.rows:
+                run(rows, args.requests)
+            db.close_pools()
+    finally:
+        db.DB_FILE = original
+        read_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+List endpoint memory benchmark
+
+Fills a vehicles table with N rows (default 1,000,000), then serves
+GET /api/vehicles/ three ways, each in a fresh process so peak RSS is
+comparable:
+
+    - full:   the whole table as one JSON array (the old behaviour)
+    - paged:  limit=PAGE pages, following X-Next-Cursor to the end
+    - ndjson: format=ndjson, streamed from the database cursor
+
+Requests go straight to the ASGI app and the response body is counted and
+discarded, so only server-side memory is measured. mmap is disabled in
+the serving process, so that database pages read through it do not show
+up as RSS growth.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_list_memory.py [N] [PAGE]
+"""
+
+import asyncio
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+
+def fill(path: Path, n: int) -> None:
+    from parking_system.database import db
+    db.DB_FILE = path
+    db.init_db()
+    db.close_pools()
+    conn = sqlite3.connect(path)
+    types = ("Car", "Bike", "Truck", "Van")
+    conn.executemany(
+        "INSERT INTO vehicles (license_plate, vehicle_type, checked_in) VALUES (?, ?, ?)",
+        ((f"PLT{i:08d}", types[i % 4], i % 3 == 0) for i in range(n)),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def get(app, path: str, params: dict):
+    """One GET through the ASGI app; returns (status, headers, body bytes)."""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": urlencode(params).encode(), "headers": [],
+        "client": ("bench", 0), "server": ("bench", 80),
+    }
+    result = {"size": 0}
+    requested = asyncio.Event()
+
+    async def receive():
+        if not requested.is_set():
+            requested.set()
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()  # the client never disconnects
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            result["size"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return result["status"], result["headers"], result["size"]
+
+
+def serve(path: Path, mode: str, page: int) -> None:
+    """Child process: serve the listing once and print peak RSS growth."""
+    from fastapi import FastAPI
+    from parking_system.config import get_config
+    from parking_system.api.vehicle_routes import router
+    from parking_system.database import db
+
+    db.DB_FILE = path
+    # Memory-mapped database pages would count as RSS too: measure the
+    # process's own allocations only
+    pragmas = dict(db.DEFAULT_PRAGMAS)
+    pragmas.update((get_config().get("database") or {}).get("pragmas") or {})
+    pragmas["mmap_size"] = 0
+    db._pools[str(path)] = db.ConnectionPool(path, pragmas=pragmas)
+    app = FastAPI()
+    app.include_router(router)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async def run():
+        size = 0
+        if mode == "paged":
+            params = {"limit": page}
+            while True:
+                status, headers, n = await get(app, "/api/vehicles/", params)
+                size += n
+                if "x-next-cursor" not in headers:
+                    return status, size
+                params = {"limit": page, "cursor": headers["x-next-cursor"]}
+        params = {"format": "ndjson"} if mode == "ndjson" else {}
+        status, _, size = await get(app, "/api/vehicles/", params)
+        return status, size
+
+    start = time.perf_counter()
+    status, size = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    assert status == 200, status
+    print(f"{(peak - baseline) / 1024:.1f} {size / 1e6:.1f} {elapsed:.2f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(Path(sys.argv[2]), sys.argv[3], int(sys.argv[4]))
+        return
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    page = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        fill(path, n)
+        print(f"{n} vehicles, page size {page}")
+        for mode in ("full", "paged", "ndjson"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--serve", str(path), mode, str(page)],
+                capture_output=True, text=True, env=os.environ, check=True,
+            ).stdout.split()
+            growth, size, elapsed = out[-3:]
+            print(f"  {mode:<7} peak RSS +{growth:>7} MB   body {size:>6} MB   {elapsed:>6} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Metrics overhead benchmark
+
+Runs a request mix for N vehicles through the app with MetricsMiddleware,
+switching metrics on and off for every other vehicle (so database growth
+and background threads affect both modes alike), and reports the median
+time per vehicle of each mode and the overhead (medians, as a WAL
+checkpoint or GC pause lands on one vehicle at random). Per vehicle:
+
+    POST /api/gate/entry            (register + allocate + check-in)
+    GET  /api/slots/?level=..&limit=50
+    GET  /api/availability
+    POST /api/vehicles/checkout/    (payment)
+
+Requests go straight to the ASGI app, no HTTP server.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_metrics.py [N]
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+
+from parking_system import metrics
+from parking_system.api.availability_routes import router as availability_router
+from parking_system.api.gate_routes import router as gate_router
+from parking_system.api.metrics import MetricsMiddleware
+from parking_system.api.metrics_routes import router as metrics_router
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import read_cache, slot_manager
+from parking_system.database import db
+from parking_system.notifications import notification_dispatcher
+from parking_system.security.audit import audit_sink
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    for router in (slot_router, vehicle_router, gate_router, availability_router, metrics_router):
+        app.include_router(router)
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def request(app, method: str, path: str, query: bytes = b"", payload: dict = None) -> int:
+    body = json.dumps(payload).encode() if payload is not None else b""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query,
+        "headers": [(b"content-type", b"application/json")], "client": ("bench", 0), "server": ("bench", 80),
+    }
+    status = {}
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    await app(scope, receive, send)
+    return status["code"]
+
+
+async def workload(app, vehicles: int) -> dict:
+    """Seconds per vehicle of each mode; the mode flips every vehicle, so drift hits both alike."""
+    spent = {False: [], True: []}
+    for i in range(vehicles):
+        enabled = metrics.enabled = i % 2 == 1
+        plate = f"V{i:06d}"
+        start = time.perf_counter()
+        assert await request(app, "POST", "/api/gate/entry", payload={"license_plate": plate, "vehicle_type": "Car"}) == 200
+        await request(app, "GET", "/api/slots/", f"level={i % 4 + 1}&limit=50".encode())
+        await request(app, "GET", "/api/availability")
+        assert await request(app, "POST", "/api/vehicles/checkout/", payload={"license_plate": plate}) == 200
+        spent[enabled].append(time.perf_counter() - start)
+    return spent
+
+
+def main():
+    vehicles = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    app = make_app()
+    original, original_enabled = db.DB_FILE, metrics.enabled
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_FILE = Path(tmp) / "bench.db"
+            db.init_db()
+            with db.get_conn() as conn:
+                conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(2000)))
+            slot_manager.load_free_slot_index()
+            with contextlib.redirect_stdout(io.StringIO()):
+                spent = asyncio.run(workload(app, vehicles))
+                notification_dispatcher.flush()
+                audit_sink.flush()
+            db.close_pools()
+    finally:
+        db.DB_FILE, metrics.enabled = original, original_enabled
+        read_cache.clear()
+    off, on = statistics.median(spent[False]) / 4, statistics.median(spent[True]) / 4
+    print(f"{vehicles} vehicles x 4 requests, metrics switched on for every other vehicle")
+    print(f"  metrics off  {off * 1e6:8.1f} us/request (median)")
+    print(f"  metrics on   {on * 1e6:8.1f} us/request (median)")
+    print(f"  overhead     {(on - off) / off * 100:8.2f} %")
+
+
+if __name__ == "__main__":
+    main()
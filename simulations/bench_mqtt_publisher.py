@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+MQTT publisher benchmark: polling vs change-driven
+
+S slots on 4 levels; a sensor thread flips the occupancy of random slots
+(slot_manager.set_slot_occupancy, like io_integration.sensor_reader) R
+times per second for D seconds, while one publisher sends slot status to
+an in-process fake broker (io_integration/fake_broker.py):
+
+    - polling:  the previous publish_loop: every 2 s list_slots(), then
+                get_slot_by_id() and one message per slot
+    - changes:  MqttPublisher with the window from configs/defaults.yaml
+
+Reported per run: messages and payload bytes sent, slot lookups and SQL
+queries made by the publisher thread (cache hits make no query).
+
+Usage:
+    PYTHONPATH=src python simulations/bench_mqtt_publisher.py [S] [R] [D]
+"""
+
+import contextlib
+import io
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from parking_system.core import read_cache, slot_manager
+from parking_system.database import db
+from parking_system.io_integration.fake_broker import FakeBroker
+from parking_system.io_integration.mqtt_publisher import MqttPublisher
+
+PUBLISHER_THREAD = "mqtt-publisher"
+
+
+def counting(counts: Counter, name: str, func, size=lambda *args: 1):
+    """func, counting the calls (or size(*args) per call) made on the publisher thread."""
+    def wrapper(*args, **kwargs):
+        if threading.current_thread().name == PUBLISHER_THREAD:
+            counts[name] += size(*args)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+class PollingPublisher:
+    """publish_loop as it was: the whole table every 2 seconds."""
+
+    def __init__(self, client_factory, interval: float = 2.0):
+        self.client = client_factory()
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.client.connect_async("localhost", 1883)
+        self.client.loop_start()
+        self._thread = threading.Thread(target=self._run, name=PUBLISHER_THREAD, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for s in slot_manager.list_slots():
+                slot = slot_manager.get_slot_by_id(s["id"])
+                self.client.publish("parking/slots", json.dumps(slot))
+
+
+def sensors(slot_ids: list, rate: float, duration: float) -> int:
+    rng = random.Random(7)
+    changes, start = 0, time.perf_counter()
+    while time.perf_counter() - start < duration:
+        slot_manager.set_slot_occupancy(rng.choice(slot_ids), rng.random() < 0.5)
+        changes += 1
+        time.sleep(max(0.0, start + changes / rate - time.perf_counter()))
+    return changes
+
+
+def run(name: str, make_publisher, slots: int, rate: float, duration: float):
+    counts = Counter()
+    originals = slot_manager.get_conn, slot_manager.get_slot_by_id, slot_manager.get_slots_by_id
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        with db.get_conn() as conn:
+            conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(slots)))
+        slot_manager.load_free_slot_index()
+        read_cache.clear()
+        slot_ids = [s["id"] for s in slot_manager.list_slots()]
+        broker = FakeBroker()
+        slot_manager.get_conn = counting(counts, "queries", originals[0])
+        slot_manager.get_slot_by_id = counting(counts, "lookups", originals[1])
+        slot_manager.get_slots_by_id = counting(counts, "lookups", originals[2], size=len)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                publisher = make_publisher(broker.client).start()
+                changes = sensors(slot_ids, rate, duration)
+                # Let the last batch or tick go out
+                time.sleep(2.1)
+                publisher.stop()
+        finally:
+            slot_manager.get_conn, slot_manager.get_slot_by_id, slot_manager.get_slots_by_id = originals
+        db.close_pools()
+    sent = len(broker.messages)
+    size = sum(len(m.payload) for m in broker.messages)
+    print(f"  {name:<9} {changes:6d} changes  {sent:7d} messages  {size / 1024:9.1f} KiB  "
+          f"{counts['lookups']:7d} lookups  {counts['queries']:6d} queries")
+
+
+def main():
+    slots = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rate = float(sys.argv[2]) if len(sys.argv) > 2 else 100
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    window = MqttPublisher.from_config().window
+    print(f"{slots} slots on 4 levels, {rate:.0f} occupancy changes/s for {duration:.0f} s")
+    original = db.DB_FILE
+    try:
+        run("polling", PollingPublisher, slots, rate, duration)
+        run("changes", lambda factory: MqttPublisher(
+            client_factory=factory, window=window,
+            # Looked up at call time, so the counting wrappers see the calls
+            load_rows=lambda ids: slot_manager.get_slots_by_id(ids),
+            load_all=lambda: slot_manager.list_slots(),
+        ), slots, rate, duration)
+    finally:
+        db.DB_FILE = original
+        read_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Read cache benchmark
+
+Times the dashboard / MQTT read pattern (list_slots, then get_slot_by_id
+for a handful of slots) with the read caches disabled and enabled, on a
+lot of S slots where one slot changes every W reads.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_read_cache.py [S] [ROUNDS] [W]
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parking_system.core import read_cache, slot_manager, vehicle_manager
+from parking_system.database import db
+
+
+def run(slots: int, rounds: int, write_every: int, cached: bool):
+    read_cache.enabled = cached
+    read_cache.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        with db.get_conn() as conn:
+            conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(slots)))
+        slot_manager.load_free_slot_index()
+
+        lists, lookups = [], []
+        for i in range(rounds):
+            if write_every and i % write_every == 0:
+                slot_manager.set_slot_occupancy(i % slots + 1, i % 2 == 0)
+            start = time.perf_counter()
+            slot_manager.list_slots()
+            vehicle_manager.list_vehicles()
+            lists.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            for slot_id in range(1, 11):
+                slot_manager.get_slot_by_id(slot_id)
+            lookups.append((time.perf_counter() - start) / 10)
+        db.close_pools()
+    return statistics.mean(lists), statistics.mean(lookups)
+
+
+def main():
+    slots = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    write_every = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    original, enabled = db.DB_FILE, read_cache.enabled
+    try:
+        print(f"{slots} slots, {rounds} rounds, one write every {write_every} rounds")
+        for name, cached in (("uncached", False), ("cached", True)):
+            lists, lookups = run(slots, rounds, write_every, cached)
+            print(f"  {name:<9} list_slots+list_vehicles {lists * 1e3:7.3f} ms   get_slot_by_id {lookups * 1e6:7.1f} us")
+        print(f"  {read_cache.stats()}")
+    finally:
+        db.DB_FILE, read_cache.enabled = original, enabled
+        read_cache.clear()
+
+
+if __name__ == "__main__":
+    main()
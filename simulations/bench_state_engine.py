@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+In-memory state engine benchmark
+
+Mean and p99 time of one allocation for N vehicles:
+
+    - sqlite:            slot_manager.allocate_slot on the SQLite backend
+    - engine (sync=...): StateEngine.allocate_slot with each journal mode
+    - memory backend:    slot_manager.allocate_slot with the engine active
+
+plus the time the background flusher needs to persist all of it.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_state_engine.py [N]
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from parking_system.core import slot_manager
+from parking_system.database import db, db_utils
+from parking_system.database.db_utils import StateEngine
+
+
+def seed(n: int):
+    with db.get_conn() as conn:
+        conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(n)))
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')",
+            ((f"ENG{i:06d}",) for i in range(n)),
+        )
+
+
+def timed(allocate, n: int) -> list:
+    latencies = []
+    for i in range(n):
+        plate = f"ENG{i:06d}"
+        start = time.perf_counter()
+        allocate(plate)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def report(name: str, latencies: list, extra: str = ""):
+    mean = statistics.fmean(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+    print(f"  {name:<22} mean {mean:8.2f} us   p99 {p99:8.2f} us{extra}")
+
+
+def run(n: int, mode: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        seed(n)
+        if mode == "sqlite":
+            slot_manager.load_free_slot_index()
+            report("sqlite", timed(slot_manager.allocate_slot, n))
+        elif mode == "memory backend":
+            engine = StateEngine(journal_dir=Path(tmp) / "journal", index=slot_manager.free_slot_index)
+            engine.recover()
+            db_utils._engine = engine
+            try:
+                report(mode, timed(slot_manager.allocate_slot, n))
+            finally:
+                db_utils._engine = None
+                engine.stop()
+        else:
+            engine = StateEngine(journal_dir=Path(tmp) / "journal", journal_sync=mode)
+            engine.recover()
+            latencies = timed(engine.allocate_slot, n)
+            start = time.perf_counter()
+            engine.flush()
+            flushed = time.perf_counter() - start
+            report(f"engine (sync={mode})", latencies, f"   flush {flushed * 1000:6.1f} ms")
+            engine.stop()
+        db.close_pools()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    original = db.DB_FILE
+    try:
+        print(f"{n} allocations")
+        for mode in ("sqlite", "fsync", "flush", "none", "memory backend"):
+            run(n if mode not in ("sqlite", "fsync") else min(n, 2000), mode)
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Allocation strategy microbenchmark
+
+Runs select/release cycles of every registered strategy against an
+in-memory free-slot index (no DB) and reports allocations per second.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_strategies.py [N_SLOTS]
+"""
+
+import random
+import sys
+import time
+
+from parking_system.config import get_config
+from parking_system.core.allocation import STRATEGIES
+from parking_system.core.slot_index import FreeSlotIndex
+
+SLOT_TYPES = ("compact", "compact", "compact", "large")
+VEHICLE_TYPES = ("Car", "Car", "Car", "Truck", "Bike")
+ROUNDS = 200_000
+
+
+def build_lot(n_slots: int):
+    rng = random.Random(42)
+    return [(i, rng.choice(SLOT_TYPES), i % 8 + 1, rng.random() < 0.7) for i in range(1, n_slots + 1)]
+
+
+def bench(name: str, lot) -> float:
+    index = FreeSlotIndex()
+    index.load(lot)
+    strategy = STRATEGIES[name](get_config().get("allocation"))
+    rng = random.Random(7)
+    vehicles = [rng.choice(VEHICLE_TYPES) for _ in range(ROUNDS)]
+    taken = []
+    start = time.perf_counter()
+    for vtype in vehicles:
+        slot_id = strategy.select(index, vtype)
+        if slot_id is not None:
+            taken.append(slot_id)
+        if len(taken) > 64:
+            index.release(taken.pop(0))
+    return ROUNDS / (time.perf_counter() - start)
+
+
+def main():
+    n_slots = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    lot = build_lot(n_slots)
+    print(f"{n_slots} slots, {ROUNDS} allocations per strategy")
+    for name in STRATEGIES:
+        print(f"  {name:<17} {bench(name, lot):>10,.0f} alloc/s")
+
+
+if __name__ == "__main__":
+    main()
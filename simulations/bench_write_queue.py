@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Single-writer queue benchmark
+
+64 concurrent clients (threads) each take their vehicles through
+allocate -> check-in -> check-out:
+
+    - direct: every client writes through its own get_conn transaction,
+      as the sync API does
+    - queued: every write is a transaction body submitted to the
+      single-writer queue and group-committed
+
+Reports write commands per second, "database is locked" failures and,
+for the queue, commits and the largest group.
+
+Usage:
+    PYTHONPATH=src python simulations/bench_write_queue.py [VEHICLES] [CLIENTS]
+"""
+
+import contextlib
+import io
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database import db
+from parking_system.database.write_queue import WriteQueue
+from parking_system.notifications import notification_dispatcher
+from parking_system.security.audit import audit_sink
+
+
+def direct_ops():
+    return (
+        slot_manager.allocate_slot,
+        lambda plate: vehicle_manager.checkin_vehicle(plate),
+        lambda plate: vehicle_manager.checkout_vehicle(plate, 2.0),
+    )
+
+
+def queued_ops(wq: WriteQueue):
+    return (
+        lambda plate: wq.submit_tx(slot_manager._allocate_slot_tx, plate).result(),
+        lambda plate: wq.submit_tx(vehicle_manager._checkin_vehicle_tx, plate, "staff").result(),
+        lambda plate: wq.submit_tx(
+            vehicle_manager._checkout_vehicle_tx, plate, 2.0, "staff", vehicle_manager.authorize_checkout(plate, 2.0),
+        ).result(),
+    )
+
+
+def run(vehicles: int, clients: int, queued: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = Path(tmp) / "bench.db"
+        db.init_db()
+        with db.get_conn() as conn:
+            conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 4 + 1,) for i in range(vehicles)))
+            conn.executemany(
+                "INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')",
+                ((f"WRT{i:06d}",) for i in range(vehicles)),
+            )
+        slot_manager.load_free_slot_index()
+
+        wq = WriteQueue(max_batch=64).start() if queued else None
+        ops = queued_ops(wq) if queued else direct_ops()
+        plates = [f"WRT{i:06d}" for i in range(vehicles)]
+        locked = []
+        done = []
+
+        def client(chunk):
+            count = 0
+            for plate in chunk:
+                for op in ops:
+                    try:
+                        op(plate)
+                        count += 1
+                    except sqlite3.OperationalError as e:
+                        if not db.is_busy_error(e):
+                            raise
+                        locked.append(plate)
+                        break
+            done.append(count)
+
+        threads = [threading.Thread(target=client, args=(plates[c::clients],)) for c in range(clients)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            stats = wq.stats() if queued else None
+            if wq is not None:
+                wq.stop()
+            notification_dispatcher.flush()
+            audit_sink.flush()
+        db.close_pools()
+        return sum(done) / elapsed, len(locked), stats
+
+
+def main():
+    vehicles = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    original = db.DB_FILE
+    try:
+        print(f"{vehicles} vehicles x 3 writes, {clients} concurrent clients")
+        rate, locked, _ = run(vehicles, clients, queued=False)
+        print(f"  direct  {rate:7.0f} writes/s   locked failures: {locked}")
+        rate, locked, stats = run(vehicles, clients, queued=True)
+        print(f"  queued  {rate:7.0f} writes/s   locked failures: {locked}   "
+              f"commits: {stats['commits']}   largest group: {stats['largest_group']}")
+    finally:
+        db.DB_FILE = original
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 from parking_system.database.db import get_conn
 from datetime import datetime, timedelta
-import numpy as np
+
+# pandas, numpy, matplotlib and scikit-learn are imported by the
+# functions using them, so importing this module stays cheap.
 
 def get_vehicle_logs():
     """Fetch vehicle logs with checkin and checkout times and slot info."""
+    import pandas as pd
+
     with get_conn() as conn:
         df = pd.read_sql_query("""
             SELECT v.license_plate, v.vehicle_type, v.slot_id,
@@ -29,6 +30,11 @@ def predict_slot_demand(excel_path="slot_demand.xlsx"):
         - predicted hourly demand
         - chart
     """
+    import numpy as np
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from sklearn.linear_model import LinearRegression
+
     df = get_vehicle_logs()
     if df.empty:
         print("No logs to predict.")
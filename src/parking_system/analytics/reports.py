@@ -1,24 +1,48 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 from parking_system.database.db import get_conn
 
-def get_vehicle_logs():
+# pandas and matplotlib are imported by the functions using them, so
+# importing this module (or anything importing it) stays cheap.
+
+def get_vehicle_logs(since=None, until=None):
+    """
+    Vehicle stays joined with their slot. `since`/`until` (datetimes or
+    ISO strings, until exclusive) limit the check-in time range and are
+    served by the idx_vehicle_logs_checkin index.
+    """
+    import pandas as pd
+
+    query, params = _vehicle_logs_sql(since, until)
     with get_conn() as conn:
-        df = pd.read_sql_query("""
+        df = pd.read_sql_query(query, conn, params=params)
+    if not df.empty:
+        df['checkin_time'] = pd.to_datetime(df['checkin_time'])
+        df['checkout_time'] = pd.to_datetime(df['checkout_time'])
+        df['duration_minutes'] = (df['checkout_time'] - df['checkin_time']).dt.total_seconds() / 60
+    return df
+
+def _vehicle_logs_sql(since=None, until=None):
+    query = """
             SELECT v.license_plate, v.vehicle_type, v.slot_id,
                    s.slot_type, s.level,
                    vl.checkin_time, vl.checkout_time, vl.amount
             FROM vehicles v
             LEFT JOIN vehicle_logs vl ON v.license_plate = vl.license_plate
             LEFT JOIN slots s ON v.slot_id = s.id
-        """, conn)
-    if not df.empty:
-        df['checkin_time'] = pd.to_datetime(df['checkin_time'])
-        df['checkout_time'] = pd.to_datetime(df['checkout_time'])
-        df['duration_minutes'] = (df['checkout_time'] - df['checkin_time']).dt.total_seconds() / 60
-    return df
+        """
+    conditions, params = [], []
+    for op, bound in ((">=", since), ("<", until)):
+        if bound is not None:
+            # Stored as datetime.isoformat(); compare in the same format
+            conditions.append(f"vl.checkin_time {op} ?")
+            params.append(bound.isoformat() if hasattr(bound, "isoformat") else str(bound))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, params
 
 def generate_enhanced_report(file_path="phase3_report.xlsx"):
+    import pandas as pd
+    import matplotlib.pyplot as plt
+
     df = get_vehicle_logs()
     if df.empty:
         print("No data to generate report.")
@@ -0,0 +1,181 @@
+"""
+Admission control: per-client rate limits and a cap on concurrent writes
+
+One misbehaving client (a camera loop retrying forever) must not starve
+the real gates of the SQLite write lock. An ASGI middleware in front of
+the API checks every request before any route work is done:
+
+    rate limit   a token bucket per client: `rate_per_second` tokens are
+                 added continuously up to `burst`, each request takes
+                 one. An empty bucket answers 429 with Retry-After (the
+                 time until the next token). Clients are told apart by
+                 the `client_header` header (the gate id), else by their
+                 address; per-client overrides go under `clients`.
+    write cap    at most `max_concurrent_writes` POST/PUT/PATCH/DELETE
+                 requests are in progress at once; the next one is shed
+                 with 503 and Retry-After instead of queueing behind them.
+
+Rejections cost a dict lookup and a few arithmetic operations, no
+database access. Limits come from the `admission` config section (off by
+default, enabled in configs/prod.yaml); stats() is served at
+GET /api/admission/stats.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from parking_system.api.responses import send_json
+from parking_system.config import get_config
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token: 0 if granted, else the seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else math.inf
+
+
+class AdmissionController:
+    def __init__(self, rate_per_second: float = 0, burst: float = 0, max_concurrent_writes: int = 0,
+                 max_clients: int = 10000, clients: Optional[Dict[str, dict]] = None,
+                 client_header: str = "x-gate-id", exempt_paths: Iterable[str] = ()):
+        self.rate = float(rate_per_second)          # 0 = no rate limit
+        self.burst = float(burst or max(self.rate, 1))
+        self.max_concurrent_writes = int(max_concurrent_writes)     # 0 = no cap
+        self.max_clients = max_clients
+        # Per-client (rate, burst)
+        self.overrides = {}
+        for name, limits in (clients or {}).items():
+            rate = float(limits.get("rate_per_second", self.rate))
+            self.overrides[name] = (rate, float(limits.get("burst") or max(rate, 1)))
+        self.client_header = client_header.lower().encode()
+        self.exempt_paths = frozenset(exempt_paths)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.writes_in_flight = 0
+        self.peak_writes = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    @classmethod
+    def from_config(cls) -> "AdmissionController":
+        settings = get_config().get("admission") or {}
+        if not settings.get("enabled", False):
+            return cls()
+        return cls(
+            rate_per_second=float(settings.get("rate_per_second", 0)),
+            burst=float(settings.get("burst", 0)),
+            max_concurrent_writes=int(settings.get("max_concurrent_writes", 0)),
+            max_clients=int(settings.get("max_clients", 10000)),
+            clients=settings.get("clients") or {},
+            client_header=settings.get("client_header", "x-gate-id"),
+            exempt_paths=settings.get("exempt_paths") or (),
+        )
+
+    @property
+    def active(self) -> bool:
+        return self.rate > 0 or bool(self.overrides) or self.max_concurrent_writes > 0
+
+    def client_id(self, scope) -> str:
+        for name, value in scope["headers"]:
+            if name == self.client_header:
+                return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "-"
+
+    def check_rate(self, client: str) -> float:
+        """0 if the client may proceed, else the seconds to wait."""
+        rate, burst = self.overrides.get(client, (self.rate, self.burst))
+        if rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(rate, burst, now)
+                # Forget the least recently seen clients (a full bucket is the default anyway)
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            wait = bucket.take(now)
+            if wait:
+                self.rate_limited += 1
+            return wait
+
+    def enter_write(self) -> bool:
+        with self._lock:
+            if self.max_concurrent_writes and self.writes_in_flight >= self.max_concurrent_writes:
+                self.shed += 1
+                return False
+            self.writes_in_flight += 1
+            self.peak_writes = max(self.peak_writes, self.writes_in_flight)
+            return True
+
+    def exit_write(self) -> None:
+        with self._lock:
+            self.writes_in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "admitted": self.admitted,
+                "rate_limited": self.rate_limited,
+                "shed": self.shed,
+                "writes_in_flight": self.writes_in_flight,
+                "peak_writes": self.peak_writes,
+                "clients": len(self._buckets),
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "max_concurrent_writes": self.max_concurrent_writes,
+            }
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        controller = self.controller
+        if scope["type"] != "http" or not controller.active or scope["path"] in controller.exempt_paths:
+            return await self.app(scope, receive, send)
+        wait = controller.check_rate(controller.client_id(scope))
+        if wait:
+            return await send_json(send, 429, {"detail": "Rate limit exceeded"}, _retry_after(wait))
+        if scope["method"] not in WRITE_METHODS:
+            controller.admitted += 1
+            return await self.app(scope, receive, send)
+        if not controller.enter_write():
+            return await send_json(send, 503, {"detail": "Too many writes in progress"}, _retry_after(1))
+        controller.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.exit_write()
+
+
+def _retry_after(seconds: float):
+    return [(b"retry-after", str(max(1, math.ceil(seconds))).encode())]
+
+
+# Process-wide limits
+admission = AdmissionController.from_config()
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from parking_system.api.admission import admission
+
+router = APIRouter(prefix="/api/admission", tags=["Admission"])
+
+@router.get("/stats", response_model=dict)
+async def admission_stats_api():
+    """Limiter counters: admitted, rate_limited (429), shed (503), writes in flight."""
+    return admission.stats()
@@ -0,0 +1,61 @@
+"""
+Conditional GET for the list endpoints
+
+Every committed write bumps the version of the listings it changes
+(core/read_cache.py: slot_list_cache / vehicle_list_cache). A listing's
+ETag is that version, so an unchanged table is answered with 304 from
+the If-None-Match header alone, without querying the table, and the
+serialized full listing is kept per version and reused.
+
+Writes by other workers or processes bump the versions as well: the
+version is read through read_cache.slot_list_version() /
+vehicle_list_version(), which first compare PRAGMA data_version and
+move every version when another connection has committed.
+
+ETags carry a per-process epoch: another worker (or this one after a
+restart) never matches them, it just answers 200.
+"""
+
+import secrets
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+
+EPOCH = secrets.token_hex(4)
+
+
+def etag(version: int) -> str:
+    return f'"{EPOCH}-{version}"'
+
+
+def not_modified(request: Request, tag: str) -> Optional[Response]:
+    """A 304 response if the client already has `tag`, else None."""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    candidates = {c.strip().removeprefix("W/") for c in header.split(",")}
+    if tag in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": tag, "Cache-Control": "no-cache"})
+    return None
+
+
+class VersionedBody:
+    """The JSON body of one listing, loaded once per version."""
+
+    def __init__(self):
+        self._cached = (-1, b"")
+
+    async def get(self, version: int, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        cached = self._cached
+        if cached[0] == version:
+            return cached[1]
+        body = await load()
+        # Keep the newest version only
+        if version > self._cached[0]:
+            self._cached = (version, body)
+        return body
+
+
+def json_response(body: bytes, tag: str, headers: Optional[dict] = None) -> Response:
+    headers = {"ETag": tag, "Cache-Control": "no-cache", **(headers or {})}
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from parking_system.api.responses import error_response
+from parking_system.api.schemas import GateEntry
+from parking_system.core import vehicle_manager
+
+router = APIRouter(prefix="/api/gate", tags=["Gate"])
+
+@router.post("/entry", response_model=dict)
+async def gate_entry_api(payload: GateEntry):
+    try:
+        return await vehicle_manager.gate_entry_async(payload.license_plate, payload.vehicle_type)
+    except Exception as e:
+        raise error_response(e)
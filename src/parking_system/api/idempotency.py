@@ -0,0 +1,108 @@
+"""
+Idempotency-Key handling for the retried POST endpoints
+
+An ASGI middleware in front of the routes listed in config
+(idempotency.paths). A request without the header passes through
+untouched. With it, the request body is read, fingerprinted together
+with the method and path, and the key is claimed from the store
+(core/idempotency.py):
+
+    - replay:    the stored response is sent again, with
+                 Idempotent-Replayed: true; the route does not run
+    - mismatch:  422, the key was already used for another request
+    - execute:   the route runs; its response is streamed to the client
+                 and stored under the key
+"""
+
+import hashlib
+from typing import Iterable, Optional
+
+from parking_system.api.responses import send_json
+from parking_system.config import get_config
+from parking_system.core import idempotency
+from parking_system.core.idempotency import IdempotencyStore, StoredResponse
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+
+DEFAULT_PATHS = (
+    "/api/vehicles/checkin/",
+    "/api/vehicles/checkout/",
+    "/api/slots/allocate/",
+    "/api/slots/allocate/bulk",
+    "/api/gate/entry",
+)
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, store: Optional[IdempotencyStore] = None, paths: Optional[Iterable[str]] = None):
+        self.app = app
+        self.store = store or idempotency.store
+        if paths is None:
+            paths = (get_config().get("idempotency") or {}).get("paths") or DEFAULT_PATHS
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        key = dict(scope["headers"]).get(HEADER)
+        if key is None:
+            return await self.app(scope, receive, send)
+        key = key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return await send_json(send, 400, {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"})
+
+        # The body is read once here and replayed to the route
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(b"%s %s\n%s" % (scope["method"].encode(), scope["path"].encode(), body)).hexdigest()
+
+        outcome, stored = await self.store.claim(key, fingerprint)
+        if outcome == idempotency.REPLAY:
+            return await _send_stored(send, stored)
+        if outcome == idempotency.MISMATCH:
+            return await send_json(send, 422, {"detail": "Idempotency-Key was already used for a different request"})
+
+        response = {"status": None, "content_type": None, "body": []}
+        delivered = False
+
+        async def replay_receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-type":
+                        response["content_type"] = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        result = None
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if response["status"] is not None:
+                result = StoredResponse(fingerprint, response["status"], response["content_type"], b"".join(response["body"]))
+        finally:
+            await self.store.complete(key, result)
+
+
+async def _send_stored(send, stored: StoredResponse) -> None:
+    headers = [(b"content-length", str(len(stored.body)).encode()), (b"idempotent-replayed", b"true")]
+    if stored.content_type:
+        headers.append((b"content-type", stored.content_type.encode("latin-1")))
+    await send({"type": "http.response.start", "status": stored.status, "headers": headers})
+    await send({"type": "http.response.body", "body": stored.body})
+
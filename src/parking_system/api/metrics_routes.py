@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Request, Response
+from parking_system import metrics
+from parking_system.api.admission import admission
+from parking_system.core import availability
+from parking_system.database.write_queue import write_queue
+from parking_system.notifications import notification_dispatcher
+
+router = APIRouter(tags=["Metrics"])
+
+# Values kept by other components, read when scraped
+slots_gauge = metrics.Gauge("parking_slots", "Slots per level, type and state (held slots count as occupied)", ("slot_type", "level", "state"))
+occupancy_gauge = metrics.Gauge("parking_occupancy_ratio", "Share of all slots not free (occupied or held)")
+admission_counter = metrics.Counter("parking_admission_total", "Requests by admission decision", ("decision",))
+writes_gauge = metrics.Gauge("parking_admission_writes_in_flight", "Write requests in progress")
+notifications_counter = metrics.Counter("parking_notifications_total", "Notifications by channel and outcome", ("channel", "outcome"))
+notifications_queued = metrics.Gauge("parking_notifications_queued", "Notifications waiting per channel", ("channel",))
+write_queue_gauge = metrics.Gauge("parking_write_queue_depth", "Writes waiting for the writer thread")
+
+def collect():
+    lot = availability.summary()
+    samples = []
+    for row in lot["levels"]:
+        labels = {"slot_type": row["slot_type"], "level": str(row["level"])}
+        samples.append(("", {**labels, "state": "free"}, row["free"]))
+        samples.append(("", {**labels, "state": "occupied"}, row["total"] - row["free"]))
+    yield slots_gauge, samples
+    yield occupancy_gauge, [("", {}, (lot["total"] - lot["free"]) / lot["total"] if lot["total"] else 0)]
+
+    stats = admission.stats()
+    yield admission_counter, [("", {"decision": d}, stats[d]) for d in ("admitted", "rate_limited", "shed")]
+    yield writes_gauge, [("", {}, stats["writes_in_flight"])]
+
+    channels = notification_dispatcher.stats()
+    yield notifications_counter, [
+        ("", {"channel": name, "outcome": outcome}, counts[outcome])
+        for name, counts in channels.items() for outcome in ("sent", "failed", "dropped")
+    ]
+    yield notifications_queued, [("", {"channel": name}, counts["queued"]) for name, counts in channels.items()]
+    yield write_queue_gauge, [("", {}, write_queue.stats()["queued"])]
+
+metrics.registry.add_collector(collect)
+
+async def metrics_api(request: Request) -> Response:
+    """Every metric of this process, in Prometheus text format."""
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+# Scraped by Prometheus, not part of the API: a plain route like /api/availability
+router.add_route("/metrics", metrics_api, methods=["GET"])
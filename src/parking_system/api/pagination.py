@@ -0,0 +1,50 @@
+"""
+Helpers for the list endpoints: keyset pagination and NDJSON streaming
+
+Paginated lists keep their plain JSON array body; the key to pass as
+`cursor` for the next page is returned in the X-Next-Cursor header (absent
+on the last page). With format=ndjson the rows are streamed one JSON
+object per line, read in keyset batches (database/db.py iter_rows), so
+neither the full result nor a database connection is held while the
+client downloads.
+"""
+
+from typing import Iterable, Iterator, Optional
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+
+from parking_system.api.responses import dumps
+from parking_system.database.db import JsonRows
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 10000
+
+# Rows serialized per chunk handed to the server
+CHUNK_ROWS = 500
+
+LimitQuery = Query(None, ge=1, le=MAX_PAGE_SIZE)
+FormatQuery = Query("json", pattern="^(json|ndjson)$")
+
+
+def next_cursor_headers(page: JsonRows, limit: Optional[int]) -> dict:
+    """Announce the next page when this one is full."""
+    if limit is not None and page.count == limit:
+        return {NEXT_CURSOR_HEADER: str(page.last_key)}
+    return {}
+
+
+def ndjson_response(rows: Iterable[dict]) -> StreamingResponse:
+    return StreamingResponse(_ndjson_chunks(rows), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _ndjson_chunks(rows: Iterable[dict]) -> Iterator[bytes]:
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(row))
+        if len(chunk) >= CHUNK_ROWS:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, HTTPException
+from parking_system.api.schemas import ReservationCreate
+from parking_system.core import reservations
+
+router = APIRouter(prefix="/api/reservations", tags=["Reservations"])
+
+@router.post("/", response_model=dict)
+async def reserve_slot_api(payload: ReservationCreate):
+    try:
+        return await reservations.reserve_slot_async(
+            payload.license_plate, payload.vehicle_type, payload.slot_type, payload.ttl_seconds
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{license_plate}", response_model=dict)
+async def get_reservation_api(license_plate: str):
+    reservation = reservations.book.get(license_plate)
+    if reservation is None:
+        raise HTTPException(status_code=404, detail="No reservation for vehicle")
+    return reservation
+
+@router.post("/{license_plate}/confirm", response_model=dict)
+async def confirm_reservation_api(license_plate: str):
+    try:
+        slot = await reservations.confirm_reservation_async(license_plate)
+        if slot is None:
+            raise ValueError("Vehicle already allocated")
+        return slot
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/{license_plate}", response_model=dict)
+async def cancel_reservation_api(license_plate: str):
+    if not await reservations.cancel_reservation_async(license_plate):
+        raise HTTPException(status_code=404, detail="No reservation for vehicle")
+    return {"license_plate": license_plate, "cancelled": True}
@@ -0,0 +1,71 @@
+"""
+JSON encoding for API responses
+
+orjson is used when installed (several times faster than the json module
+on row lists); without it responses fall back to json with compact
+separators, so the bodies are the same either way.
+
+FastJSONResponse is the default response class of the routers. Endpoints
+returning rows they built themselves (trusted dicts, or JSON already
+encoded by SQLite) return a Response directly, which also skips FastAPI's
+response_model validation and re-encoding.
+
+error_response maps the exceptions of a write route to their status.
+"""
+
+import json
+from typing import Any, Iterable, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from parking_system.database.db import is_busy_error
+from parking_system.payment import PaymentGatewayError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+async def send_json(send, status: int, content: Any, headers: Iterable[Tuple[bytes, bytes]] = ()) -> None:
+    """Send a complete JSON response from ASGI middleware."""
+    body = dumps(content)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def error_response(exc: Exception, payment: bool = False) -> Exception:
+    """
+    What a write route raises for `exc`:
+
+        ValueError, PermissionError   400, the request cannot succeed
+        SQLite lock contention        503 with Retry-After: the same
+        (and PaymentGatewayError       request may succeed when retried
+        on routes that take payment)
+        anything else                 exc itself, answered by the 500
+                                      handler
+
+    Idempotency-Keys only store final responses (core/idempotency.py),
+    so a retry after a 503 or 500 runs the request again.
+    """
+    if isinstance(exc, (ValueError, PermissionError)):
+        return HTTPException(status_code=400, detail=str(exc))
+    if is_busy_error(exc) or (payment and isinstance(exc, PaymentGatewayError)):
+        return HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+    return exc
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel
 
 class SlotCreate(BaseModel):
@@ -10,3 +11,16 @@ class VehicleCreate(BaseModel):
 
 class VehiclePlate(BaseModel):
     license_plate: str
+
+class VehiclePlates(BaseModel):
+    license_plates: List[str]
+
+class ReservationCreate(BaseModel):
+    license_plate: str
+    vehicle_type: Optional[str] = None
+    slot_type: Optional[str] = None
+    ttl_seconds: Optional[float] = None
+
+class GateEntry(BaseModel):
+    license_plate: str
+    vehicle_type: str
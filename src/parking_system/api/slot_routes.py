@@ -1,24 +1,117 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from parking_system.api.schemas import SlotCreate, VehiclePlate
-from parking_system.core import slot_manager
+import asyncio
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from parking_system.api import conditional
+from parking_system.api.pagination import FormatQuery, LimitQuery, ndjson_response, next_cursor_headers
+from parking_system.api.responses import FastJSONResponse, error_response
+from parking_system.api.schemas import SlotCreate, VehiclePlate, VehiclePlates
+from parking_system.core import read_cache, slot_events, slot_manager
 
-router = APIRouter(prefix="/api/slots", tags=["Slots"])
+router = APIRouter(prefix="/api/slots", tags=["Slots"], default_response_class=FastJSONResponse)
+
+# Serialized full listing, per slots version
+_slots_body = conditional.VersionedBody()
 
 @router.post("/", response_model=dict)
-def create_slot_api(payload: SlotCreate):
+async def create_slot_api(payload: SlotCreate):
     try:
-        return slot_manager.create_slot(payload.slot_type, payload.level)
+        return await slot_manager.create_slot_async(payload.slot_type, payload.level)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise error_response(e)
 
 @router.get("/", response_model=List[dict])
-def list_slots_api():
-    return slot_manager.list_slots()
+async def list_slots_api(
+    request: Request,
+    slot_type: Optional[str] = None,
+    level: Optional[int] = None,
+    is_occupied: Optional[bool] = None,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = LimitQuery,
+    format: str = FormatQuery,
+):
+    """
+    Slots in id order, optionally filtered. Pass `limit` to page through
+    them (next page: cursor=<X-Next-Cursor>), format=ndjson to stream.
+    JSON responses carry an ETag; If-None-Match answers 304 while no
+    slot has changed.
+    """
+    query = (slot_type, level, is_occupied, cursor, limit)
+    if format == "ndjson":
+        return ndjson_response(slot_manager.iter_slots(*query))
+    version = read_cache.slot_list_version()
+    tag = conditional.etag(version)
+    unchanged = conditional.not_modified(request, tag)
+    if unchanged is not None:
+        return unchanged
+    if query == (None,) * len(query):
+        return conditional.json_response(await _slots_body.get(version, _encode_slots), tag)
+    page = await slot_manager.query_slots_json_async(*query)
+    return conditional.json_response(page.body, tag, next_cursor_headers(page, limit))
+
+async def _encode_slots() -> bytes:
+    return (await slot_manager.query_slots_json_async()).body
 
 @router.post("/allocate/", response_model=dict)
-def allocate_slot_api(payload: VehiclePlate):
+async def allocate_slot_api(payload: VehiclePlate):
     try:
-        return slot_manager.allocate_slot(payload.license_plate)
+        return await slot_manager.allocate_slot_async(payload.license_plate)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise error_response(e)
+
+@router.post("/allocate/bulk", response_model=List[dict])
+async def allocate_slots_bulk_api(payload: VehiclePlates):
+    try:
+        return await slot_manager.allocate_slots_bulk_async(payload.license_plates)
+    except Exception as e:
+        raise error_response(e)
+
+# --------------------------------------------------
+# Live slot status (see core/slot_events.py)
+# --------------------------------------------------
+
+@router.get("/stream")
+async def slot_stream_sse():
+    """
+    Server-Sent Events: a `snapshot` event with every slot, then `delta`
+    events with the slots that changed.
+    """
+    broadcaster = slot_events.get_broadcaster()
+    subscription = await broadcaster.subscribe()
+
+    async def events():
+        try:
+            while True:
+                message = await subscription.next_message()
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"data: {message}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.websocket("/stream")
+async def slot_stream_ws(websocket: WebSocket):
+    """Same messages as the SSE stream, one per WebSocket text frame."""
+    await websocket.accept()
+    broadcaster = slot_events.get_broadcaster()
+    subscription = await broadcaster.subscribe()
+
+    async def send():
+        while True:
+            message = await subscription.next_message()
+            if message is not None:
+                await websocket.send_text(message)
+
+    sender = asyncio.ensure_future(send())
+    try:
+        # Incoming frames are ignored; wait for the client to leave
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        broadcaster.unsubscribe(subscription)
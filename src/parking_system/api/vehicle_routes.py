@@ -1,31 +1,64 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Request
+from typing import List, Optional
+from parking_system.api import conditional
+from parking_system.api.pagination import FormatQuery, LimitQuery, ndjson_response, next_cursor_headers
+from parking_system.api.responses import FastJSONResponse, error_response
 from parking_system.api.schemas import VehicleCreate, VehiclePlate
-from parking_system.core import vehicle_manager
+from parking_system.core import read_cache, vehicle_manager
 
-router = APIRouter(prefix="/api/vehicles", tags=["Vehicles"])
+router = APIRouter(prefix="/api/vehicles", tags=["Vehicles"], default_response_class=FastJSONResponse)
+
+# Serialized full listing, per vehicles version
+_vehicles_body = conditional.VersionedBody()
 
 @router.post("/", response_model=dict)
-def register_vehicle_api(payload: VehicleCreate):
+async def register_vehicle_api(payload: VehicleCreate):
     try:
-        return vehicle_manager.register_vehicle(payload.license_plate, payload.vehicle_type)
+        return await vehicle_manager.register_vehicle_async(payload.license_plate, payload.vehicle_type)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise error_response(e)
 
 @router.get("/", response_model=List[dict])
-def list_vehicles_api():
-    return vehicle_manager.list_vehicles()
+async def list_vehicles_api(
+    request: Request,
+    vehicle_type: Optional[str] = None,
+    checked_in: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = LimitQuery,
+    format: str = FormatQuery,
+):
+    """
+    Vehicles in license plate order, optionally filtered. Pass `limit` to
+    page through them (next page: cursor=<X-Next-Cursor>), format=ndjson
+    to stream. JSON responses carry an ETag; If-None-Match answers 304
+    while no vehicle has changed.
+    """
+    query = (vehicle_type, checked_in, cursor, limit)
+    if format == "ndjson":
+        return ndjson_response(vehicle_manager.iter_vehicles(*query))
+    version = read_cache.vehicle_list_version()
+    tag = conditional.etag(version)
+    unchanged = conditional.not_modified(request, tag)
+    if unchanged is not None:
+        return unchanged
+    if query == (None,) * len(query):
+        return conditional.json_response(await _vehicles_body.get(version, _encode_vehicles), tag)
+    page = await vehicle_manager.query_vehicles_json_async(*query)
+    return conditional.json_response(page.body, tag, next_cursor_headers(page, limit))
+
+async def _encode_vehicles() -> bytes:
+    return (await vehicle_manager.query_vehicles_json_async()).body
 
 @router.post("/checkin/", response_model=dict)
-def checkin_vehicle_api(payload: VehiclePlate):
+async def checkin_vehicle_api(payload: VehiclePlate):
     try:
-        return vehicle_manager.checkin_vehicle(payload.license_plate)
+        return await vehicle_manager.checkin_vehicle_async(payload.license_plate)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise error_response(e)
 
 @router.post("/checkout/", response_model=dict)
-def checkout_vehicle_api(payload: VehiclePlate):
+async def checkout_vehicle_api(payload: VehiclePlate):
     try:
-        return vehicle_manager.checkout_vehicle(payload.license_plate)
+        return await vehicle_manager.checkout_vehicle_async(payload.license_plate)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise error_response(e, payment=True)
@@ -1,10 +1,13 @@
 # src/parking_system/config.py
+import os
 import yaml
 from pathlib import Path
 from copy import deepcopy
 
 CONFIG_DIR = Path(__file__).resolve().parent.parent.parent / "configs"
 
+_config = None
+
 def deep_merge(default: dict, override: dict) -> dict:
     """Recursively merge two dicts: override keys take precedence"""
     result = deepcopy(default)
@@ -31,3 +34,23 @@ def load_config(env="dev"):
     if "app" not in config or "name" not in config["app"]:
         raise ValueError("Missing 'app.name' in configuration!")
     return config
+
+
+def get_config() -> dict:
+    """
+    Process-wide configuration, loaded once for the environment named by
+    PARKING_ENV (defaults to "dev").
+    """
+    global _config
+    if _config is None:
+        _config = load_config(os.environ.get("PARKING_ENV", "dev"))
+    return _config
+
+
+def set_config(config: dict) -> None:
+    """
+    Make `config` the process-wide configuration. Components read it when
+    first imported, so this must happen before they are (create_app does).
+    """
+    global _config
+    _config = config
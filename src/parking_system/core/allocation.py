@@ -0,0 +1,157 @@
+# src/parking_system/core/allocation.py
+"""
+Allocation strategies
+
+A strategy decides which free slot a vehicle gets. Strategies never query
+the DB: they turn the vehicle type into an ordered list of
+(slot_type, level) buckets of the free-slot index and take the lowest free
+slot id of the first non-empty bucket. Bucket orderings are precomputed
+per vehicle type and only rebuilt when the lot layout changes.
+
+The active strategy is configured per deployment:
+
+    allocation:
+      strategy: best_fit
+"""
+
+from typing import Dict, List, Optional, Tuple, Type
+
+from parking_system.config import get_config
+from parking_system.core.slot_index import Bucket, FreeSlotIndex
+
+DEFAULT_STRATEGY = "best_fit"
+
+STRATEGIES: Dict[str, Type["AllocationStrategy"]] = {}
+_instances: Dict[str, "AllocationStrategy"] = {}
+
+
+def register_strategy(name: str):
+    """
+    Class decorator adding a strategy to the registry.
+    """
+    def decorator(cls):
+        cls.name = name
+        STRATEGIES[name] = cls
+        return cls
+    return decorator
+
+
+def get_strategy(name: Optional[str] = None) -> "AllocationStrategy":
+    """
+    Return the strategy called `name`, or the configured one.
+    """
+    settings = get_config().get("allocation") or {}
+    name = name or settings.get("strategy") or DEFAULT_STRATEGY
+    strategy = _instances.get(name)
+    if strategy is None:
+        cls = STRATEGIES.get(name)
+        if cls is None:
+            raise ValueError(f"Unknown allocation strategy: {name}")
+        strategy = _instances[name] = cls(settings)
+    return strategy
+
+
+class AllocationStrategy:
+    """
+    Base strategy: subclasses only define how eligible buckets are ranked.
+    """
+    name = None
+
+    def __init__(self, settings: Optional[dict] = None):
+        settings = settings or {}
+        self.entrance_level = int(settings.get("entrance_level", 1))
+        self.slot_fit = {
+            str(vtype).lower(): [str(t).lower() for t in types]
+            for vtype, types in (settings.get("slot_fit") or {}).items()
+        }
+        self._orderings: Dict[Tuple[int, int, str], List[Bucket]] = {}
+
+    def fit_rank(self, vehicle_type: Optional[str], slot_type: str) -> Optional[int]:
+        """
+        0 for the best-fitting slot type, higher for looser fits,
+        None when the vehicle does not fit at all.
+        """
+        fits = self.slot_fit.get((vehicle_type or "").lower())
+        if fits is None:
+            return 0
+        slot_type = slot_type.lower()
+        return fits.index(slot_type) if slot_type in fits else None
+
+    def rank(self, fit: int, slot_type: str, level: int) -> tuple:
+        raise NotImplementedError
+
+    def ordering(self, index: FreeSlotIndex, vehicle_type: Optional[str]) -> List[Bucket]:
+        """
+        Eligible buckets for a vehicle type, best first (cached per layout).
+        """
+        key = (id(index), index.layout_version, (vehicle_type or "").lower())
+        buckets = self._orderings.get(key)
+        if buckets is None:
+            ranked = []
+            for slot_type, level in index.layout():
+                fit = self.fit_rank(vehicle_type, slot_type)
+                if fit is not None:
+                    ranked.append((self.rank(fit, slot_type, level), (slot_type, level)))
+            buckets = [bucket for _, bucket in sorted(ranked)]
+            if len(self._orderings) > 256:
+                self._orderings.clear()
+            self._orderings[key] = buckets
+        return buckets
+
+    def select(self, index: FreeSlotIndex, vehicle_type: Optional[str]) -> Optional[int]:
+        """
+        Take a free slot for the vehicle out of the index.
+        """
+        return index.pop_first(self.ordering(index, vehicle_type))
+
+
+@register_strategy("first_free")
+class FirstFreeStrategy(AllocationStrategy):
+    """Lowest free slot id regardless of type (legacy behaviour)."""
+
+    def select(self, index, vehicle_type):
+        return index.pop()
+
+
+@register_strategy("best_fit")
+class BestFitStrategy(AllocationStrategy):
+    """Tightest slot type the vehicle fits in, then lowest level."""
+
+    def rank(self, fit, slot_type, level):
+        return (fit, level)
+
+
+@register_strategy("lowest_level")
+class LowestLevelStrategy(AllocationStrategy):
+    """Fill the lowest level first, best fit within a level."""
+
+    def rank(self, fit, slot_type, level):
+        return (level, fit)
+
+
+@register_strategy("spread_levels")
+class SpreadLevelsStrategy(AllocationStrategy):
+    """Level with the most free eligible slots, best fit within a level."""
+
+    def rank(self, fit, slot_type, level):
+        return (fit, level)
+
+    def select(self, index, vehicle_type):
+        buckets = self.ordering(index, vehicle_type)
+        free_per_level: Dict[int, int] = {}
+        for bucket in buckets:
+            free_per_level[bucket[1]] = free_per_level.get(bucket[1], 0) + index.free_count(bucket)
+        # Stable sort keeps the best-fit order inside each level
+        buckets = sorted(buckets, key=lambda b: -free_per_level[b[1]])
+        return index.pop_first(buckets)
+
+
+@register_strategy("nearest_entrance")
+class NearestEntranceStrategy(AllocationStrategy):
+    """
+    Fewest levels away from the entrance level, best fit on ties.
+    Within a level, lower slot ids are taken to be closer to the ramp.
+    """
+
+    def rank(self, fit, slot_type, level):
+        return (abs(level - self.entrance_level), fit, level)
@@ -0,0 +1,176 @@
+# src/parking_system/core/availability.py
+"""
+Free slots per level and slot type
+
+Signage, the dashboard and the mobile app only need availability counts.
+The free-slot index (core/slot_index.py) already maintains a total and a
+free count per (slot_type, level) on every allocation, checkout, sensor
+update and reservation, so the summary is read from those counters and
+never from the slots table. It is rebuilt only when the index version
+moves; in between every request gets the same summary (and the same
+encoded JSON body).
+
+Counters can drift if the table is changed behind the index's back
+(another process, a manual fix). The Reconciler recounts the table
+periodically and rebuilds the index when the counts disagree. It does so
+on the writer (database/write_queue.py) holding the write lock: an
+allocation takes its slot from the index inside its write transaction,
+so while the lock is held none is between taking a slot and committing
+the claim, which would otherwise look like drift and put the slot back.
+"""
+
+import json
+import threading
+from typing import Dict, Optional, Tuple
+
+from parking_system.config import get_config
+from parking_system.core import slot_manager
+from parking_system.database.db import get_conn
+from parking_system.database.write_queue import write_queue
+
+Counts = Dict[Tuple[str, int], Tuple[int, int]]  # (slot_type, level) -> (total, free)
+
+# (index version, summary, JSON body) of the last summary built
+_cached = (-1, None, b"")
+
+
+def summary() -> dict:
+    """
+    {"total", "free", "levels": [{"level", "slot_type", "total", "free"}]}
+    Slots held for reservations are not free.
+    """
+    return _current()[1]
+
+
+def summary_json() -> bytes:
+    """summary(), encoded once per index version."""
+    return _current()[2]
+
+
+def _current():
+    global _cached
+    index = slot_manager.get_free_slot_index()
+    # Read the version first: a change racing the snapshot only makes the
+    # next call rebuild again
+    version = index.version
+    cached = _cached
+    if cached[0] == version:
+        return cached
+    levels = [
+        {"level": level, "slot_type": slot_type, "total": total, "free": free}
+        for slot_type, level, total, free in index.availability()
+    ]
+    result = {
+        "total": sum(row["total"] for row in levels),
+        "free": sum(row["free"] for row in levels),
+        "levels": levels,
+    }
+    cached = _cached = (version, result, json.dumps(result).encode())
+    return cached
+
+
+# Served by idx_slots_bucket
+TABLE_COUNTS_SQL = "SELECT slot_type, level, COUNT(*), SUM(is_occupied = 0) FROM slots GROUP BY slot_type, level"
+
+
+def table_counts(conn=None) -> Counts:
+    """Totals and free counts per bucket, counted in the slots table."""
+    if conn is None:
+        with get_conn() as conn:
+            return table_counts(conn)
+    rows = conn.execute(TABLE_COUNTS_SQL).fetchall()
+    return {(slot_type, level): (total, free) for slot_type, level, total, free in rows}
+
+
+def index_counts(index) -> Counts:
+    return {(t, lvl): (total, free) for t, lvl, total, free in index.availability()}
+
+
+class Reconciler:
+    """
+    Recounts the slots table every `interval` seconds and rebuilds the
+    free-slot index if its counters drifted.
+    """
+
+    def __init__(self, interval: float = 60.0):
+        self.interval = interval
+        self.checks = 0
+        self.corrections = 0
+        self.last_drift: Counts = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls) -> "Reconciler":
+        settings = get_config().get("availability") or {}
+        return cls(interval=float(settings.get("reconcile_interval_seconds", 60)))
+
+    def reconcile(self) -> Counts:
+        """
+        Compare the counters with the table once; returns the drifted
+        buckets as counted in the table (empty if in sync).
+        """
+        if slot_manager._engine() is not None:
+            # The state engine is the source of truth, not the table
+            return {}
+        return write_queue.submit(self._reconcile).result()
+
+    def _reconcile(self) -> Counts:
+        with get_conn(immediate=True) as conn:
+            return self._compare(conn)
+
+    def _compare(self, conn) -> Counts:
+        index = slot_manager.get_free_slot_index()
+        version = index.version
+        counted = table_counts(conn)
+        # Held slots are free in the table but kept out of the index
+        for slot_id in list(slot_manager.held_by_slot):
+            bucket = index.bucket_of(slot_id)
+            if bucket in counted:
+                total, free = counted[bucket]
+                counted[bucket] = (total, free - 1)
+        current = index_counts(index)
+        self.checks += 1
+        if index.version != version:
+            # Changed while counting: inconclusive, try next time
+            return {}
+        drift = {
+            bucket: counted.get(bucket, (0, 0))
+            for bucket in counted.keys() | current.keys()
+            if counted.get(bucket) != current.get(bucket)
+        }
+        if drift:
+            self.corrections += 1
+            self.last_drift = drift
+            slot_manager.load_free_slot_index(conn)
+        return drift
+
+    def start(self) -> "Reconciler":
+        if self._thread is None and self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="availability-reconciler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"checks": self.checks, "corrections": self.corrections}
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                drift = self.reconcile()
+            except Exception as e:
+                print(f"[AVAILABILITY] Reconciliation failed: {e}")
+                continue
+            if drift:
+                print(f"[AVAILABILITY] Counters drifted, index rebuilt: {drift}")
+
+
+# Process-wide reconciler; started by the API at startup
+reconciler = Reconciler.from_config()
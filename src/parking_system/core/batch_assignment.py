@@ -0,0 +1,341 @@
+# src/parking_system/core/batch_assignment.py
+"""
+Batch assignment of simultaneous arrivals
+
+Instead of handing each queued vehicle the first free slot, arrivals are
+collected over a short window and matched to free slots in one go by
+solving a min-cost assignment problem. The cost of putting vehicle i in
+slot j combines:
+
+    - type mismatch: how loose the fit is (see allocation.slot_fit);
+      slots the vehicle does not fit in are infeasible
+    - level: higher levels cost more to reach
+    - distance: levels between the vehicle's gate and the slot, plus the
+      slot's position on its level (lower ids are nearer the ramp)
+
+The cost matrix is built with NumPy and solved with a vectorized
+shortest-augmenting-path (Hungarian / Jonker-Volgenant) solver. All
+resulting claims are committed in one transaction.
+
+Configured under `allocation.batch` in configs/*.yaml; with `enabled`
+the API's allocation requests go through an ArrivalBatcher
+(slot_manager.allocate_slot_async).
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from parking_system.config import get_config
+from parking_system.core import read_cache, slot_manager
+from parking_system.core.allocation import get_strategy
+from parking_system.database.db import get_conn, retry_on_busy, run_in_transaction
+from parking_system.database.write_queue import write_queue
+
+INFEASIBLE = 1e9
+
+Arrival = Tuple[str, Optional[int]]  # (license_plate, gate_level)
+
+
+def batch_settings() -> dict:
+    settings = {
+        "enabled": False,
+        "window_ms": 500,
+        "max_batch": 200,
+        "type_weight": 10.0,
+        "level_weight": 1.0,
+        "distance_weight": 5.0,
+    }
+    settings.update((get_config().get("allocation") or {}).get("batch") or {})
+    return settings
+
+
+# --------------------------------------------------
+# Cost model and solver
+# --------------------------------------------------
+
+def build_cost_matrix(
+    vehicle_types: Sequence[str],
+    gate_levels: Sequence[int],
+    slot_ids: np.ndarray,
+    slot_types: np.ndarray,
+    slot_levels: np.ndarray,
+    settings: Optional[dict] = None,
+) -> np.ndarray:
+    """
+    (vehicles x slots) cost matrix; infeasible pairs cost INFEASIBLE.
+    """
+    settings = settings or batch_settings()
+    strategy = get_strategy()
+    slot_levels = slot_levels.astype(np.float64)
+
+    # Per-slot part, shared by every vehicle
+    position = slot_ids / (slot_ids.max() + 1.0) if len(slot_ids) else slot_ids
+    base = settings["level_weight"] * slot_levels + settings["distance_weight"] * position
+
+    # Fit ranks: one lookup row per distinct vehicle type
+    unique_types, type_idx = np.unique(slot_types, return_inverse=True)
+    fit_rows = {}
+    for vtype in set(vehicle_types):
+        ranks = [strategy.fit_rank(vtype, str(t)) for t in unique_types]
+        fit_rows[vtype] = np.array(
+            [INFEASIBLE if r is None else settings["type_weight"] * r for r in ranks],
+            dtype=np.float64,
+        )[type_idx]
+
+    gates = np.asarray(gate_levels, dtype=np.float64)[:, None]
+    cost = base[None, :] + settings["distance_weight"] * np.abs(slot_levels[None, :] - gates)
+    cost += np.stack([fit_rows[v] for v in vehicle_types]) if len(vehicle_types) else 0.0
+    return np.minimum(cost, INFEASIBLE)
+
+
+def solve_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum-cost assignment for a rectangular cost matrix.
+    Returns (rows, cols) with every row (or column, if there are fewer)
+    assigned exactly once, like scipy's linear_sum_assignment.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    if cost.shape[0] > cost.shape[1]:
+        cols, rows = solve_assignment(cost.T)
+        order = np.argsort(rows)
+        return rows[order], cols[order]
+
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)      # p[j]: row (1-based) assigned to column j
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free[1:] & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            candidates = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(candidates))
+            delta = candidates[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.nonzero(p[1:])[0]
+    rows = p[1:][cols] - 1
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+
+# --------------------------------------------------
+# Allocation
+# --------------------------------------------------
+
+def allocate_batch(arrivals: List[Arrival]) -> list:
+    """
+    Allocate slots to a batch of waiting vehicles at once.
+    Results follow allocate_slots_bulk: one per arrival, in order, with
+    either "slot" or "error". A single arrival uses the greedy path.
+    """
+    if len(arrivals) == 1:
+        plate = arrivals[0][0]
+        try:
+            return [{"license_plate": plate, "slot": _allocate_one(plate)}]
+        except ValueError as e:
+            return [{"license_plate": plate, "error": str(e)}]
+    return _allocate_batch(arrivals)
+
+
+@retry_on_busy()
+def _allocate_one(plate: str) -> dict:
+    # allocate_slot's transaction, without counting another "allocate"
+    # operation for the request that submitted the arrival
+    return run_in_transaction(slot_manager._allocate_slot_tx, plate)
+
+
+@retry_on_busy()
+def _allocate_batch(arrivals: List[Arrival]) -> list:
+    claimed = []
+    holds = {}      # plate -> held slot id, taken out of held_slots by this batch
+    try:
+        with get_conn(immediate=True) as conn:
+            cur = conn.cursor()
+            plates = list(dict.fromkeys(plate for plate, _ in arrivals))
+            vehicles = {}
+            for i in range(0, len(plates), 500):
+                chunk = plates[i:i + 500]
+                cur.execute(
+                    f"SELECT license_plate, vehicle_type, slot_id FROM vehicles "
+                    f"WHERE license_plate IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                vehicles.update((r["license_plate"], r) for r in cur.fetchall())
+
+            results: list = [None] * len(arrivals)
+            assignments = []
+            waiting = []
+            seen = set()
+            for i, (plate, _) in enumerate(arrivals):
+                vehicle = vehicles.get(plate)
+                if vehicle is None:
+                    results[i] = {"license_plate": plate, "error": "Vehicle does not exist"}
+                elif plate in seen or vehicle["slot_id"] is not None:
+                    results[i] = {"license_plate": plate, "error": "Vehicle already allocated"}
+                else:
+                    seen.add(plate)
+                    # A pre-booked vehicle gets its held slot, as in allocate_slots_bulk
+                    held = slot_manager.release_hold(plate)
+                    slot = None
+                    if held is not None:
+                        holds[plate] = held
+                        slot = slot_manager._claim_slot(cur, plate, held)
+                    if slot is None:
+                        waiting.append(i)
+                        continue
+                    claimed.append(slot["id"])
+                    assignments.append((slot["id"], plate))
+                    results[i] = {"license_plate": plate, "slot": slot}
+
+            free = slot_manager.get_free_slot_index().free_slots()
+            if waiting and free:
+                slot_ids = np.fromiter((f[0] for f in free), dtype=np.int64, count=len(free))
+                slot_types = np.array([f[1] for f in free], dtype=object)
+                slot_levels = np.fromiter((f[2] for f in free), dtype=np.int64, count=len(free))
+                entrance = get_strategy().entrance_level
+                cost = build_cost_matrix(
+                    [vehicles[arrivals[i][0]]["vehicle_type"] for i in waiting],
+                    [entrance if arrivals[i][1] is None else arrivals[i][1] for i in waiting],
+                    slot_ids, slot_types, slot_levels,
+                )
+                rows, cols = solve_assignment(cost)
+                for r, c in zip(rows, cols):
+                    if cost[r, c] >= INFEASIBLE:
+                        continue
+                    i = waiting[r]
+                    plate = arrivals[i][0]
+                    slot = slot_manager._claim_slot(cur, plate, int(slot_ids[c]))
+                    if slot is None:
+                        # Taken by another process since the snapshot
+                        slot = slot_manager._claim_free_slot(
+                            cur, plate, vehicles[plate]["vehicle_type"], refresh=False
+                        )
+                    if slot is None:
+                        continue
+                    claimed.append(slot["id"])
+                    assignments.append((slot["id"], plate))
+                    results[i] = {"license_plate": plate, "slot": slot}
+
+            for i in waiting:
+                if results[i] is None:
+                    results[i] = {"license_plate": arrivals[i][0], "error": "No available slots"}
+
+            cur.executemany("UPDATE vehicles SET slot_id=? WHERE license_plate=?", assignments)
+        if claimed:
+            slot_manager._slots_changed(*claimed)
+            read_cache.invalidate_vehicles()
+        return results
+    except Exception:
+        # Rolled back: claimed slots are free again, holds are held again
+        held = set(holds.values())
+        for slot_id in claimed:
+            if slot_id not in held:
+                slot_manager.free_slot_index.release(slot_id)
+        for plate, slot_id in holds.items():
+            slot_manager.hold_slot(plate, slot_id)
+        raise
+
+
+class ArrivalBatcher:
+    """
+    Collects arrivals for `window_ms` (or until `max_batch` vehicles are
+    waiting) and allocates them together; each batch is one command of
+    the single-writer queue (database/write_queue.py).
+
+        batcher = ArrivalBatcher().start()
+        slot = batcher.allocate("ABC123", gate_level=1)
+    """
+
+    def __init__(self, window_ms: Optional[float] = None, max_batch: Optional[int] = None):
+        settings = batch_settings()
+        self.window = (settings["window_ms"] if window_ms is None else window_ms) / 1000.0
+        self.max_batch = settings["max_batch"] if max_batch is None else max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self.batches = 0
+
+    def start(self) -> "ArrivalBatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="arrival-batcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Allocate whatever is still waiting, then stop the worker."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, license_plate: str, gate_level: Optional[int] = None) -> Future:
+        future: Future = Future()
+        self._queue.put((license_plate, gate_level, future))
+        return future
+
+    def allocate(self, license_plate: str, gate_level: Optional[int] = None, timeout: Optional[float] = None) -> dict:
+        """Blocking helper: the allocated slot, or ValueError."""
+        return self.submit(license_plate, gate_level).result(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch) -> None:
+        self.batches += 1
+        try:
+            results = write_queue.submit(allocate_batch, [(plate, gate) for plate, gate, _ in batch]).result()
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            if "slot" in result:
+                future.set_result(result["slot"])
+            else:
+                future.set_exception(ValueError(result["error"]))
@@ -0,0 +1,193 @@
+# src/parking_system/core/idempotency.py
+"""
+Idempotency keys for retried POSTs
+
+Gate controllers on flaky links retry check-in, check-out and allocation
+requests; without a key every retry does the work again (a second log
+row, a second payment). A client sending the same Idempotency-Key gets
+the response of the first request back instead.
+
+    memory    bounded LRU of key -> stored response (hot retries)
+    table     idempotency_keys, for keys evicted from the LRU or stored
+              by an earlier run of the process; rows expire after
+              ttl_seconds
+    in-flight a request whose key is still being processed waits for
+              that first request and shares its response, so concurrent
+              duplicates run once
+
+A key belongs to one request: the same key sent with another method,
+path or body is refused (the fingerprint differs). Only final outcomes
+are stored: successful (2xx) responses and 422s (the request itself is
+invalid, so a retry would get the same). Other 4xx (e.g. no slot free
+yet), 5xx responses and failures are not, so the client's next retry
+runs again.
+
+The key is stored after the operation's own transaction committed: a
+crash in between loses the key and a retry runs the operation again, as
+it would without a key.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from parking_system.config import get_config
+from parking_system.database.async_db import async_db
+from parking_system.database.db import get_conn
+
+# claim() outcomes
+REPLAY = "replay"          # stored response for this key and request
+MISMATCH = "mismatch"      # key already used by another request
+EXECUTE = "execute"        # caller runs the request, then complete()
+
+
+def is_final(status: int) -> bool:
+    """Whether a response with this status is stored for the key."""
+    return 200 <= status < 300 or status == 422
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status: int
+    content_type: Optional[str]
+    body: bytes
+
+
+class IdempotencyStore:
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 86400, durable: bool = True):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.durable = durable
+        self._lru: "OrderedDict[str, Tuple[float, StoredResponse]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stored_since_sweep = 0
+        self.replays = 0
+        self.coalesced = 0
+        self.executions = 0
+
+    @classmethod
+    def from_config(cls) -> "IdempotencyStore":
+        settings = get_config().get("idempotency") or {}
+        return cls(
+            max_size=int(settings.get("lru_size", 10000)),
+            ttl_seconds=float(settings.get("ttl_seconds", 86400)),
+        )
+
+    async def claim(self, key: str, fingerprint: str) -> Tuple[str, Optional[StoredResponse]]:
+        """
+        (REPLAY, response), (MISMATCH, response) or (EXECUTE, None). After
+        EXECUTE the caller must call complete() with the outcome, also
+        when the request failed.
+        """
+        while True:
+            with self._lock:
+                stored = self._get_cached(key)
+                if stored is None:
+                    waiting = self._in_flight.get(key)
+                    if waiting is None:
+                        self._in_flight[key] = Future()
+            if stored is not None:
+                return self._outcome(stored, fingerprint)
+            if waiting is not None:
+                # Same key in progress: share its outcome, or retry if it had none
+                self.coalesced += 1
+                stored = await asyncio.wrap_future(waiting)
+                if stored is not None:
+                    return self._outcome(stored, fingerprint)
+                continue
+            if self.durable:
+                try:
+                    stored = await async_db.read(self._load, key, time.time() - self.ttl_seconds)
+                except asyncio.CancelledError:
+                    self._resolve(key, None, remember=False)
+                    raise
+                except Exception as e:
+                    print(f"[IDEMPOTENCY] Key lookup failed: {e}")
+                if stored is not None:
+                    self._resolve(key, stored, remember=True)
+                    return self._outcome(stored, fingerprint)
+            self.executions += 1
+            return EXECUTE, None
+
+    async def complete(self, key: str, response: Optional[StoredResponse]) -> None:
+        """Outcome of a claimed key: the response to store, or None (not stored)."""
+        if response is not None and not is_final(response.status):
+            response = None
+        self._resolve(key, response, remember=response is not None)
+        if response is None or not self.durable:
+            return
+        try:
+            await async_db.write_tx(self._insert_tx, key, response, time.time())
+        except Exception as e:
+            # Still answered from memory while the key stays in the LRU
+            print(f"[IDEMPOTENCY] Storing key failed: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "keys": len(self._lru),
+                "in_flight": len(self._in_flight),
+                "replays": self.replays,
+                "coalesced": self.coalesced,
+                "executions": self.executions,
+            }
+
+    def _outcome(self, stored: StoredResponse, fingerprint: str) -> Tuple[str, StoredResponse]:
+        if stored.fingerprint != fingerprint:
+            return MISMATCH, stored
+        self.replays += 1
+        return REPLAY, stored
+
+    def _get_cached(self, key: str) -> Optional[StoredResponse]:
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time() - self.ttl_seconds:
+            del self._lru[key]
+            return None
+        self._lru.move_to_end(key)
+        return entry[1]
+
+    def _resolve(self, key: str, stored: Optional[StoredResponse], remember: bool) -> None:
+        with self._lock:
+            if remember and self.max_size > 0:
+                self._lru[key] = (time.time(), stored)
+                self._lru.move_to_end(key)
+                while len(self._lru) > self.max_size:
+                    self._lru.popitem(last=False)
+            waiting = self._in_flight.pop(key, None)
+        if waiting is not None:
+            waiting.set_result(stored)
+
+    @staticmethod
+    def _load(key: str, not_before: float) -> Optional[StoredResponse]:
+        with get_conn() as conn:
+            row = conn.execute(
+                "SELECT fingerprint, status, content_type, body FROM idempotency_keys WHERE key = ? AND created_at >= ?",
+                (key, not_before),
+            ).fetchone()
+        return StoredResponse(*row) if row else None
+
+    def _insert_tx(self, cur, tx, key: str, response: StoredResponse, now: float) -> None:
+        cur.execute(
+            "INSERT OR REPLACE INTO idempotency_keys (key, fingerprint, status, content_type, body, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, *response, now),
+        )
+        # Sweep expired keys now and then
+        self._stored_since_sweep += 1
+        if self._stored_since_sweep >= 1000:
+            self._stored_since_sweep = 0
+            cur.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (now - self.ttl_seconds,))
+
+
+# Process-wide store
+store = IdempotencyStore.from_config()
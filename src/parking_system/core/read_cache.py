@@ -0,0 +1,279 @@
+# src/parking_system/core/read_cache.py
+"""
+Read-through caches for slot and vehicle lookups
+
+Dashboards call get_slot_by_id, list_slots and list_vehicles in tight
+loops, and the live-status publishers (SSE, MQTT) load the slots that
+changed; without a cache each call is a SQLite query. Two kinds of
+cache sit in front of them:
+
+    - LRUCache: bounded per-key cache (slot by id)
+    - SnapshotCache: the whole table as one list, tagged with a version
+
+Every write path in slot_manager / vehicle_manager invalidates what it
+changed once its transaction has committed (invalidate_slots,
+invalidate_vehicles). A fill that raced with an invalidation is dropped
+rather than stored: each cache has a generation counter, a loader
+records it before querying and only stores its result if no
+invalidation happened meanwhile. So a reader can never put back a row
+that a committed write already replaced.
+
+Writes made by other processes (or anything else bypassing those
+paths) are caught by PRAGMA data_version: every read first checks it on
+a dedicated connection, and when another connection has committed
+since the last check, compares the per-table change counters kept by
+triggers (table change_counters) and clears the caches of the tables
+that moved. This process's own commits move them too, so a local write
+costs one more clear of its table; the explicit invalidations still
+matter because they take effect immediately, before the next check.
+
+Cached rows are shared between callers and must not be modified.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Optional
+
+from parking_system.config import get_config
+from parking_system.database import db
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._data: "OrderedDict" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, loader: Callable[[Hashable], object]):
+        """
+        Return the cached value for `key`, loading (and caching) it with
+        loader(key) on a miss. None results are cached too.
+        """
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            generation = self._generation
+        value = loader(key)
+        with self._lock:
+            if generation == self._generation and self.max_size > 0:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+        return value
+
+    def get_many(self, keys: Iterable[Hashable], loader: Callable[[list], dict]) -> list:
+        """
+        Values for `keys`, in order. The missing ones are loaded with a
+        single loader(missing keys) call returning {key: value}; keys it
+        leaves out are cached as None.
+        """
+        keys = list(keys)
+        found, missing = {}, []
+        with self._lock:
+            for key in keys:
+                value = self._data.get(key, _MISSING)
+                if value is _MISSING:
+                    missing.append(key)
+                else:
+                    self._data.move_to_end(key)
+                    found[key] = value
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+        if missing:
+            loaded = loader(missing)
+            with self._lock:
+                for key in missing:
+                    found[key] = value = loaded.get(key)
+                    if generation == self._generation and self.max_size > 0:
+                        self._data[key] = value
+                        self._data.move_to_end(key)
+                while len(self._data) > self.max_size:
+                    self._data.popitem(last=False)
+        return [found[key] for key in keys]
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+class SnapshotCache:
+    """
+    One cached value (a whole-table list) valid for a single version;
+    every invalidation moves to the next version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._value_version = -1
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, loader: Callable[[], list]) -> list:
+        with self._lock:
+            if self._value_version == self.version:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            version = self.version
+        value = loader()
+        with self._lock:
+            if version == self.version:
+                self._value = value
+                self._value_version = version
+        return value
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._value = None
+
+    clear = invalidate
+
+    def stats(self) -> dict:
+        return {"version": self.version, "hits": self.hits, "misses": self.misses}
+
+
+def _cache_settings() -> dict:
+    return get_config().get("cache") or {}
+
+
+enabled = bool(_cache_settings().get("enabled", True))
+
+# Process-wide caches
+slot_cache = LRUCache(int(_cache_settings().get("slot_lru_size", 4096)))
+slot_list_cache = SnapshotCache()
+vehicle_list_cache = SnapshotCache()
+
+
+# (database path, PRAGMA data_version) and change counters the caches
+# were last checked against
+_data_version = None
+_counters: dict = {}
+_data_version_lock = threading.Lock()
+
+# Caches holding rows of each table counted in change_counters
+_TABLE_CACHES = {"slots": (slot_cache, slot_list_cache), "vehicles": (vehicle_list_cache,)}
+
+
+def sync() -> None:
+    """
+    Clear the caches of every table another connection wrote to since
+    the last check (everything when the database file changed).
+    """
+    global _data_version, _counters
+    with _data_version_lock:
+        current = db.data_version()
+        if current == _data_version:
+            return
+        counters = db.change_counters()
+        if _data_version is not None and current[0] != _data_version[0]:
+            clear()
+        elif _data_version is not None:
+            for table, counter in counters.items():
+                if _counters.get(table) != counter:
+                    for cache in _TABLE_CACHES.get(table, ()):
+                        cache.clear()
+        _data_version, _counters = current, counters
+
+
+def slot_list_version() -> int:
+    """
+    Version of the slot listing (conditional GET ETags); checked against
+    data_version first, so another process's write moves it too.
+    """
+    sync()
+    return slot_list_cache.version
+
+
+def vehicle_list_version() -> int:
+    """Version of the vehicle listing, like slot_list_version."""
+    sync()
+    return vehicle_list_cache.version
+
+
+def get_slot(slot_id: int, loader: Callable[[int], Optional[dict]]) -> Optional[dict]:
+    if not enabled:
+        return loader(slot_id)
+    sync()
+    return slot_cache.get(slot_id, loader)
+
+
+def get_slots(slot_ids: Iterable[int], loader: Callable[[list], dict]) -> list:
+    """Several slot rows; the uncached ones loaded by one loader(ids) call."""
+    if not enabled:
+        slot_ids = list(slot_ids)
+        loaded = loader(slot_ids) if slot_ids else {}
+        return [loaded.get(slot_id) for slot_id in slot_ids]
+    sync()
+    return slot_cache.get_many(slot_ids, loader)
+
+
+def list_slots(loader: Callable[[], list]) -> list:
+    if not enabled:
+        return loader()
+    sync()
+    return slot_list_cache.get(loader)
+
+
+def list_vehicles(loader: Callable[[], list]) -> list:
+    if not enabled:
+        return loader()
+    sync()
+    return vehicle_list_cache.get(loader)
+
+
+def invalidate_slots(*slot_ids: int) -> None:
+    """A committed write changed these slot rows."""
+    slot_cache.invalidate(slot_ids)
+    slot_list_cache.invalidate()
+
+
+def invalidate_vehicles() -> None:
+    """A committed write changed vehicle rows."""
+    vehicle_list_cache.invalidate()
+
+
+def clear() -> None:
+    """Forget everything (database switched or changed by another process)."""
+    slot_cache.clear()
+    slot_list_cache.clear()
+    vehicle_list_cache.clear()
+
+
+def stats() -> dict:
+    return {
+        "slot": slot_cache.stats(),
+        "slot_list": slot_list_cache.stats(),
+        "vehicle_list": vehicle_list_cache.stats(),
+    }
@@ -0,0 +1,263 @@
+# src/parking_system/core/reservations.py
+"""
+Time-limited slot reservations
+
+A reservation takes a slot out of the free-slot index and records it in
+slot_manager.held_slots (slot_manager.hold_slot), so regular allocation
+skips it without any query. Only registered vehicles that hold no slot
+yet can reserve.
+The hold turns into a real allocation when the vehicle arrives
+(allocate_slot / check-in pick it up) and is released automatically when
+its TTL runs out.
+
+Expiry runs on a hashed timer wheel: scheduling and cancelling a hold are
+O(1) and each tick only visits one wheel bucket, so expiring holds costs
+O(1) amortized regardless of how many are active.
+
+Holds live in process memory; run reservations on the process that owns
+allocation (a single API worker or the write queue).
+"""
+
+import math
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+from parking_system.config import get_config
+from parking_system.core import slot_manager
+from parking_system.core.allocation import get_strategy
+from parking_system.database.async_db import async_db
+from parking_system.database.db import get_conn
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel with `wheel_size` buckets of `tick` seconds each.
+    A timer due at absolute tick t lives in bucket t % wheel_size and fires
+    the first time that bucket is visited at or after tick t.
+    """
+
+    def __init__(self, tick: float = 1.0, wheel_size: int = 512, clock: Callable[[], float] = time.monotonic):
+        self.tick = tick
+        self.size = wheel_size
+        self.clock = clock
+        self._origin = clock()
+        self._current = 0
+        self._wheel: List[Dict[Hashable, int]] = [{} for _ in range(wheel_size)]
+        self._where: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """(Re)schedule `key` to fire at `deadline` (clock time)."""
+        with self._lock:
+            self._cancel(key)
+            due = max(math.ceil((deadline - self._origin) / self.tick), self._current + 1)
+            bucket = due % self.size
+            self._wheel[bucket][key] = due
+            self._where[key] = bucket
+
+    def cancel(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._cancel(key)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel up to `now` and return the keys that fired."""
+        now = self.clock() if now is None else now
+        target = math.floor((now - self._origin) / self.tick)
+        expired = []
+        with self._lock:
+            steps = min(target - self._current, self.size)
+            for step in range(1, steps + 1):
+                bucket = self._wheel[(self._current + step) % self.size]
+                for key in [k for k, due in bucket.items() if due <= target]:
+                    del bucket[key]
+                    del self._where[key]
+                    expired.append(key)
+            self._current = max(self._current, target)
+        return expired
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def _cancel(self, key: Hashable) -> bool:
+        bucket = self._where.pop(key, None)
+        if bucket is None:
+            return False
+        del self._wheel[bucket][key]
+        return True
+
+
+class ReservationBook:
+    def __init__(self, default_ttl: float = 900, tick: float = 1.0, wheel_size: int = 512,
+                 clock: Callable[[], float] = time.monotonic):
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.wheel = TimerWheel(tick, wheel_size, clock)
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.expired_count = 0
+
+    def reserve(self, license_plate: str, vehicle_type: Optional[str] = None,
+                slot_type: Optional[str] = None, ttl: Optional[float] = None) -> dict:
+        """
+        Hold a free slot for a pre-booked vehicle for `ttl` seconds.
+        `vehicle_type` defaults to the registered one; a `slot_type` the
+        vehicle does not fit in is rejected.
+        """
+        registered_type = _check_vehicle(license_plate)
+        vehicle_type = vehicle_type or registered_type
+        if slot_type is not None and get_strategy().fit_rank(vehicle_type, slot_type) is None:
+            raise ValueError(f"A {vehicle_type} does not fit a {slot_type} slot")
+        index = slot_manager.get_free_slot_index()
+        with self._lock:
+            if license_plate in slot_manager.held_slots:
+                raise ValueError("Vehicle already has a reservation")
+            if slot_type is not None:
+                slot_id = index.pop(slot_type=slot_type)
+            else:
+                slot_id = get_strategy().select(index, vehicle_type)
+            if slot_id is None:
+                raise ValueError("No available slots")
+            ttl = self.default_ttl if ttl is None else ttl
+            expires_at = self.clock() + ttl
+            slot_manager.hold_slot(license_plate, slot_id)
+            self._expires[license_plate] = expires_at
+            self.wheel.schedule(license_plate, expires_at)
+        return {"license_plate": license_plate, "slot_id": slot_id, "expires_in": ttl}
+
+    def get(self, license_plate: str) -> Optional[dict]:
+        slot_id = slot_manager.held_slots.get(license_plate)
+        if slot_id is None:
+            return None
+        expires_in = max(self._expires.get(license_plate, 0) - self.clock(), 0)
+        return {"license_plate": license_plate, "slot_id": slot_id, "expires_in": expires_in}
+
+    def confirm(self, license_plate: str) -> Optional[dict]:
+        """
+        Turn the hold into an allocation (vehicle arrived).
+        Returns the allocated slot, or None if the vehicle already holds
+        a slot (the now redundant hold is released).
+        """
+        if license_plate not in slot_manager.held_slots:
+            raise ValueError("No reservation for vehicle")
+        try:
+            slot = slot_manager.allocate_slot(license_plate)
+        except ValueError as e:
+            if str(e) != "Vehicle already allocated":
+                raise
+            self.cancel(license_plate)
+            return None
+        self._forget(license_plate)
+        return slot
+
+    def cancel(self, license_plate: str) -> bool:
+        """Release the hold back to the free-slot index."""
+        with self._lock:
+            return self._release(license_plate)
+
+    def expire_due(self) -> List[str]:
+        """Release every hold whose TTL has passed."""
+        released = []
+        for license_plate in self.wheel.advance():
+            with self._lock:
+                if self._release(license_plate):
+                    released.append(license_plate)
+        self.expired_count += len(released)
+        return released
+
+    def start(self) -> "ReservationBook":
+        """Expire holds on a background thread, once per wheel tick."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="reservation-expiry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __len__(self) -> int:
+        return len(slot_manager.held_slots)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.wheel.tick):
+            self.expire_due()
+
+    def _release(self, license_plate: str) -> bool:
+        slot_id = slot_manager.release_hold(license_plate)
+        self._forget(license_plate)
+        if slot_id is None:
+            # Already consumed by allocate_slot
+            return False
+        slot_manager.free_slot_index.release(slot_id)
+        return True
+
+    def _forget(self, license_plate: str) -> None:
+        self._expires.pop(license_plate, None)
+        self.wheel.cancel(license_plate)
+
+
+def _check_vehicle(license_plate: str) -> str:
+    """
+    Raise unless the vehicle is registered and has no slot allocated, so
+    no slot is held for a plate that could never use it. Returns its
+    vehicle type.
+    """
+    engine = slot_manager._engine()
+    if engine is not None:
+        vehicle = engine.get_vehicle(license_plate)
+    else:
+        with get_conn() as conn:
+            vehicle = conn.execute(
+                "SELECT vehicle_type, slot_id FROM vehicles WHERE license_plate=?", (license_plate,)
+            ).fetchone()
+    if vehicle is None:
+        raise ValueError("Vehicle does not exist")
+    if vehicle["slot_id"] is not None:
+        raise ValueError("Vehicle already allocated")
+    return vehicle["vehicle_type"]
+
+
+def _default_book() -> ReservationBook:
+    settings = get_config().get("reservations") or {}
+    return ReservationBook(
+        default_ttl=float(settings.get("default_ttl_seconds", 900)),
+        tick=float(settings.get("tick_seconds", 1.0)),
+        wheel_size=int(settings.get("wheel_size", 512)),
+    )
+
+
+# Process-wide reservation book
+book = _default_book()
+
+
+def reserve_slot(license_plate: str, vehicle_type: Optional[str] = None,
+                 slot_type: Optional[str] = None, ttl: Optional[float] = None) -> dict:
+    return book.reserve(license_plate, vehicle_type, slot_type, ttl)
+
+
+def confirm_reservation(license_plate: str) -> Optional[dict]:
+    return book.confirm(license_plate)
+
+
+def cancel_reservation(license_plate: str) -> bool:
+    return book.cancel(license_plate)
+
+
+# Async API: holds change what allocation sees, so they go through the writer
+async def reserve_slot_async(license_plate: str, vehicle_type: Optional[str] = None,
+                             slot_type: Optional[str] = None, ttl: Optional[float] = None) -> dict:
+    return await async_db.write(reserve_slot, license_plate, vehicle_type, slot_type, ttl)
+
+
+async def confirm_reservation_async(license_plate: str) -> Optional[dict]:
+    return await async_db.write(confirm_reservation, license_plate)
+
+
+async def cancel_reservation_async(license_plate: str) -> bool:
+    return await async_db.write(cancel_reservation, license_plate)
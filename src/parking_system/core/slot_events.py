@@ -0,0 +1,240 @@
+# src/parking_system/core/slot_events.py
+"""
+Live slot changes for streaming clients
+
+Clients of /api/slots/stream get one snapshot of the slots and then only
+the slots that changed, instead of polling the whole table.
+
+    feed         thread-safe log of changed slot ids. Every committed slot
+                 write publishes its ids (slot_manager._slots_changed);
+                 publishing is a deque append, whether anyone listens or not.
+    Broadcaster  one per event loop (i.e. per API worker). A single pump
+                 task reads the new ids from the feed, loads the current
+                 rows once and offers them to every subscriber.
+    Subscription per client. Rows not yet sent are kept per slot id and
+                 overwritten by newer ones, so a slow client skips stale
+                 intermediate states instead of queueing them: its backlog
+                 is bounded by the number of slots. A client too far behind
+                 the feed gets a fresh snapshot.
+
+Deltas carry full rows: {"type": "delta", "version": n, "slots": [...]}.
+A message is encoded once and shared by every subscriber that receives
+it unchanged.
+"""
+
+import asyncio
+import json
+import threading
+import weakref
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from parking_system.config import get_config
+
+
+class ChangeFeed:
+    def __init__(self, history: int = 4096):
+        self._lock = threading.Lock()
+        self._log: deque = deque(maxlen=history)    # (version, slot ids or None = everything)
+        self._listeners: List[Callable[[], None]] = []
+        self.version = 0
+
+    def publish(self, slot_ids: Iterable[int]) -> None:
+        """Committed writes changed these slots."""
+        self._append(tuple(slot_ids))
+
+    def publish_all(self) -> None:
+        """Anything may have changed (e.g. the index was reloaded)."""
+        self._append(None)
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[Set[int]]]:
+        """
+        (current version, ids changed after `version`); the ids are None
+        when the log no longer reaches back that far or a full change was
+        published.
+        """
+        with self._lock:
+            current = self.version
+            if version >= current:
+                return current, set()
+            if not self._log or self._log[0][0] > version + 1:
+                return current, None
+            changed = set()
+            for entry_version, slot_ids in reversed(self._log):
+                if entry_version <= version:
+                    break
+                if slot_ids is None:
+                    return current, None
+                changed.update(slot_ids)
+            return current, changed
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _append(self, slot_ids: Optional[tuple]) -> None:
+        with self._lock:
+            self.version += 1
+            self._log.append((self.version, slot_ids))
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[STREAM] Listener failed: {e}")
+
+
+class _Message:
+    """Rows to send (slot id -> row), encoded lazily and at most once."""
+
+    __slots__ = ("kind", "version", "rows", "_text")
+
+    def __init__(self, kind: str, version: int, rows: Dict[int, dict]):
+        self.kind = kind
+        self.version = version
+        self.rows = rows
+        self._text = None
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps({"type": self.kind, "version": self.version, "slots": list(self.rows.values())})
+        return self._text
+
+
+class Subscription:
+    def __init__(self, keepalive: float):
+        self.keepalive = keepalive
+        self.coalesced = 0
+        self._pending: Optional[_Message] = None
+        self._ready = asyncio.Event()
+
+    def offer(self, message: _Message, initial: bool = False) -> None:
+        pending = self._pending
+        if pending is None or (message.kind == "snapshot" and not initial):
+            self._pending = message
+        elif initial:
+            # Deltas that arrived while the first snapshot was loading
+            rows = dict(message.rows)
+            rows.update(pending.rows)
+            self._pending = _Message("snapshot", pending.version, rows)
+        else:
+            # Not sent yet: newer rows replace older ones
+            rows = dict(pending.rows)
+            self.coalesced += len(rows.keys() & message.rows.keys())
+            rows.update(message.rows)
+            self._pending = _Message(pending.kind, message.version, rows)
+        self._ready.set()
+
+    async def next_message(self) -> Optional[str]:
+        """The next message as JSON text, or None after `keepalive` idle seconds."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), self.keepalive)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        message, self._pending = self._pending, None
+        return message.text()
+
+
+class Broadcaster:
+    """Fans the feed out to the subscriptions of one event loop."""
+
+    def __init__(self, feed: ChangeFeed, load_rows: Callable, load_all: Callable, keepalive: float = 15.0):
+        self.feed = feed
+        self.load_rows = load_rows      # async (ids) -> [row]
+        self.load_all = load_all        # async () -> [row]
+        self.keepalive = keepalive
+        self.version = feed.version
+        self._subscribers: Set[Subscription] = set()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._pump: Optional[asyncio.Task] = None
+        self.feed.add_listener(self._notify)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self) -> Subscription:
+        """Register a client; its first message is a snapshot of all slots."""
+        subscription = Subscription(self.keepalive)
+        # Registered first: changes made while the snapshot loads follow as deltas
+        self._subscribers.add(subscription)
+        if self._pump is None or self._pump.done():
+            self._pump = self._loop.create_task(self._run())
+        try:
+            version = self.feed.version
+            rows = await self.load_all()
+        except BaseException:
+            self._subscribers.discard(subscription)
+            raise
+        subscription.offer(_Message("snapshot", version, {row["id"]: row for row in rows}), initial=True)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def close(self) -> None:
+        self.feed.remove_listener(self._notify)
+        if self._pump is not None:
+            self._pump.cancel()
+
+    def _notify(self) -> None:
+        # Called on the writing thread
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            # Loop closed
+            self.feed.remove_listener(self._notify)
+            _broadcasters.pop(self._loop, None)
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            version, changed = self.feed.changes_since(self.version)
+            if changed is not None and not changed:
+                continue
+            if not self._subscribers:
+                self.version = version
+                continue
+            try:
+                if changed is None:
+                    rows = await self.load_all()
+                    message = _Message("snapshot", version, {row["id"]: row for row in rows})
+                else:
+                    rows = await self.load_rows(sorted(changed))
+                    message = _Message("delta", version, {row["id"]: row for row in rows if row is not None})
+            except Exception as e:
+                print(f"[STREAM] Loading changed slots failed: {e}")
+                continue
+            self.version = version
+            for subscription in list(self._subscribers):
+                subscription.offer(message)
+
+
+# Process-wide feed of committed slot changes
+feed = ChangeFeed(int((get_config().get("stream") or {}).get("history", 4096)))
+
+_broadcasters: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_broadcaster() -> Broadcaster:
+    """The broadcaster of the running event loop, created on first use."""
+    from parking_system.core import slot_manager
+
+    loop = asyncio.get_running_loop()
+    broadcaster = _broadcasters.get(loop)
+    if broadcaster is None:
+        settings = get_config().get("stream") or {}
+        broadcaster = _broadcasters[loop] = Broadcaster(
+            feed,
+            slot_manager.get_slots_by_id_async,
+            slot_manager.list_slots_async,
+            keepalive=float(settings.get("keepalive_seconds", 15)),
+        )
+    return broadcaster
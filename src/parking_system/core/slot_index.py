@@ -0,0 +1,230 @@
+# src/parking_system/core/slot_index.py
+"""
+In-memory free-slot index
+
+Mirrors the free rows of the `slots` table so allocation does not have to
+scan the table. Free slots are bucketed by (slot_type, level); every bucket
+is a min-heap of slot ids and a global heap covers "any free slot" lookups.
+
+Heaps use lazy deletion: removing a slot only drops it from the `_free`
+map and stale heap entries are skipped (and periodically compacted) when
+they reach the top.
+
+Per-bucket totals and free counts are maintained on every change, so
+availability summaries never touch the table (see core/availability.py);
+`version` increases with every change.
+"""
+
+import heapq
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Bucket = Tuple[str, int]
+
+
+class FreeSlotIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._meta: Dict[int, Bucket] = {}      # every known slot -> (slot_type, level)
+        self._free: Dict[int, Bucket] = {}      # free slots only
+        self._buckets: Dict[Bucket, List[int]] = {}
+        self._counts: Dict[Bucket, int] = {}
+        self._all: List[int] = []
+        self._layout: Dict[Bucket, int] = {}    # bucket -> number of known slots
+        self.layout_version = 0
+        self.version = 0
+        self.loaded = False
+
+    # --------------------------------------------------
+    # Bulk load
+    # --------------------------------------------------
+
+    def load(self, rows: Iterable) -> None:
+        """
+        Rebuild the index from (id, slot_type, level, is_occupied) rows.
+        """
+        with self._lock:
+            self._meta.clear()
+            self._free.clear()
+            self._buckets.clear()
+            self._counts.clear()
+            self._layout.clear()
+            self._all = []
+            for slot_id, slot_type, level, is_occupied in rows:
+                self._meta[slot_id] = (slot_type, level)
+                self._layout[(slot_type, level)] = self._layout.get((slot_type, level), 0) + 1
+                if not is_occupied:
+                    self._free[slot_id] = (slot_type, level)
+                    self._buckets.setdefault((slot_type, level), []).append(slot_id)
+                    self._counts[(slot_type, level)] = self._counts.get((slot_type, level), 0) + 1
+                    self._all.append(slot_id)
+            for heap in self._buckets.values():
+                heapq.heapify(heap)
+            heapq.heapify(self._all)
+            self.layout_version += 1
+            self.version += 1
+            self.loaded = True
+
+    # --------------------------------------------------
+    # Single-slot updates
+    # --------------------------------------------------
+
+    def add_slot(self, slot_id: int, slot_type: str, level: int, free: bool = True) -> None:
+        """
+        Register a (new) slot and optionally mark it free.
+        """
+        with self._lock:
+            bucket = (slot_type, level)
+            if slot_id not in self._meta:
+                self._layout[bucket] = self._layout.get(bucket, 0) + 1
+                if self._layout[bucket] == 1:
+                    self.layout_version += 1
+                self.version += 1
+            self._meta[slot_id] = bucket
+            if free:
+                self._push(slot_id)
+
+    def release(self, slot_id: int) -> bool:
+        """
+        Mark a known slot as free. Unknown ids are ignored until the next load.
+        """
+        with self._lock:
+            if slot_id not in self._meta:
+                return False
+            self._push(slot_id)
+            return True
+
+    def discard(self, slot_id: int) -> bool:
+        """
+        Mark a slot as no longer free.
+        """
+        with self._lock:
+            bucket = self._free.pop(slot_id, None)
+            if bucket is None:
+                return False
+            self._counts[bucket] -= 1
+            self.version += 1
+            return True
+
+    def pop(self, slot_type: Optional[str] = None, level: Optional[int] = None) -> Optional[int]:
+        """
+        Remove and return the lowest free slot id matching the filters.
+        """
+        with self._lock:
+            if slot_type is None and level is None:
+                slot_id = self._peek_heap(self._all)
+            else:
+                candidates = []
+                for bucket in self._buckets:
+                    if slot_type is not None and bucket[0] != slot_type:
+                        continue
+                    if level is not None and bucket[1] != level:
+                        continue
+                    slot_id = self._peek_bucket(bucket)
+                    if slot_id is not None:
+                        candidates.append(slot_id)
+                slot_id = min(candidates) if candidates else None
+            if slot_id is not None:
+                self.discard(slot_id)
+            return slot_id
+
+    def pop_first(self, buckets: Iterable[Bucket]) -> Optional[int]:
+        """
+        Remove and return the lowest free slot id of the first non-empty
+        bucket, in the given order. Used by the allocation strategies.
+        """
+        with self._lock:
+            for bucket in buckets:
+                if not self._counts.get(bucket):
+                    continue
+                slot_id = self._peek_bucket(bucket)
+                if slot_id is not None:
+                    self.discard(slot_id)
+                    return slot_id
+            return None
+
+    # --------------------------------------------------
+    # Introspection
+    # --------------------------------------------------
+
+    def bucket_of(self, slot_id: int) -> Optional[Bucket]:
+        return self._meta.get(slot_id)
+
+    def layout(self) -> List[Bucket]:
+        """
+        All (slot_type, level) buckets that hold at least one known slot.
+        """
+        with self._lock:
+            return list(self._layout)
+
+    def free_slots(self) -> List[Tuple[int, str, int]]:
+        """
+        Snapshot of the free slots as (id, slot_type, level) tuples.
+        """
+        with self._lock:
+            return [(slot_id, t, lvl) for slot_id, (t, lvl) in self._free.items()]
+
+    def availability(self) -> List[Tuple[str, int, int, int]]:
+        """
+        (slot_type, level, total, free) for every bucket, by level then type.
+        """
+        with self._lock:
+            return sorted(
+                ((t, lvl, total, self._counts.get((t, lvl), 0)) for (t, lvl), total in self._layout.items()),
+                key=lambda row: (row[1], row[0]),
+            )
+
+    def free_count(self, bucket: Bucket) -> int:
+        return self._counts.get(bucket, 0)
+
+    def count(self, slot_type: Optional[str] = None, level: Optional[int] = None) -> int:
+        with self._lock:
+            return sum(
+                n for (t, lvl), n in self._counts.items()
+                if (slot_type is None or t == slot_type) and (level is None or lvl == level)
+            )
+
+    def __contains__(self, slot_id: int) -> bool:
+        return slot_id in self._free
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    # --------------------------------------------------
+    # Internals
+    # --------------------------------------------------
+
+    def _push(self, slot_id: int) -> None:
+        if slot_id in self._free:
+            return
+        bucket = self._meta[slot_id]
+        self._free[slot_id] = bucket
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.version += 1
+        heap = self._buckets.setdefault(bucket, [])
+        heapq.heappush(heap, slot_id)
+        heapq.heappush(self._all, slot_id)
+        if len(self._all) > 2 * len(self._free) + 64:
+            self._compact()
+
+    def _peek_heap(self, heap: List[int], bucket: Optional[Bucket] = None) -> Optional[int]:
+        while heap:
+            slot_id = heap[0]
+            owner = self._free.get(slot_id)
+            if owner is not None and (bucket is None or owner == bucket):
+                return slot_id
+            heapq.heappop(heap)
+        return None
+
+    def _peek_bucket(self, bucket: Bucket) -> Optional[int]:
+        return self._peek_heap(self._buckets[bucket], bucket)
+
+    def _compact(self) -> None:
+        """Drop stale heap entries once they outnumber the live ones."""
+        self._all = list(self._free)
+        heapq.heapify(self._all)
+        self._buckets = {}
+        for slot_id, bucket in self._free.items():
+            self._buckets.setdefault(bucket, []).append(slot_id)
+        for heap in self._buckets.values():
+            heapq.heapify(heap)
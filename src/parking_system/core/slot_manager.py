@@ -1,10 +1,195 @@
 # src/parking_system/core/slot_manager.py
-from parking_system.database.db import get_conn
+import asyncio
+import json
+import sqlite3
+from itertools import islice
+
+from parking_system import metrics
+from parking_system.config import get_config
+from parking_system.database.db import (
+    JsonRows, get_conn, iter_rows, json_object_sql, query_json, retry_on_busy, run_in_transaction,
+)
+from parking_system.database import db_utils
+from parking_system.database.async_db import async_db
+from parking_system.core import read_cache, slot_events
+from parking_system.core.slot_index import FreeSlotIndex
+from parking_system.core.allocation import get_strategy
+
+SLOT_COLUMNS = ("id", "slot_type", "level", "is_occupied", "vehicle_plate")
+
+# Process-wide free-slot index (see core/slot_index.py)
+free_slot_index = FreeSlotIndex()
+
+# Slots held for pre-booked vehicles: plate -> slot id (see core/reservations.py),
+# and the held slot ids, for O(1) "is this slot held" checks. Held slots are
+# kept out of the free-slot index, so allocation skips them. Change both
+# through hold_slot / release_hold.
+held_slots = {}
+held_by_slot = set()
+
+
+def hold_slot(vehicle_plate: str, slot_id: int) -> None:
+    held_slots[vehicle_plate] = slot_id
+    held_by_slot.add(slot_id)
+
+
+def release_hold(vehicle_plate: str):
+    """Drop the vehicle's hold; returns the slot id it held, or None."""
+    slot_id = held_slots.pop(vehicle_plate, None)
+    held_by_slot.discard(slot_id)
+    return slot_id
+
+
+def _engine():
+    """
+    The in-memory state engine when it is the configured backend
+    (database/db_utils.py), else None.
+    """
+    return db_utils.active_engine(free_slot_index)
+
+
+def _slots_changed(*slot_ids: int) -> None:
+    """
+    Committed writes changed these slots: drop their cached rows, move
+    the slots version (ETags) and notify stream subscribers
+    (core/slot_events.py).
+    """
+    read_cache.invalidate_slots(*slot_ids)
+    slot_events.feed.publish(slot_ids)
+
+
+def load_free_slot_index(conn=None) -> FreeSlotIndex:
+    """
+    (Re)build the free-slot index from the slots table.
+    Called at startup; also used to pick up slots freed by other processes.
+    With the memory backend the engine keeps the index current itself.
+    """
+    if conn is None and _engine() is not None:
+        for slot_id in list(held_by_slot):
+            free_slot_index.discard(slot_id)
+        return free_slot_index
+    if conn is None:
+        with get_conn() as conn:
+            return load_free_slot_index(conn)
+    rows = conn.execute("SELECT id, slot_type, level, is_occupied FROM slots").fetchall()
+    free_slot_index.load(tuple(r) for r in rows)
+    # Rows may have been changed by other processes too
+    read_cache.clear()
+    slot_events.feed.publish_all()
+    for slot_id in list(held_by_slot):
+        free_slot_index.discard(slot_id)
+    return free_slot_index
+
+
+def get_free_slot_index() -> FreeSlotIndex:
+    """
+    Return the free-slot index, building it on first use.
+    """
+    if not free_slot_index.loaded:
+        load_free_slot_index()
+    return free_slot_index
+
+
+def _claim_free_slot(cur, vehicle_plate: str, vehicle_type: str = None, refresh: bool = True):
+    """
+    Let the configured allocation strategy pick a free slot from the index
+    and claim it with one guarded UPDATE ... RETURNING, which either returns
+    the claimed row or nothing if the slot was taken in the meantime.
+    Stale candidates (taken by another process) are dropped and the next
+    one is tried; when the index runs dry, slots freed by other processes
+    are picked up once (_pick_up_freed_slots).
+    """
+    index = get_free_slot_index()
+    strategy = get_strategy()
+    refreshed = False
+    while True:
+        slot_id = strategy.select(index, vehicle_type)
+        if slot_id is None:
+            if refreshed or not refresh:
+                return None
+            refreshed = True
+            if not _pick_up_freed_slots(cur, strategy, vehicle_type):
+                return None
+            continue
+        try:
+            cur.execute(
+                "UPDATE slots SET is_occupied=1, vehicle_plate=? WHERE id=? AND is_occupied=0 RETURNING *",
+                (vehicle_plate, slot_id)
+            )
+            row = cur.fetchone()
+        except Exception:
+            index.release(slot_id)
+            raise
+        if row is not None:
+            return dict(row)
+
+
+# Ordered like idx_slots_free, so that the partial index is read rather
+# than one covering every row
+_FREE_ROWS_SQL = "SELECT id, slot_type, level FROM slots WHERE is_occupied = 0 ORDER BY slot_type, level, id"
+
+
+def _pick_up_freed_slots(cur, strategy, vehicle_type: str = None) -> int:
+    """
+    Add the free rows the index does not know about (freed or created by
+    other processes) and that fit the vehicle. Only free rows are read,
+    from the partial index idx_slots_free, so this stays cheap when the
+    lot is full, unlike a full reload (load_free_slot_index). Returns
+    the number of slots added.
+    """
+    found = []
+    for slot_id, slot_type, level in cur.execute(_FREE_ROWS_SQL):
+        if slot_id in free_slot_index or slot_id in held_by_slot or strategy.fit_rank(vehicle_type, slot_type) is None:
+            continue
+        free_slot_index.add_slot(slot_id, slot_type, level)
+        found.append(slot_id)
+    if found:
+        # Rows changed by other processes: drop what we cached of them
+        _slots_changed(*found)
+    return len(found)
+
+
+def _claim_slot(cur, vehicle_plate: str, slot_id: int):
+    """
+    Claim one specific slot with a guarded UPDATE ... RETURNING.
+    Returns the slot row, or None if the slot is no longer free.
+    """
+    free_slot_index.discard(slot_id)
+    cur.execute(
+        "UPDATE slots SET is_occupied=1, vehicle_plate=? WHERE id=? AND is_occupied=0 RETURNING *",
+        (vehicle_plate, slot_id)
+    )
+    row = cur.fetchone()
+    return dict(row) if row is not None else None
+
+
+def _claim_for_vehicle(cur, tx, vehicle_plate: str, vehicle_type: str = None):
+    """
+    Claim the vehicle's reserved slot if it has one, else a free slot.
+    If the transaction rolls back, the reservation is held again and a
+    claimed free slot goes back to the index.
+    """
+    held = release_hold(vehicle_plate)
+    if held is not None:
+        tx.on_rollback(hold_slot, vehicle_plate, held)
+        slot = _claim_slot(cur, vehicle_plate, held)
+        if slot is not None:
+            return slot
+    slot = _claim_free_slot(cur, vehicle_plate, vehicle_type)
+    if slot is not None:
+        tx.on_rollback(free_slot_index.release, slot["id"])
+    return slot
+
 
 def create_slot(slot_type: str, level: int) -> dict:
     """
     Create a new slot in the DB and return the slot dict.
     """
+    engine = _engine()
+    if engine is not None:
+        slot = engine.create_slot(slot_type, level)
+        _slots_changed(slot["id"])
+        return slot
     with get_conn() as conn:
         cur = conn.cursor()
         cur.execute(
@@ -13,54 +198,233 @@ def create_slot(slot_type: str, level: int) -> dict:
         )
         slot_id = cur.lastrowid
         cur.execute("SELECT * FROM slots WHERE id=?", (slot_id,))
-        return dict(cur.fetchone())
+        slot = dict(cur.fetchone())
+    _slots_changed(slot_id)
+    if free_slot_index.loaded:
+        free_slot_index.add_slot(slot_id, slot_type, level)
+    return slot
 
 
 def list_slots() -> list:
     """
     Return all slots as a list of dicts.
+    Served from a snapshot cached until the next slot write
+    (see core/read_cache.py); the rows must not be modified.
     """
+    engine = _engine()
+    if engine is not None:
+        return engine.list_slots()
+    return read_cache.list_slots(_load_slots)
+
+
+def _load_slots() -> list:
     with get_conn() as conn:
         cur = conn.cursor()
         cur.execute("SELECT * FROM slots")
         return [dict(r) for r in cur.fetchall()]
 
 
-def allocate_slot(vehicle_plate: str) -> dict:
+def query_slots(slot_type: str = None, level: int = None, is_occupied: bool = None,
+                after: int = None, limit: int = None) -> list:
     """
-    Allocate the first available slot to a vehicle.
+    Slots matching the filters, in id order. Keyset pagination: pass the
+    last id of the previous page as `after`.
     """
-    with get_conn() as conn:
-        cur = conn.cursor()
-        # Ensure vehicle exists
-        cur.execute("SELECT * FROM vehicles WHERE license_plate=?", (vehicle_plate,))
-        vehicle = cur.fetchone()
-        if not vehicle:
-            raise ValueError("Vehicle does not exist")
-        # Find first free slot
-        cur.execute("SELECT * FROM slots WHERE is_occupied=0 ORDER BY id LIMIT 1")
-        slot = cur.fetchone()
-        if not slot:
-            raise ValueError("No available slots")
-        slot_id = slot["id"]
-        # Assign slot
-        cur.execute(
-            "UPDATE slots SET is_occupied=1, vehicle_plate=? WHERE id=?",
-            (vehicle_plate, slot_id)
-        )
-        cur.execute(
-            "UPDATE vehicles SET slot_id=? WHERE license_plate=?",
-            (slot_id, vehicle_plate)
+    return list(iter_slots(slot_type, level, is_occupied, after, limit))
+
+
+def iter_slots(slot_type: str = None, level: int = None, is_occupied: bool = None,
+               after: int = None, limit: int = None):
+    """
+    Same as query_slots, but yields the rows batch by batch (db.iter_rows)
+    instead of building a list (streamed responses).
+    """
+    engine = _engine()
+    if engine is not None:
+        rows = (
+            s for s in engine.list_slots()
+            if (slot_type is None or s["slot_type"] == slot_type)
+            and (level is None or s["level"] == level)
+            and (is_occupied is None or bool(s["is_occupied"]) == is_occupied)
+            and (after is None or s["id"] > after)
         )
-        cur.execute("SELECT * FROM slots WHERE id=?", (slot_id,))
-        return dict(cur.fetchone())
+        yield from islice(rows, limit)
+        return
+    yield from iter_rows(
+        lambda after, limit: _slots_sql("*", slot_type, level, is_occupied, after, limit),
+        "id", after, limit,
+    )
+
 
+def query_slots_json(slot_type: str = None, level: int = None, is_occupied: bool = None,
+                     after: int = None, limit: int = None) -> JsonRows:
+    """
+    Same as query_slots, encoded as a JSON array by SQLite (API responses).
+    """
+    if _engine() is not None:
+        rows = query_slots(slot_type, level, is_occupied, after, limit)
+        return JsonRows(json.dumps(rows, separators=(",", ":")).encode(), len(rows), rows[-1]["id"] if rows else None)
+    columns = f"id AS k, {json_object_sql(SLOT_COLUMNS)} AS doc"
+    return query_json(*_slots_sql(columns, slot_type, level, is_occupied, after, limit))
+
+
+def _slots_sql(columns, slot_type, level, is_occupied, after, limit):
+    clauses, params = [], []
+    if slot_type is not None:
+        clauses.append("slot_type = ?")
+        params.append(slot_type)
+    if level is not None:
+        clauses.append("level = ?")
+        params.append(level)
+    if is_occupied is not None:
+        # A literal, so that the partial index idx_slots_free applies
+        clauses.append("is_occupied = 1" if is_occupied else "is_occupied = 0")
+    if after is not None:
+        clauses.append("id > ?")
+        params.append(after)
+    sql = f"SELECT {columns} FROM slots"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY id"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
 
+
+@metrics.track("allocate")
+@retry_on_busy()
+def allocate_slot(vehicle_plate: str) -> dict:
+    """
+    Allocate a free slot to a vehicle using the configured strategy
+    (see core/allocation.py).
+    Runs in an immediate transaction so concurrent allocations (other
+    threads, workers or the camera loop) are serialized by SQLite and can
+    never hand out the same slot or allocate the same vehicle twice.
+    """
+    engine = _engine()
+    if engine is not None:
+        slot = engine.allocate_slot(vehicle_plate, held_slots.get(vehicle_plate))
+        release_hold(vehicle_plate)
+        _slots_changed(slot["id"])
+        read_cache.invalidate_vehicles()
+        return slot
+    return run_in_transaction(_allocate_slot_tx, vehicle_plate)
+
+
+def _allocate_slot_tx(cur, tx, vehicle_plate: str) -> dict:
+    """
+    Transaction body of allocate_slot (see db.run_in_transaction).
+    """
+    # Ensure vehicle exists and holds no slot yet
+    cur.execute("SELECT vehicle_type, slot_id FROM vehicles WHERE license_plate=?", (vehicle_plate,))
+    vehicle = cur.fetchone()
+    if not vehicle:
+        raise ValueError("Vehicle does not exist")
+    if vehicle["slot_id"] is not None:
+        raise ValueError("Vehicle already allocated")
+    # Claim the vehicle's reserved slot, else a free slot
+    slot = _claim_for_vehicle(cur, tx, vehicle_plate, vehicle["vehicle_type"])
+    if slot is None:
+        raise ValueError("No available slots")
+    cur.execute(
+        "UPDATE vehicles SET slot_id=? WHERE license_plate=?",
+        (slot["id"], vehicle_plate)
+    )
+    tx.on_commit(_slots_changed, slot["id"])
+    tx.on_commit(read_cache.invalidate_vehicles)
+    return slot
+
+
+@metrics.track("allocate_bulk")
+@retry_on_busy()
+def allocate_slots_bulk(vehicle_plates: list) -> list:
+    """
+    Allocate slots to many vehicles (bus fleet, event shuttle) in one
+    transaction. Returns one result per plate, in request order:
+    {"license_plate", "slot"} on success or {"license_plate", "error"}
+    when that vehicle could not be allocated. A failing plate does not
+    affect the others.
+    """
+    if _engine() is not None:
+        results = []
+        for plate in vehicle_plates:
+            try:
+                results.append({"license_plate": plate, "slot": allocate_slot(plate)})
+            except ValueError as e:
+                results.append({"license_plate": plate, "error": str(e)})
+        return results
+    claimed = []
+    try:
+        with get_conn(immediate=True) as conn:
+            cur = conn.cursor()
+            vehicles = {}
+            unique_plates = list(dict.fromkeys(vehicle_plates))
+            for i in range(0, len(unique_plates), 500):
+                chunk = unique_plates[i:i + 500]
+                cur.execute(
+                    f"SELECT license_plate, vehicle_type, slot_id FROM vehicles "
+                    f"WHERE license_plate IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                vehicles.update((r["license_plate"], r) for r in cur.fetchall())
+
+            results = []
+            assignments = []
+            seen = set()
+            exhausted = set()  # vehicle types for which the lot is full
+            for plate in vehicle_plates:
+                vehicle = vehicles.get(plate)
+                if vehicle is None:
+                    results.append({"license_plate": plate, "error": "Vehicle does not exist"})
+                    continue
+                if plate in seen or vehicle["slot_id"] is not None:
+                    results.append({"license_plate": plate, "error": "Vehicle already allocated"})
+                    continue
+                seen.add(plate)
+                vehicle_type = vehicle["vehicle_type"]
+                slot = None
+                held = release_hold(plate)
+                if held is not None:
+                    slot = _claim_slot(cur, plate, held)
+                if slot is None and vehicle_type not in exhausted:
+                    try:
+                        slot = _claim_free_slot(cur, plate, vehicle_type, refresh=not exhausted)
+                    except sqlite3.IntegrityError as e:
+                        # Only this statement is rolled back; keep going
+                        results.append({"license_plate": plate, "error": str(e)})
+                        continue
+                if slot is None:
+                    exhausted.add(vehicle_type)
+                    results.append({"license_plate": plate, "error": "No available slots"})
+                    continue
+                claimed.append(slot["id"])
+                assignments.append((slot["id"], plate))
+                results.append({"license_plate": plate, "slot": slot})
+
+            cur.executemany("UPDATE vehicles SET slot_id=? WHERE license_plate=?", assignments)
+        if claimed:
+            _slots_changed(*claimed)
+            read_cache.invalidate_vehicles()
+        return results
+    except Exception:
+        # Transaction rolled back: every claimed slot is still free
+        for slot_id in claimed:
+            free_slot_index.release(slot_id)
+        raise
+
+
+@retry_on_busy()
 def set_slot_occupancy(slot_id: int, occupied: bool):
     """
     Update slot occupancy and clear vehicle_plate if empty.
     """
-    with get_conn() as conn:
+    engine = _engine()
+    if engine is not None:
+        result = engine.set_slot_occupancy(slot_id, occupied, held=held_by_slot)
+        _slots_changed(slot_id)
+        return result
+    with get_conn(immediate=True) as conn:
         cur = conn.cursor()
         vehicle_plate = None
         if occupied:
@@ -71,15 +435,135 @@ def set_slot_occupancy(slot_id: int, occupied: bool):
             (1 if occupied else 0, vehicle_plate, slot_id)
         )
         conn.commit()
-        return {"id": slot_id, "is_occupied": occupied, "vehicle_plate": vehicle_plate}
+    _slots_changed(slot_id)
+    if occupied:
+        free_slot_index.discard(slot_id)
+    elif slot_id not in held_by_slot:
+        free_slot_index.release(slot_id)
+    return {"id": slot_id, "is_occupied": occupied, "vehicle_plate": vehicle_plate}
 
 
 def get_slot_by_id(slot_id: int):
     """
-    Fetch a slot by its ID.
+    Fetch a slot by its ID (read-through LRU cache, see core/read_cache.py).
+    """
+    engine = _engine()
+    if engine is not None:
+        return engine.get_slot(slot_id)
+    slot = read_cache.get_slot(slot_id, _load_slot)
+    return dict(slot) if slot is not None else None
+
+
+def get_slots_by_id(slot_ids) -> list:
     """
+    Fetch several slots (None for unknown ids), through the same cache;
+    the uncached ones are read with one query.
+    """
+    engine = _engine()
+    if engine is not None:
+        return [engine.get_slot(slot_id) for slot_id in slot_ids]
+    return [dict(slot) if slot is not None else None for slot in read_cache.get_slots(slot_ids, _load_slots_by_id)]
+
+
+def _load_slots_by_id(slot_ids: list) -> dict:
+    rows = {}
+    with get_conn() as conn:
+        for start in range(0, len(slot_ids), 500):
+            chunk = slot_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT * FROM slots WHERE id IN ({placeholders})", chunk):
+                rows[row["id"]] = dict(row)
+    return rows
+
+
+def _load_slot(slot_id: int):
     with get_conn() as conn:
         cur = conn.cursor()
         cur.execute("SELECT * FROM slots WHERE id=?", (slot_id,))
         row = cur.fetchone()
         return dict(row) if row else None
+
+
+# --------------------------------------------------
+# Async API (FastAPI routes; see database/async_db.py)
+# --------------------------------------------------
+
+# Reads from the memory backend are answered in microseconds without I/O:
+# no thread hop. Its writes journal (and may fsync), audit and notify, so
+# they go through the writer like SQL writes.
+
+async def create_slot_async(slot_type: str, level: int) -> dict:
+    return await async_db.write(create_slot, slot_type, level)
+
+
+async def list_slots_async() -> list:
+    if _engine() is not None:
+        return list_slots()
+    return await async_db.read(list_slots)
+
+
+async def query_slots_async(slot_type: str = None, level: int = None, is_occupied: bool = None,
+                            after: int = None, limit: int = None) -> list:
+    if _engine() is not None:
+        return query_slots(slot_type, level, is_occupied, after, limit)
+    return await async_db.read(query_slots, slot_type, level, is_occupied, after, limit)
+
+
+async def query_slots_json_async(slot_type: str = None, level: int = None, is_occupied: bool = None,
+                                 after: int = None, limit: int = None) -> JsonRows:
+    if _engine() is not None:
+        return query_slots_json(slot_type, level, is_occupied, after, limit)
+    return await async_db.read(query_slots_json, slot_type, level, is_occupied, after, limit)
+
+
+@metrics.track("allocate")
+async def allocate_slot_async(vehicle_plate: str) -> dict:
+    if _engine() is not None:
+        return await async_db.write(allocate_slot, vehicle_plate)
+    batcher = _arrival_batcher()
+    if batcher is not None:
+        return await asyncio.wrap_future(batcher.submit(vehicle_plate))
+    return await async_db.write_tx(_allocate_slot_tx, vehicle_plate)
+
+
+# Batches the API's allocations when allocation.batch.enabled (see
+# core/batch_assignment.py); built on first use, so NumPy is only
+# imported when batching is on
+_batcher = None
+
+
+def _arrival_batcher():
+    global _batcher
+    if _batcher is None and ((get_config().get("allocation") or {}).get("batch") or {}).get("enabled"):
+        from parking_system.core.batch_assignment import ArrivalBatcher
+
+        _batcher = ArrivalBatcher().start()
+    return _batcher
+
+
+def stop_arrival_batcher() -> None:
+    """Allocate the arrivals still waiting and stop the batcher, if running."""
+    global _batcher
+    batcher, _batcher = _batcher, None
+    if batcher is not None:
+        batcher.stop()
+
+
+async def allocate_slots_bulk_async(vehicle_plates: list) -> list:
+    return await async_db.write(allocate_slots_bulk, vehicle_plates)
+
+
+async def set_slot_occupancy_async(slot_id: int, occupied: bool):
+    return await async_db.write(set_slot_occupancy, slot_id, occupied)
+
+
+async def get_slot_by_id_async(slot_id: int):
+    if _engine() is not None:
+        return get_slot_by_id(slot_id)
+    return await async_db.read(get_slot_by_id, slot_id)
+
+
+async def get_slots_by_id_async(slot_ids) -> list:
+    if _engine() is not None:
+        return get_slots_by_id(slot_ids)
+    return await async_db.read(get_slots_by_id, slot_ids)
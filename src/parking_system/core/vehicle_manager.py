@@ -1,218 +1,543 @@
-import sqlite3
+import json
+import time
 from datetime import datetime
+from itertools import islice
 
-from parking_system.database.db import get_conn
-from parking_system.security import log_action, check_user_role
-from parking_system.notifications import (
-    send_email_notification,
-    send_sms_notification,
-    send_push_notification,
+from parking_system.database.db import (
+    JsonRows, get_conn, iter_rows, json_object_sql, query_json, retry_on_busy, run_in_transaction,
 )
+from parking_system.database.async_db import async_db
+from parking_system import metrics
+from parking_system.core import slot_manager, reservations, read_cache
+from parking_system.security import log_action, check_user_role
+from parking_system.notifications import notify_email, notify_sms, notify_push
 from parking_system.payment import payment_gateway
 
+VEHICLE_COLUMNS = ("license_plate", "vehicle_type", "checked_in", "slot_id")
+
 
 # --------------------------------------------------
 # Vehicle Operations
 # --------------------------------------------------
 
 def register_vehicle(license_plate: str, vehicle_type: str):
-    with get_conn() as conn:
-        cur = conn.cursor()
-        try:
-            cur.execute(
-                """
-                INSERT INTO vehicles (license_plate, vehicle_type, checked_in, slot_id)
-                VALUES (?, ?, 0, NULL)
-                """,
-                (license_plate, vehicle_type),
-            )
+    engine = slot_manager._engine()
+    if engine is not None:
+        vehicle, created = engine.register_vehicle(license_plate, vehicle_type)
+        if created:
+            read_cache.invalidate_vehicles()
+            _after_register(license_plate)
+        return vehicle
+    return run_in_transaction(_register_vehicle_tx, license_plate, vehicle_type)
 
-            log_action(
-                user_id=None,
-                action="REGISTER_VEHICLE",
-                resource=license_plate,
-            )
 
-            return {
-                "license_plate": license_plate,
-                "vehicle_type": vehicle_type,
-                "checked_in": 0,
-                "slot_id": None,
-            }
+def _register_vehicle_tx(cur, tx, license_plate: str, vehicle_type: str):
+    # Vehicle already exists → idempotent behavior
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO vehicles (license_plate, vehicle_type, checked_in, slot_id)
+        VALUES (?, ?, 0, NULL)
+        """,
+        (license_plate, vehicle_type),
+    )
 
-        except sqlite3.IntegrityError:
-            # Vehicle already exists → idempotent behavior
-            return {
-                "license_plate": license_plate,
-                "vehicle_type": vehicle_type,
-                "checked_in": 0,
-                "slot_id": None,
-            }
+    if cur.rowcount:
+        tx.on_commit(read_cache.invalidate_vehicles)
+        tx.on_commit(_after_register, license_plate)
 
+    return {
+        "license_plate": license_plate,
+        "vehicle_type": vehicle_type,
+        "checked_in": 0,
+        "slot_id": None,
+    }
 
+
+@metrics.track("checkin")
 def checkin_vehicle(license_plate: str, username: str = "staff"):
-    if not (
-        check_user_role(username, "Staff")
-        or check_user_role(username, "Admin")
-    ):
-        raise PermissionError("Permission denied for check-in")
+    _require_staff(username, "check-in")
 
-    with get_conn() as conn:
-        cur = conn.cursor()
+    # Pre-booked vehicle arriving: its hold becomes the allocation
+    if license_plate in slot_manager.held_slots:
+        reservations.confirm_reservation(license_plate)
 
-        cur.execute(
-            "SELECT slot_id FROM vehicles WHERE license_plate=?",
-            (license_plate,),
-        )
-        row = cur.fetchone()
+    engine = slot_manager._engine()
+    if engine is not None:
+        result = engine.checkin_vehicle(license_plate)
+        slot_manager._slots_changed(result["slot_id"])
+        read_cache.invalidate_vehicles()
+        _after_checkin(license_plate, username)
+        return result
+    return run_in_transaction(_checkin_vehicle_tx, license_plate, username)
 
-        if not row or row["slot_id"] is None:
-            raise ValueError("Vehicle not allocated to any slot")
 
-        slot_id = row["slot_id"]
+def _checkin_vehicle_tx(cur, tx, license_plate: str, username: str):
+    cur.execute(
+        "SELECT slot_id FROM vehicles WHERE license_plate=?",
+        (license_plate,),
+    )
+    row = cur.fetchone()
 
-        cur.execute(
-            "UPDATE vehicles SET checked_in=1 WHERE license_plate=?",
-            (license_plate,),
-        )
-        cur.execute(
-            """
-            UPDATE slots
-            SET is_occupied=1, vehicle_plate=?
-            WHERE id=?
-            """,
-            (license_plate, slot_id),
-        )
-        cur.execute(
-            """
-            INSERT INTO vehicle_logs (license_plate, checkin_time, slot_id)
-            VALUES (?, ?, ?)
-            """,
-            (license_plate, datetime.now().isoformat(), slot_id),
-        )
+    if not row or row["slot_id"] is None:
+        raise ValueError("Vehicle not allocated to any slot")
 
-        # Notifications
-        send_email_notification(
-            "user@example.com",
-            "Vehicle Checked In",
-            f"{license_plate} checked in",
-        )
-        send_sms_notification(
-            "+11111111",
-            f"{license_plate} checked in",
-        )
-        send_push_notification(
-            username,
-            f"{license_plate} checked in",
-        )
+    slot_id = row["slot_id"]
 
-        # Audit log
-        log_action(
-            user_id=username,
-            action="CHECKIN_VEHICLE",
-            resource=license_plate,
-        )
+    cur.execute(
+        "UPDATE vehicles SET checked_in=1 WHERE license_plate=?",
+        (license_plate,),
+    )
+    cur.execute(
+        """
+        UPDATE slots
+        SET is_occupied=1, vehicle_plate=?
+        WHERE id=?
+        """,
+        (license_plate, slot_id),
+    )
+    cur.execute(
+        """
+        INSERT INTO vehicle_logs (license_plate, checkin_time, slot_id)
+        VALUES (?, ?, ?)
+        """,
+        (license_plate, datetime.now().isoformat(), slot_id),
+    )
 
-        return {
-            "license_plate": license_plate,
-            "checked_in": 1,
-            "slot_id": slot_id,
-        }
+    tx.on_commit(slot_manager._slots_changed, slot_id)
+    tx.on_commit(read_cache.invalidate_vehicles)
 
+    # Audit log and notifications once committed
+    tx.on_commit(_after_checkin, license_plate, username)
 
+    return {
+        "license_plate": license_plate,
+        "checked_in": 1,
+        "slot_id": slot_id,
+    }
+
+
+@metrics.track("checkout")
 def checkout_vehicle(
     license_plate: str,
     amount: float = 0,
     username: str = "staff",
 ):
-    if not (
-        check_user_role(username, "Staff")
-        or check_user_role(username, "Admin")
-    ):
-        raise PermissionError("Permission denied for checkout")
+    _require_staff(username, "checkout")
+    engine = slot_manager._engine()
+    if engine is not None:
+        engine.claim_checkout(license_plate)
+        try:
+            _capture_payment(authorize_checkout(license_plate, amount))
+        except Exception:
+            engine.release_checkout(license_plate)
+            raise
+        slot_id = engine.checkout_vehicle(license_plate, amount)
+        slot_manager._slots_changed(slot_id)
+        read_cache.invalidate_vehicles()
+        _after_checkout(license_plate, username)
+        return {"license_plate": license_plate, "checked_in": 0, "slot_id": None, "amount": amount}
+    payment = authorize_checkout(license_plate, amount)
+    return run_in_transaction(_checkout_vehicle_tx, license_plate, amount, username, payment)
+
+
+def authorize_checkout(license_plate: str, amount: float) -> dict:
+    """
+    Authorize a checkout's payment before its transaction runs. The
+    transaction body may run more than once (write queue retries), so it
+    only captures the authorization from an on_commit hook.
+    """
+    return metrics.timed_call(
+        "payment_authorize",
+        payment_gateway.authorize_payment,
+        license_plate,
+        amount,
+        method="mock",
+    )
+
+
+def _capture_payment(payment: dict):
+    """
+    on_commit hook of a checkout: the checkout stands whatever happens
+    here, so a failed capture is stored in failed_captures (and audited)
+    to be charged later by retry_failed_captures().
+    """
+    try:
+        metrics.timed_call("payment", payment_gateway.capture_payment, payment)
+    except Exception as e:
+        with get_conn() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO failed_captures (idempotency_key, license_plate, authorization, error, failed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (payment["idempotency_key"], payment["license_plate"], json.dumps(payment), str(e), time.time()),
+            )
+        log_action(user_id=None, action="PAYMENT_CAPTURE", resource=payment["license_plate"], status="FAILURE")
+        raise
+
 
+def retry_failed_captures() -> int:
+    """
+    Capture the payments left in failed_captures; returns how many went
+    through. Captures are idempotent per authorization, so a retry never
+    charges twice.
+    """
     with get_conn() as conn:
-        cur = conn.cursor()
+        rows = conn.execute("SELECT idempotency_key, authorization FROM failed_captures ORDER BY failed_at").fetchall()
+    captured = 0
+    for row in rows:
+        payment = json.loads(row["authorization"])
+        try:
+            metrics.timed_call("payment", payment_gateway.capture_payment, payment)
+        except Exception as e:
+            with get_conn() as conn:
+                conn.execute(
+                    "UPDATE failed_captures SET error=?, failed_at=? WHERE idempotency_key=?",
+                    (str(e), time.time(), row["idempotency_key"]),
+                )
+            continue
+        with get_conn() as conn:
+            conn.execute("DELETE FROM failed_captures WHERE idempotency_key=?", (row["idempotency_key"],))
+        log_action(user_id=None, action="PAYMENT_CAPTURE", resource=payment["license_plate"])
+        captured += 1
+    return captured
 
-        cur.execute(
-            "SELECT slot_id FROM vehicles WHERE license_plate=?",
-            (license_plate,),
-        )
-        row = cur.fetchone()
 
-        if not row or row["slot_id"] is None:
-            raise ValueError("Vehicle not allocated to any slot")
+def _checkout_vehicle_tx(cur, tx, license_plate: str, amount: float, username: str, payment: dict):
+    cur.execute(
+        "SELECT slot_id FROM vehicles WHERE license_plate=?",
+        (license_plate,),
+    )
+    row = cur.fetchone()
 
-        slot_id = row["slot_id"]
+    if not row or row["slot_id"] is None:
+        raise ValueError("Vehicle not allocated to any slot")
 
+    slot_id = row["slot_id"]
+
+    cur.execute(
+        """
+        UPDATE vehicles
+        SET checked_in=0, slot_id=NULL
+        WHERE license_plate=?
+        """,
+        (license_plate,),
+    )
+    cur.execute(
+        """
+        UPDATE slots
+        SET is_occupied=0, vehicle_plate=NULL
+        WHERE id=?
+        """,
+        (slot_id,),
+    )
+    cur.execute(
+        """
+        UPDATE vehicle_logs
+        SET checkout_time=?, amount=?
+        WHERE license_plate=? AND checkout_time IS NULL
+        """,
+        (datetime.now().isoformat(), amount, license_plate),
+    )
+
+    # Charged once, after the commit (idempotent per authorization)
+    tx.on_commit(_capture_payment, payment)
+
+    # Slot is free once the transaction has committed
+    tx.on_commit(slot_manager.free_slot_index.release, slot_id)
+    tx.on_commit(slot_manager._slots_changed, slot_id)
+    tx.on_commit(read_cache.invalidate_vehicles)
+
+    # Audit log and notifications once committed
+    tx.on_commit(_after_checkout, license_plate, username)
+
+    return {
+        "license_plate": license_plate,
+        "checked_in": 0,
+        "slot_id": None,
+        "amount": amount,
+    }
+
+
+# --------------------------------------------------
+# Gate Operations
+# --------------------------------------------------
+
+@metrics.track("gate_entry")
+@retry_on_busy()
+def gate_entry(license_plate: str, vehicle_type: str, username: str = "staff"):
+    """
+    Gate fast path: register the plate if unknown, allocate a slot (the
+    vehicle's reservation or allocation if it has one), check in and write
+    the vehicle_logs row, all in one transaction with a single commit.
+    """
+    _require_staff(username, "gate entry")
+
+    engine = slot_manager._engine()
+    if engine is not None:
+        result, registered = engine.gate_entry(license_plate, vehicle_type, slot_manager.held_slots.get(license_plate))
+        slot_manager.release_hold(license_plate)
+        slot_manager._slots_changed(result["slot_id"])
+        read_cache.invalidate_vehicles()
+        if registered:
+            _after_register(license_plate)
+        _after_gate_entry(license_plate, username)
+        return result
+
+    return run_in_transaction(_gate_entry_tx, license_plate, vehicle_type, username)
+
+
+def _gate_entry_tx(cur, tx, license_plate: str, vehicle_type: str, username: str):
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO vehicles (license_plate, vehicle_type, checked_in, slot_id)
+        VALUES (?, ?, 0, NULL)
+        """,
+        (license_plate, vehicle_type),
+    )
+    if cur.rowcount:
+        tx.on_commit(_after_register, license_plate)
+    cur.execute(
+        "SELECT vehicle_type, checked_in, slot_id FROM vehicles WHERE license_plate=?",
+        (license_plate,),
+    )
+    vehicle = cur.fetchone()
+
+    if vehicle["checked_in"]:
+        raise ValueError("Vehicle already checked in")
+
+    slot_id = vehicle["slot_id"]
+    if slot_id is None:
+        slot = slot_manager._claim_for_vehicle(cur, tx, license_plate, vehicle["vehicle_type"])
+        if slot is None:
+            raise ValueError("No available slots")
+        slot_id = slot["id"]
+    else:
         cur.execute(
-            """
-            UPDATE vehicles
-            SET checked_in=0, slot_id=NULL
-            WHERE license_plate=?
-            """,
-            (license_plate,),
-        )
-        cur.execute(
-            """
-            UPDATE slots
-            SET is_occupied=0, vehicle_plate=NULL
-            WHERE id=?
-            """,
-            (slot_id,),
-        )
-        cur.execute(
-            """
-            UPDATE vehicle_logs
-            SET checkout_time=?, amount=?
-            WHERE license_plate=? AND checkout_time IS NULL
-            """,
-            (datetime.now().isoformat(), amount, license_plate),
+            "UPDATE slots SET is_occupied=1, vehicle_plate=? WHERE id=?",
+            (license_plate, slot_id),
         )
 
-        # Payment
-        payment_gateway.process_payment(
-            license_plate,
-            amount,
-            method="mock",
-        )
+    cur.execute(
+        "UPDATE vehicles SET checked_in=1, slot_id=? WHERE license_plate=?",
+        (slot_id, license_plate),
+    )
+    cur.execute(
+        """
+        INSERT INTO vehicle_logs (license_plate, checkin_time, slot_id)
+        VALUES (?, ?, ?)
+        """,
+        (license_plate, datetime.now().isoformat(), slot_id),
+    )
 
-        # Notifications
-        send_email_notification(
-            "user@example.com",
-            "Vehicle Checked Out",
-            f"{license_plate} checked out",
-        )
-        send_sms_notification(
-            "+11111111",
-            f"{license_plate} checked out",
-        )
-        send_push_notification(
-            username,
-            f"{license_plate} checked out",
-        )
+    tx.on_commit(slot_manager._slots_changed, slot_id)
+    tx.on_commit(read_cache.invalidate_vehicles)
+    tx.on_commit(_after_gate_entry, license_plate, username)
+
+    return {
+        "license_plate": license_plate,
+        "vehicle_type": vehicle["vehicle_type"],
+        "checked_in": 1,
+        "slot_id": slot_id,
+    }
+
+
+# --------------------------------------------------
+# Async API (FastAPI routes; see database/async_db.py)
+# --------------------------------------------------
+
+# Reads from the memory backend are answered without a thread hop; writes
+# go through the writer in both backends (see slot_manager)
+
+async def register_vehicle_async(license_plate: str, vehicle_type: str):
+    if slot_manager._engine() is not None:
+        return await async_db.write(register_vehicle, license_plate, vehicle_type)
+    return await async_db.write_tx(_register_vehicle_tx, license_plate, vehicle_type)
+
+
+@metrics.track("checkin")
+async def checkin_vehicle_async(license_plate: str, username: str = "staff"):
+    if slot_manager._engine() is not None:
+        return await async_db.write(checkin_vehicle, license_plate, username)
+    _require_staff(username, "check-in")
+    if license_plate in slot_manager.held_slots:
+        await reservations.confirm_reservation_async(license_plate)
+    return await async_db.write_tx(_checkin_vehicle_tx, license_plate, username)
+
+
+@metrics.track("checkout")
+async def checkout_vehicle_async(license_plate: str, amount: float = 0, username: str = "staff"):
+    if slot_manager._engine() is not None:
+        return await async_db.write(checkout_vehicle, license_plate, amount, username)
+    _require_staff(username, "checkout")
+    payment = authorize_checkout(license_plate, amount)
+    return await async_db.write_tx(_checkout_vehicle_tx, license_plate, amount, username, payment)
+
+
+@metrics.track("gate_entry")
+async def gate_entry_async(license_plate: str, vehicle_type: str, username: str = "staff"):
+    if slot_manager._engine() is not None:
+        return await async_db.write(gate_entry, license_plate, vehicle_type, username)
+    _require_staff(username, "gate entry")
+    return await async_db.write_tx(_gate_entry_tx, license_plate, vehicle_type, username)
+
+
+async def list_vehicles_async():
+    if slot_manager._engine() is not None:
+        return list_vehicles()
+    return await async_db.read(list_vehicles)
 
-        # Audit log
-        log_action(
-            user_id=username,
-            action="CHECKOUT_VEHICLE",
-            resource=license_plate,
-        )
 
-        return {
-            "license_plate": license_plate,
-            "checked_in": 0,
-            "slot_id": None,
-            "amount": amount,
-        }
+async def query_vehicles_async(vehicle_type: str = None, checked_in: bool = None,
+                               after: str = None, limit: int = None):
+    if slot_manager._engine() is not None:
+        return query_vehicles(vehicle_type, checked_in, after, limit)
+    return await async_db.read(query_vehicles, vehicle_type, checked_in, after, limit)
+
+
+async def query_vehicles_json_async(vehicle_type: str = None, checked_in: bool = None,
+                                    after: str = None, limit: int = None):
+    if slot_manager._engine() is not None:
+        return query_vehicles_json(vehicle_type, checked_in, after, limit)
+    return await async_db.read(query_vehicles_json, vehicle_type, checked_in, after, limit)
 
 
 # --------------------------------------------------
 # Utility Functions
 # --------------------------------------------------
 
+def _require_staff(username: str, operation: str):
+    if not (
+        check_user_role(username, "Staff")
+        or check_user_role(username, "Admin")
+    ):
+        raise PermissionError(f"Permission denied for {operation}")
+
+
+def _after_register(license_plate: str):
+    log_action(
+        user_id=None,
+        action="REGISTER_VEHICLE",
+        resource=license_plate,
+    )
+
+
+def _after_checkin(license_plate: str, username: str):
+    log_action(
+        user_id=username,
+        action="CHECKIN_VEHICLE",
+        resource=license_plate,
+    )
+    # Notifications go out after commit, off the request thread
+    _notify_vehicle_event(license_plate, username, "Checked In")
+
+
+def _after_checkout(license_plate: str, username: str):
+    log_action(
+        user_id=username,
+        action="CHECKOUT_VEHICLE",
+        resource=license_plate,
+    )
+    _notify_vehicle_event(license_plate, username, "Checked Out")
+
+
+def _after_gate_entry(license_plate: str, username: str):
+    _notify_vehicle_event(license_plate, username, "Checked In")
+    log_action(
+        user_id=username,
+        action="GATE_ENTRY",
+        resource=license_plate,
+    )
+
+
+def _notify_vehicle_event(license_plate: str, username: str, event: str):
+    """
+    Queue email/SMS/push notifications for a committed vehicle event.
+    Never blocks on the providers (see notifications/dispatcher.py).
+    """
+    message = f"{license_plate} {event.lower()}"
+    notify_email("user@example.com", f"Vehicle {event}", message)
+    notify_sms("+11111111", message)
+    notify_push(username, message)
+
+
 def list_vehicles():
+    """
+    All vehicles, from a snapshot cached until the next vehicle write
+    (see core/read_cache.py); the rows must not be modified.
+    """
+    engine = slot_manager._engine()
+    if engine is not None:
+        return engine.list_vehicles()
+    return read_cache.list_vehicles(_load_vehicles)
+
+
+def _load_vehicles():
     with get_conn() as conn:
         cur = conn.cursor()
         cur.execute("SELECT * FROM vehicles")
         return [dict(row) for row in cur.fetchall()]
+
+
+def query_vehicles(vehicle_type: str = None, checked_in: bool = None,
+                   after: str = None, limit: int = None):
+    """
+    Vehicles matching the filters, in license plate order. Keyset
+    pagination: pass the last plate of the previous page as `after`.
+    """
+    return list(iter_vehicles(vehicle_type, checked_in, after, limit))
+
+
+def iter_vehicles(vehicle_type: str = None, checked_in: bool = None,
+                  after: str = None, limit: int = None):
+    """
+    Same as query_vehicles, but yields the rows batch by batch (db.iter_rows)
+    instead of building a list (streamed responses).
+    """
+    engine = slot_manager._engine()
+    if engine is not None:
+        rows = (
+            v for v in sorted(engine.list_vehicles(), key=lambda v: v["license_plate"])
+            if (vehicle_type is None or v["vehicle_type"] == vehicle_type)
+            and (checked_in is None or bool(v["checked_in"]) == checked_in)
+            and (after is None or v["license_plate"] > after)
+        )
+        yield from islice(rows, limit)
+        return
+    yield from iter_rows(
+        lambda after, limit: _vehicles_sql("*", vehicle_type, checked_in, after, limit),
+        "license_plate", after, limit,
+    )
+
+
+def query_vehicles_json(vehicle_type: str = None, checked_in: bool = None,
+                        after: str = None, limit: int = None) -> JsonRows:
+    """
+    Same as query_vehicles, encoded as a JSON array by SQLite (API responses).
+    """
+    if slot_manager._engine() is not None:
+        rows = query_vehicles(vehicle_type, checked_in, after, limit)
+        return JsonRows(json.dumps(rows, separators=(",", ":")).encode(), len(rows), rows[-1]["license_plate"] if rows else None)
+    columns = f"license_plate AS k, {json_object_sql(VEHICLE_COLUMNS)} AS doc"
+    return query_json(*_vehicles_sql(columns, vehicle_type, checked_in, after, limit))
+
+
+def _vehicles_sql(columns, vehicle_type, checked_in, after, limit):
+    clauses, params = [], []
+    if vehicle_type is not None:
+        clauses.append("vehicle_type = ?")
+        params.append(vehicle_type)
+    if checked_in is not None:
+        clauses.append("checked_in = ?")
+        params.append(1 if checked_in else 0)
+    if after is not None:
+        clauses.append("license_plate > ?")
+        params.append(after)
+    sql = f"SELECT {columns} FROM vehicles"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY license_plate"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
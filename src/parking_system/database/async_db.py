@@ -0,0 +1,78 @@
+# src/parking_system/database/async_db.py
+"""
+Async access to the database for the API
+
+SQLite calls block, so async routes must not run them on the event loop.
+Instead of the shared default threadpool (where every request thread
+fights for the SQLite write lock), work is split by kind:
+
+    - writes go through the single-writer queue (database/write_queue.py);
+      transaction bodies are group-committed with other pending writes
+    - reads run on a small pool of reader threads, each using a pooled
+      WAL connection that does not block the writer
+
+    slot = await async_db.write_tx(slot_manager._allocate_slot_tx, plate)
+    slots = await async_db.read(slot_manager.list_slots)
+
+The wrapped functions are the regular sync operations, which remain the
+API for the CLI and scripts. Like asyncio.to_thread, they run in a copy
+of the caller's context (so e.g. metrics.track sees the async operation
+that called them).
+"""
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from parking_system.config import get_config
+from parking_system.database.write_queue import WriteQueue, write_queue
+
+
+class AsyncDatabase:
+    def __init__(self, readers: int = 4, writes: Optional[WriteQueue] = None):
+        self.readers = readers
+        self.writes = writes or write_queue
+        self._reader: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "AsyncDatabase":
+        settings = get_config().get("database") or {}
+        return cls(readers=int(settings.get("async_readers", 4)))
+
+    async def write(self, func: Callable, *args, **kwargs):
+        """Run a self-contained sync write operation on the writer thread."""
+        context = contextvars.copy_context()
+        return await asyncio.wrap_future(self.writes.submit(context.run, func, *args, **kwargs))
+
+    async def write_tx(self, body: Callable, *args, **kwargs):
+        """Group-commit a transaction body (see db.run_in_transaction)."""
+        return await asyncio.wrap_future(self.writes.submit_tx(body, *args, **kwargs))
+
+    async def read(self, func: Callable, *args, **kwargs):
+        """Run a sync read-only operation on a reader thread."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._readers(), functools.partial(context.run, func, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.shutdown(wait=True)
+
+    def _readers(self) -> ThreadPoolExecutor:
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    self._reader = ThreadPoolExecutor(self.readers, thread_name_prefix="db-reader")
+        return self._reader
+
+
+# Process-wide instance; threads start on first use
+async_db = AsyncDatabase.from_config()
+atexit.register(async_db.shutdown)
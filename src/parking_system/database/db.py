@@ -1,109 +1,374 @@
+import logging
+import os
+import random
 import sqlite3
+import threading
+import time
 from contextlib import contextmanager
+from functools import wraps
 from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence
+
+from parking_system import metrics
+from parking_system.config import get_config
+from parking_system.database.migrations import apply_migrations
+
+logger = logging.getLogger(__name__)
 
 DB_FILE = Path(__file__).parent / "parking.db"
 
+# Seconds a connection waits on a locked database before failing
+BUSY_TIMEOUT = 5.0
+
+# Applied once to every new connection, overridden by `database.pragmas`
+DEFAULT_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "foreign_keys": "on",
+    "busy_timeout": int(BUSY_TIMEOUT * 1000),
+}
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of open connections to one database file.
+
+    Connections are opened lazily (up to `size`), get their pragmas once,
+    and are reused across get_conn() blocks instead of being reopened and
+    re-configured on every call. With size=0 nothing is kept: every
+    checkout opens a fresh connection and closes it afterwards.
+    """
+
+    def __init__(self, path, size: int = 8, timeout: float = 10.0, pragmas: Optional[dict] = None):
+        self.path = str(path)
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._idle = []
+        self._open = 0
+        self._cond = threading.Condition()
+        self._pid = os.getpid()
+        self.checkouts = 0
+        self.waits = 0
+        self._watcher = None
+        self._watcher_pid = None
+        self._watcher_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        busy_ms = self.pragmas.get("busy_timeout", BUSY_TIMEOUT * 1000)
+        conn = sqlite3.connect(self.path, timeout=float(busy_ms) / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._cond:
+            self._after_fork()
+            self.checkouts += 1
+            if self.size <= 0:
+                return self.connect()
+            if not self._idle and self._open >= self.size:
+                self.waits += 1
+                if not self._cond.wait_for(lambda: self._idle or self._open < self.size, self.timeout):
+                    raise sqlite3.OperationalError("database connection pool exhausted")
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return self.connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: sqlite3.Connection, broken: bool = False) -> None:
+        with self._cond:
+            if self.size <= 0 or self._pid != os.getpid():
+                conn.close()
+                return
+            if broken or conn.in_transaction:
+                conn.close()
+                self._open -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Close the idle connections; checked-out ones close on release."""
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._open -= len(self._idle)
+            self._idle = []
+        with self._watcher_lock:
+            if self._watcher is not None and self._watcher_pid == os.getpid():
+                self._watcher.close()
+            self._watcher = None
+
+    def data_version(self) -> int:
+        """
+        PRAGMA data_version of a connection kept for this alone: the value
+        changes whenever any other connection commits to the file, this
+        process's pooled connections and other processes alike.
+        """
+        with self._watcher_lock:
+            if self._watcher is None or self._watcher_pid != os.getpid():
+                self._watcher = self.connect()
+                self._watcher_pid = os.getpid()
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "path": self.path,
+                "size": self.size,
+                "open": self._open,
+                "idle": len(self._idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+            }
+
+    def _after_fork(self) -> None:
+        # SQLite connections must not cross a fork: start over in the child
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = []
+            self._open = 0
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """
+    Pool for the current DB_FILE (one per path, so repointing DB_FILE in
+    tests or benchmarks gets a fresh pool).
+    """
+    path = str(DB_FILE)
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None:
+                settings = get_config().get("database") or {}
+                pragmas = dict(DEFAULT_PRAGMAS)
+                pragmas.update(settings.get("pragmas") or {})
+                pool = _pools[path] = ConnectionPool(
+                    path,
+                    size=int(settings.get("pool_size", 8)),
+                    timeout=float(settings.get("pool_timeout_seconds", 10.0)),
+                    pragmas=pragmas,
+                )
+    return pool
+
+
+def close_pools() -> None:
+    """Close every pooled connection (shutdown, test teardown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def data_version() -> tuple:
+    """(path, data_version) of the current database; see ConnectionPool.data_version."""
+    pool = get_pool()
+    return pool.path, pool.data_version()
+
+
+def change_counters() -> Dict[str, int]:
+    """Rows written so far to each tracked table (migration 7 triggers)."""
+    with get_conn() as conn:
+        return dict(conn.execute("SELECT name, counter FROM change_counters").fetchall())
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+# Time between checkout and release of a connection, by transaction mode
+_connection_held = {
+    True: metrics.db_connection_seconds.labels("immediate"),
+    False: metrics.db_connection_seconds.labels("deferred"),
+}
+
+
 @contextmanager
-def get_conn():
-    conn = sqlite3.connect(DB_FILE)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")  # Enforce foreign keys
+def get_conn(immediate: bool = False):
+    """
+    Check out a pooled connection and run the block in one transaction.
+    With immediate=True the write lock is taken up front (BEGIN IMMEDIATE),
+    so read-then-write blocks cannot deadlock with a concurrent writer.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    broken = False
+    start = time.perf_counter()
     try:
+        if immediate:
+            conn.execute("BEGIN IMMEDIATE")
         yield conn
         conn.commit()
     except:
-        conn.rollback()
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            broken = True
         raise
     finally:
-        conn.close()
+        pool.release(conn, broken)
+        _connection_held[immediate].observe(time.perf_counter() - start)
 
 
-def init_db():
-    """Create all tables for full Phase 5 support."""
-    DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+class TxContext:
+    """
+    Side effects of one write command that must wait for its transaction:
+    on_commit hooks (index updates, audit, notifications) run only once
+    the data is durable, on_rollback hooks undo in-memory changes made
+    while the transaction was open.
+    """
+
+    def __init__(self):
+        self._on_commit = []
+        self._on_rollback = []
+
+    def on_commit(self, func, *args, **kwargs) -> None:
+        self._on_commit.append((func, args, kwargs))
+
+    def on_rollback(self, func, *args, **kwargs) -> None:
+        self._on_rollback.append((func, args, kwargs))
+
+    def committed(self) -> None:
+        self._run(self._on_commit)
+
+    def rolled_back(self) -> None:
+        self._run(self._on_rollback)
+
+    def _run(self, hooks) -> None:
+        self._on_commit, self._on_rollback = [], []
+        for func, args, kwargs in hooks:
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                # The transaction's outcome stands; hooks with side effects
+                # that must not be lost record their own failures
+                logger.exception("Transaction hook %s failed", getattr(func, "__name__", func))
+
+
+def run_in_transaction(body, *args, **kwargs):
+    """
+    Run a write command body(cur, tx, *args) in its own immediate
+    transaction and fire its commit/rollback hooks. The same bodies can be
+    group-committed by the write queue (see database/write_queue.py).
+    """
+    tx = TxContext()
+    try:
+        with get_conn(immediate=True) as conn:
+            result = body(conn.cursor(), tx, *args, **kwargs)
+    except Exception:
+        tx.rolled_back()
+        raise
+    tx.committed()
+    return result
+
+
+def iter_rows(page_sql: Callable, key: str, after=None, limit: Optional[int] = None, batch_size: int = 500):
+    """
+    Yield the rows of a keyset-ordered query as dicts, `batch_size` at a
+    time, so large results are never materialized as one list.
+    page_sql(after, limit) builds the query for the rows after a key.
+    Each batch is read in its own short transaction and the pooled
+    connection is released before its rows are yielded, so a slow
+    consumer (a client downloading a stream) holds neither; the batches
+    continue from the last key (`key` column) they returned.
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = batch_size if remaining is None else min(batch_size, remaining)
+        with get_conn() as conn:
+            rows = [dict(row) for row in conn.execute(*page_sql(after, size))]
+        yield from rows
+        if len(rows) < size:
+            return
+        after = rows[-1][key]
+        if remaining is not None:
+            remaining -= len(rows)
+
+
+class JsonRows(NamedTuple):
+    body: bytes         # JSON array of the rows
+    count: int
+    last_key: Any       # first column of the last row (keyset cursor)
+
+
+def json_object_sql(columns: Sequence[str]) -> str:
+    """SQL expression building a JSON object of `columns` for each row."""
+    return "json_object(" + ", ".join(f"'{c}', {c}" for c in columns) + ")"
+
+
+# Aggregates take an ORDER BY from SQLite 3.44 on
+_ORDERED_AGGREGATES = sqlite3.sqlite_version_info >= (3, 44, 0)
+
+
+def query_json(sql: str, params=()) -> JsonRows:
+    """
+    Run an ordered query selecting (k, doc = json_object(...)) and join
+    the objects SQLite encoded into one JSON array, in k order: no dict
+    is created per row. group_concat only guarantees an order with its
+    own ORDER BY (SQLite 3.44+); on older versions the array is joined
+    here from the ordered rows instead. The keys are unique and
+    ascending, so the last one is max(k).
+    """
     with get_conn() as conn:
+        if _ORDERED_AGGREGATES:
+            wrapped = f"SELECT '[' || coalesce(group_concat(doc, ',' ORDER BY k), '') || ']', count(*), max(k) FROM ({sql})"
+            body, count, last_key = conn.execute(wrapped, params).fetchone()
+            return JsonRows(body.encode(), count, last_key)
         cur = conn.cursor()
+        # Plain tuples: no sqlite3.Row per row
+        cur.row_factory = None
+        rows = cur.execute(sql, params).fetchall()
+    body = "[" + ",".join([doc for _, doc in rows]) + "]"
+    return JsonRows(body.encode(), len(rows), rows[-1][0] if rows else None)
 
-        # Slots
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS slots (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            slot_type TEXT NOT NULL,
-            level INTEGER NOT NULL,
-            is_occupied INTEGER NOT NULL DEFAULT 0,
-            vehicle_plate TEXT UNIQUE
-        )
-        """)
-
-        # Vehicles
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS vehicles (
-            license_plate TEXT PRIMARY KEY,
-            vehicle_type TEXT NOT NULL,
-            checked_in INTEGER NOT NULL DEFAULT 0,
-            slot_id INTEGER,
-            FOREIGN KEY(slot_id) REFERENCES slots(id)
-        )
-        """)
-
-        # Vehicle logs
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS vehicle_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            license_plate TEXT NOT NULL,
-            slot_id INTEGER,
-            checkin_time TEXT,
-            checkout_time TEXT,
-            amount REAL DEFAULT 0,
-            FOREIGN KEY(license_plate) REFERENCES vehicles(license_plate),
-            FOREIGN KEY(slot_id) REFERENCES slots(id)
-        )
-        """)
-
-        # Users (Phase 5 Security)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL CHECK(role IN ('Admin','Staff','User'))
-        )
-        """)
-
-        # Audit logs
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS audit_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp INTEGER NOT NULL,
-            user TEXT NOT NULL,
-            role TEXT NOT NULL,
-            action TEXT NOT NULL,
-            details TEXT
-        )
-        """)
-
-
-        # Audit logs table (Phase 5)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS audit_logs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        timestamp INTEGER NOT NULL,
-        user TEXT NOT NULL,
-        role TEXT NOT NULL,
-        action TEXT NOT NULL,
-        details TEXT
-)
-""")
-
-
-        # Payments (Phase 5 Payment integration)
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS payments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            license_plate TEXT NOT NULL,
-            amount REAL NOT NULL,
-            payment_method TEXT,
-            timestamp TEXT,
-            FOREIGN KEY(license_plate) REFERENCES vehicles(license_plate)
-        )
-        """)
+
+def is_busy_error(exc: Exception) -> bool:
+    """True for SQLite lock contention errors worth retrying."""
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    message = str(exc).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry_on_busy(attempts: int = 6, base_delay: float = 0.002):
+    """
+    Retry a write operation on lock contention with jittered exponential
+    backoff. Other errors propagate immediately.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e) or attempt == attempts - 1:
+                        raise
+                    time.sleep(base_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+        return wrapper
+    return decorator
+
+
+def init_db():
+    """
+    Create or upgrade all tables and indexes (see database/migrations.py).
+    The write lock is held throughout, so concurrent starters apply each
+    migration once.
+    """
+    DB_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with get_conn(immediate=True) as conn:
+        return apply_migrations(conn)
@@ -1,59 +1,548 @@
-from typing import List, Optional
+# src/parking_system/database/db_utils.py
+"""
+In-memory state engine (write-behind)
+
+Keeps every slot and vehicle in memory and serves the slot/vehicle
+operations without touching SQLite on the request path:
+
+    - slots by id and vehicles by plate in dicts
+    - free slots in a FreeSlotIndex (per slot type and level), so the
+      allocation strategies pick a slot in O(log n)
+    - every change is first appended to a write-ahead journal (one
+      record per operation and line, with a sequence number; records are
+      tuples of plain values written as Python literals, which is several
+      times cheaper than JSON on the allocation path)
+    - a background flusher writes the changed rows and vehicle_logs
+      entries to SQLite in one transaction, together with the last
+      journal sequence it covers (engine_checkpoint)
+    - on startup the engine loads SQLite and replays the journal records
+      newer than the checkpoint, so nothing acknowledged is lost when the
+      process dies between flushes
+
+The journal is split into segments: each flush starts a new segment and
+deletes the old ones once SQLite has committed them.
+
+Selected as the backend of slot_manager / vehicle_manager with
+
+    database:
+      backend: memory
+
+With the memory backend this process owns the lot: other processes must
+not write to the same database.
+"""
+
+import ast
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Collection, Dict, List, Optional
+
+from parking_system.config import get_config
+from parking_system.core.allocation import get_strategy
+from parking_system.core.slot_index import FreeSlotIndex
+from parking_system.database import db
 from parking_system.models.entities import Slot, Vehicle
 
-_slots: List[Slot] = []
-_vehicles: List[Vehicle] = []
 
-_slot_id_counter = 1
-_vehicle_id_counter = 1
+def _slot_dict(slot: Slot) -> dict:
+    return {
+        "id": slot.id,
+        "slot_type": slot.slot_type,
+        "level": slot.level,
+        "is_occupied": int(slot.is_occupied),
+        "vehicle_plate": slot.vehicle_plate,
+    }
 
 
-def create_slot(slot_type: str, level: int) -> Slot:
-    global _slot_id_counter
-    slot = Slot(
-        id=_slot_id_counter,
-        slot_type=slot_type,
-        level=level
-    )
-    _slots.append(slot)
-    _slot_id_counter += 1
-    return slot
+def _vehicle_dict(vehicle: Vehicle) -> dict:
+    return {
+        "license_plate": vehicle.license_plate,
+        "vehicle_type": vehicle.vehicle_type,
+        "checked_in": int(vehicle.checked_in),
+        "slot_id": vehicle.slot_id,
+    }
 
 
-def list_slots() -> List[Slot]:
-    return _slots
+class StateEngine:
+    """
+    In-memory slots and vehicles with a write-ahead journal.
+    With journal_dir=None nothing is journaled or flushed (scratch state).
+    """
 
+    def __init__(self, journal_dir=None, journal_sync: str = "flush",
+                 flush_interval: float = 0.5, index: Optional[FreeSlotIndex] = None):
+        self.journal_dir = Path(journal_dir) if journal_dir is not None else None
+        self.journal_sync = journal_sync
+        self.flush_interval = flush_interval
+        self.index = index if index is not None else FreeSlotIndex()
+        self._slots: Dict[int, Slot] = {}
+        self._vehicles: Dict[str, Vehicle] = {}
+        self._next_slot_id = 1
+        self._next_vehicle_id = 1
+        self._seq = 0
+        self._strategy = None
+        self._dirty_slots = set()
+        self._dirty_vehicles = set()
+        self._log_events: List[tuple] = []
+        self._checkouts = set()     # plates claimed by a checkout being paid for
+        self._journal = None
+        self._segment = 0
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.flushes = 0
+        if self.journal_dir is None:
+            self.index.load(())
 
-def register_vehicle(license_plate: str, vehicle_type: str) -> Vehicle:
-    global _vehicle_id_counter
+    @classmethod
+    def from_config(cls, index: Optional[FreeSlotIndex] = None) -> "StateEngine":
+        settings = (get_config().get("database") or {}).get("engine") or {}
+        journal_dir = settings.get("journal_dir") or Path(db.DB_FILE).with_suffix(".journal")
+        return cls(
+            journal_dir=journal_dir,
+            journal_sync=settings.get("journal_sync", "flush"),
+            flush_interval=float(settings.get("flush_interval_seconds", 0.5)),
+            index=index,
+        )
 
-    for v in _vehicles:
-        if v.license_plate == license_plate:
-            raise ValueError("Vehicle already registered")
+    # --------------------------------------------------
+    # Slots
+    # --------------------------------------------------
 
-    vehicle = Vehicle(
-        id=_vehicle_id_counter,
-        license_plate=license_plate,
-        vehicle_type=vehicle_type
-    )
-    _vehicles.append(vehicle)
-    _vehicle_id_counter += 1
-    return vehicle
+    def create_slot(self, slot_type: str, level: int) -> dict:
+        with self._lock:
+            slot_id = self._next_slot_id
+            self._record("slot", slot_id, slot_type, level)
+            return _slot_dict(self._slots[slot_id])
 
+    def get_slot(self, slot_id: int) -> Optional[dict]:
+        slot = self._slots.get(slot_id)
+        return _slot_dict(slot) if slot is not None else None
 
-def allocate_slot_to_vehicle(license_plate: str) -> Slot:
-    vehicle = next((v for v in _vehicles if v.license_plate == license_plate), None)
-    if not vehicle:
-        raise ValueError("Vehicle not registered")
+    def list_slots(self) -> list:
+        with self._lock:
+            return [_slot_dict(s) for s in self._slots.values()]
+
+    def allocate_slot(self, license_plate: str, held_slot: Optional[int] = None, strategy=None) -> dict:
+        """
+        Allocate the vehicle's held slot, or a free slot picked by the
+        strategy (default: the configured one).
+        """
+        with self._lock:
+            vehicle = self._vehicles.get(license_plate)
+            if vehicle is None:
+                raise ValueError("Vehicle does not exist")
+            if vehicle.slot_id is not None:
+                raise ValueError("Vehicle already allocated")
+            slot_id = self._take_slot(vehicle, held_slot, strategy)
+            self._record("allocate", license_plate, slot_id)
+            return _slot_dict(self._slots[slot_id])
+
+    def set_slot_occupancy(self, slot_id: int, occupied: bool, held: Collection[int] = ()) -> dict:
+        with self._lock:
+            if slot_id not in self._slots:
+                raise ValueError("Slot does not exist")
+            self._record("occupancy", slot_id, bool(occupied))
+            if slot_id in held:
+                # Reserved: stays out of the free-slot index
+                self.index.discard(slot_id)
+            slot = self._slots[slot_id]
+            return {"id": slot_id, "is_occupied": occupied, "vehicle_plate": slot.vehicle_plate}
+
+    # --------------------------------------------------
+    # Vehicles
+    # --------------------------------------------------
+
+    def register_vehicle(self, license_plate: str, vehicle_type: str):
+        """Returns (vehicle dict, created); registering twice is a no-op."""
+        with self._lock:
+            vehicle = self._vehicles.get(license_plate)
+            if vehicle is not None:
+                return _vehicle_dict(vehicle), False
+            self._record("register", license_plate, vehicle_type)
+            return _vehicle_dict(self._vehicles[license_plate]), True
+
+    def get_vehicle(self, license_plate: str) -> Optional[dict]:
+        vehicle = self._vehicles.get(license_plate)
+        return _vehicle_dict(vehicle) if vehicle is not None else None
+
+    def list_vehicles(self) -> list:
+        with self._lock:
+            return [_vehicle_dict(v) for v in self._vehicles.values()]
+
+    def checkin_vehicle(self, license_plate: str) -> dict:
+        with self._lock:
+            vehicle = self._vehicles.get(license_plate)
+            if vehicle is None or vehicle.slot_id is None:
+                raise ValueError("Vehicle not allocated to any slot")
+            self._record("checkin", license_plate, datetime.now().isoformat())
+            return {"license_plate": license_plate, "checked_in": 1, "slot_id": vehicle.slot_id}
+
+    def claim_checkout(self, license_plate: str) -> int:
+        """
+        Claim the vehicle's checkout before it is paid for, so a concurrent
+        checkout of the same vehicle fails instead of paying too. Finish
+        with checkout_vehicle, or release_checkout if the payment failed.
+        """
+        with self._lock:
+            vehicle = self._vehicles.get(license_plate)
+            if vehicle is None or vehicle.slot_id is None:
+                raise ValueError("Vehicle not allocated to any slot")
+            if license_plate in self._checkouts:
+                raise ValueError("Checkout already in progress")
+            self._checkouts.add(license_plate)
+            return vehicle.slot_id
+
+    def release_checkout(self, license_plate: str) -> None:
+        with self._lock:
+            self._checkouts.discard(license_plate)
+
+    def checkout_vehicle(self, license_plate: str, amount: float = 0) -> int:
+        """Check the vehicle out and return the slot it freed."""
+        with self._lock:
+            self._checkouts.discard(license_plate)
+            vehicle = self._vehicles.get(license_plate)
+            if vehicle is None or vehicle.slot_id is None:
+                raise ValueError("Vehicle not allocated to any slot")
+            slot_id = vehicle.slot_id
+            self._record("checkout", license_plate, datetime.now().isoformat(), amount)
+            return slot_id
+
+    def gate_entry(self, license_plate: str, vehicle_type: str, held_slot: Optional[int] = None):
+        """
+        Register if unknown, allocate unless allocated, check in.
+        Returns (result dict, registered).
+        """
+        with self._lock:
+            vehicle = self._vehicles.get(license_plate)
+            registered = vehicle is None
+            if registered:
+                self._record("register", license_plate, vehicle_type)
+                vehicle = self._vehicles[license_plate]
+            elif vehicle.checked_in:
+                raise ValueError("Vehicle already checked in")
+            if vehicle.slot_id is None:
+                self._record("allocate", license_plate, self._take_slot(vehicle, held_slot, None))
+            self._record("checkin", license_plate, datetime.now().isoformat())
+            return {
+                "license_plate": license_plate,
+                "vehicle_type": vehicle.vehicle_type,
+                "checked_in": 1,
+                "slot_id": vehicle.slot_id,
+            }, registered
+
+    # --------------------------------------------------
+    # Journal, flush and recovery
+    # --------------------------------------------------
+
+    def recover(self) -> int:
+        """
+        Load the state from SQLite, replay the journal on top of it and
+        persist the result. Returns the number of replayed records.
+        """
+        with self._lock:
+            with db.get_conn() as conn:
+                slots = conn.execute("SELECT id, slot_type, level, is_occupied, vehicle_plate FROM slots").fetchall()
+                vehicles = conn.execute("SELECT license_plate, vehicle_type, checked_in, slot_id FROM vehicles").fetchall()
+                row = conn.execute("SELECT seq FROM engine_checkpoint WHERE id = 1").fetchone()
+            checkpoint = row[0] if row else 0
+            self._slots = {r[0]: Slot(r[0], r[1], r[2], bool(r[3]), r[4]) for r in slots}
+            self._vehicles = {}
+            for i, r in enumerate(vehicles, 1):
+                self._vehicles[r[0]] = Vehicle(i, r[0], r[1], bool(r[2]), r[3])
+            self._next_slot_id = max(self._slots, default=0) + 1
+            self._next_vehicle_id = len(self._vehicles) + 1
+            self._seq = checkpoint
+
+            replayed = 0
+            for segment in self._segments():
+                for record in self._read_segment(segment):
+                    if record[0] > checkpoint:
+                        self._apply(record)
+                        self._seq = record[0]
+                        replayed += 1
+                self._segment = max(self._segment, int(segment.stem.split(".")[-1]))
+
+            self.index.load(
+                (s.id, s.slot_type, s.level, s.is_occupied) for s in self._slots.values()
+            )
+            self._open_segment()
+        self.flush()
+        return replayed
+
+    def flush(self) -> int:
+        """
+        Write pending changes to SQLite. Returns the number of rows and
+        log entries written.
+        """
+        if self.journal_dir is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                if not (self._dirty_slots or self._dirty_vehicles or self._log_events):
+                    return 0
+                seq = self._seq
+                slot_ids, plates = self._dirty_slots, self._dirty_vehicles
+                slots = [tuple(_slot_dict(self._slots[i]).values()) for i in slot_ids]
+                vehicles = [tuple(_vehicle_dict(self._vehicles[p]).values()) for p in plates]
+                events = self._log_events
+                self._dirty_slots, self._dirty_vehicles, self._log_events = set(), set(), []
+                done_segments = self._segments()
+                self._open_segment()
+            try:
+                self._write(slots, vehicles, events, seq)
+            except Exception:
+                # Keep everything pending; the journal still covers it
+                with self._lock:
+                    self._dirty_slots |= slot_ids
+                    self._dirty_vehicles |= plates
+                    self._log_events = events + self._log_events
+                raise
+            for segment in done_segments:
+                segment.unlink()
+            self.flushes += 1
+            return len(slots) + len(vehicles) + len(events)
+
+    def start(self) -> "StateEngine":
+        """Flush to SQLite on a background thread every flush_interval."""
+        if self._thread is None and self.journal_dir is not None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="state-engine-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the flusher after a final flush."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.journal_dir is not None:
+            self.flush()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def pending(self) -> int:
+        return len(self._dirty_slots) + len(self._dirty_vehicles) + len(self._log_events)
 
-    if vehicle.slot_id is not None:
-        raise ValueError("Vehicle already allocated")
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ENGINE] Flush failed: {e}")
 
-    for slot in _slots:
-        if not slot.is_occupied:
+    def _write(self, slots, vehicles, events, seq) -> None:
+        with db.get_conn(immediate=True) as conn:
+            conn.executemany(
+                """
+                INSERT INTO slots (id, slot_type, level, is_occupied, vehicle_plate)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    is_occupied=excluded.is_occupied, vehicle_plate=excluded.vehicle_plate
+                """,
+                # Clear plates first so moving a plate between slots cannot
+                # trip the UNIQUE constraint half way through
+                [s[:4] + (None,) for s in slots],
+            )
+            conn.executemany("UPDATE slots SET vehicle_plate=? WHERE id=?", [(s[4], s[0]) for s in slots if s[4]])
+            conn.executemany(
+                """
+                INSERT INTO vehicles (license_plate, vehicle_type, checked_in, slot_id)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(license_plate) DO UPDATE SET
+                    checked_in=excluded.checked_in, slot_id=excluded.slot_id
+                """,
+                vehicles,
+            )
+            for event in events:
+                if event[0] == "checkin":
+                    conn.execute(
+                        "INSERT INTO vehicle_logs (license_plate, checkin_time, slot_id) VALUES (?, ?, ?)",
+                        event[1:],
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE vehicle_logs SET checkout_time=?, amount=? "
+                        "WHERE license_plate=? AND checkout_time IS NULL",
+                        (event[2], event[3], event[1]),
+                    )
+            conn.execute(
+                "INSERT INTO engine_checkpoint (id, seq) VALUES (1, ?) "
+                "ON CONFLICT(id) DO UPDATE SET seq=excluded.seq",
+                (seq,),
+            )
+
+    def _take_slot(self, vehicle: Vehicle, held_slot: Optional[int], strategy) -> int:
+        if held_slot is not None:
+            slot = self._slots.get(held_slot)
+            if slot is not None and not slot.is_occupied:
+                return held_slot
+        if strategy is None:
+            # Configuration is fixed for the life of the process
+            strategy = self._strategy = self._strategy or get_strategy()
+        slot_id = strategy.select(self.index, vehicle.vehicle_type)
+        if slot_id is None:
+            raise ValueError("No available slots")
+        return slot_id
+
+    def _record(self, op: str, *args) -> None:
+        """Append the change to the journal, then apply it."""
+        self._seq += 1
+        record = (self._seq, op) + args
+        if self._journal is not None:
+            self._journal.write(repr(record) + "\n")
+            if self.journal_sync != "none":
+                self._journal.flush()
+                if self.journal_sync == "fsync":
+                    os.fsync(self._journal.fileno())
+        self._apply(record)
+
+    def _apply(self, record) -> None:
+        op = record[1]
+        if op == "slot":
+            _, _, slot_id, slot_type, level = record
+            self._slots[slot_id] = Slot(slot_id, slot_type, level)
+            self._next_slot_id = max(self._next_slot_id, slot_id + 1)
+            self.index.add_slot(slot_id, slot_type, level)
+            self._dirty_slots.add(slot_id)
+        elif op == "register":
+            _, _, plate, vehicle_type = record
+            self._vehicles[plate] = Vehicle(self._next_vehicle_id, plate, vehicle_type)
+            self._next_vehicle_id += 1
+            self._dirty_vehicles.add(plate)
+        elif op == "allocate":
+            _, _, plate, slot_id = record
+            slot = self._slots[slot_id]
+            slot.is_occupied = True
+            slot.vehicle_plate = plate
+            self._vehicles[plate].slot_id = slot_id
+            # Already out of the free-slot index: popped by the strategy or held
+            self._dirty_slots.add(slot_id)
+            self._dirty_vehicles.add(plate)
+        elif op == "checkin":
+            _, _, plate, checkin_time = record
+            vehicle = self._vehicles[plate]
+            vehicle.checked_in = True
+            slot = self._slots[vehicle.slot_id]
             slot.is_occupied = True
-            slot.vehicle_plate = license_plate
-            vehicle.slot_id = slot.id
-            return slot
+            slot.vehicle_plate = plate
+            self._dirty_slots.add(slot.id)
+            self._dirty_vehicles.add(plate)
+            self._log_events.append(("checkin", plate, checkin_time, slot.id))
+        elif op == "checkout":
+            _, _, plate, checkout_time, amount = record
+            vehicle = self._vehicles[plate]
+            slot = self._slots[vehicle.slot_id]
+            vehicle.checked_in = False
+            vehicle.slot_id = None
+            slot.is_occupied = False
+            slot.vehicle_plate = None
+            self.index.release(slot.id)
+            self._dirty_slots.add(slot.id)
+            self._dirty_vehicles.add(plate)
+            self._log_events.append(("checkout", plate, checkout_time, amount))
+        elif op == "occupancy":
+            _, _, slot_id, occupied = record
+            slot = self._slots[slot_id]
+            slot.is_occupied = occupied
+            if occupied:
+                self.index.discard(slot_id)
+            else:
+                slot.vehicle_plate = None
+                self.index.release(slot_id)
+            self._dirty_slots.add(slot_id)
+
+    def _segments(self) -> List[Path]:
+        if self.journal_dir is None or not self.journal_dir.exists():
+            return []
+        return sorted(self.journal_dir.glob("journal.*.log"))
+
+    def _open_segment(self) -> None:
+        if self.journal_dir is None:
+            return
+        if self._journal is not None:
+            self._journal.close()
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._segment += 1
+        self._journal = open(self.journal_dir / f"journal.{self._segment:08d}.log", "a", encoding="utf-8")
+
+    @staticmethod
+    def _read_segment(segment: Path):
+        with open(segment, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield ast.literal_eval(line)
+                except (ValueError, SyntaxError):
+                    # Torn write at the end of the journal: it was never acknowledged
+                    return
+
+
+# --------------------------------------------------
+# Backend selection
+# --------------------------------------------------
+
+_engine: Optional[StateEngine] = None
+_engine_lock = threading.Lock()
+
+
+def backend() -> str:
+    """Configured backend for slot_manager/vehicle_manager: sqlite | memory."""
+    return ((get_config().get("database") or {}).get("backend") or "sqlite").lower()
+
+
+def active_engine(index: Optional[FreeSlotIndex] = None) -> Optional[StateEngine]:
+    """
+    The engine serving slot_manager/vehicle_manager, recovered and
+    flushing on first use; None with the SQLite backend. `index` is the
+    free-slot index the engine should maintain (slot_manager's).
+    """
+    global _engine
+    if _engine is None and backend() == "memory":
+        with _engine_lock:
+            if _engine is None:
+                engine = StateEngine.from_config(index)
+                engine.recover()
+                _engine = engine.start()
+    return _engine
+
+
+def shutdown_engine() -> None:
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        engine.stop()
 
-    raise ValueError("No available slots")
+
+# --------------------------------------------------
+# Scratch helpers (no persistence; entity objects)
+# --------------------------------------------------
+
+_scratch = StateEngine()
+
+
+def create_slot(slot_type: str, level: int) -> Slot:
+    return _scratch._slots[_scratch.create_slot(slot_type, level)["id"]]
+
+
+def list_slots() -> List[Slot]:
+    return list(_scratch._slots.values())
+
+
+def register_vehicle(license_plate: str, vehicle_type: str) -> Vehicle:
+    _, created = _scratch.register_vehicle(license_plate, vehicle_type)
+    if not created:
+        raise ValueError("Vehicle already registered")
+    return _scratch._vehicles[license_plate]
+
+
+def allocate_slot_to_vehicle(license_plate: str) -> Slot:
+    if license_plate not in _scratch._vehicles:
+        raise ValueError("Vehicle not registered")
+    slot = _scratch.allocate_slot(license_plate, strategy=get_strategy("first_free"))
+    return _scratch._slots[slot["id"]]
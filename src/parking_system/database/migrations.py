@@ -0,0 +1,224 @@
+# src/parking_system/database/migrations.py
+"""
+Versioned schema migrations
+
+Each migration is a (version, name, statements) step. apply_migrations()
+runs the steps newer than the version recorded in `schema_version`, in
+order, and records each one. Statements must be idempotent
+(IF NOT EXISTS ...) so that databases created before versioning existed
+upgrade cleanly.
+
+To change the schema, append a step with the next version number; never
+edit a step that has shipped.
+"""
+
+from typing import List, Tuple
+
+Migration = Tuple[int, str, List[str]]
+
+MIGRATIONS: List[Migration] = [
+    (1, "initial schema", [
+        """
+        CREATE TABLE IF NOT EXISTS slots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            slot_type TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            is_occupied INTEGER NOT NULL DEFAULT 0,
+            vehicle_plate TEXT UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vehicles (
+            license_plate TEXT PRIMARY KEY,
+            vehicle_type TEXT NOT NULL,
+            checked_in INTEGER NOT NULL DEFAULT 0,
+            slot_id INTEGER,
+            FOREIGN KEY(slot_id) REFERENCES slots(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vehicle_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            license_plate TEXT NOT NULL,
+            slot_id INTEGER,
+            checkin_time TEXT,
+            checkout_time TEXT,
+            amount REAL DEFAULT 0,
+            FOREIGN KEY(license_plate) REFERENCES vehicles(license_plate),
+            FOREIGN KEY(slot_id) REFERENCES slots(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL CHECK(role IN ('Admin','Staff','User'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp INTEGER NOT NULL,
+            user TEXT NOT NULL,
+            role TEXT NOT NULL,
+            action TEXT NOT NULL,
+            details TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            license_plate TEXT NOT NULL,
+            amount REAL NOT NULL,
+            payment_method TEXT,
+            timestamp TEXT,
+            FOREIGN KEY(license_plate) REFERENCES vehicles(license_plate)
+        )
+        """,
+    ]),
+    (2, "hot-path indexes", [
+        # Free slots by type and level (only free rows are indexed)
+        """
+        CREATE INDEX IF NOT EXISTS idx_slots_free
+        ON slots(slot_type, level, id) WHERE is_occupied = 0
+        """,
+        # Open stay of a vehicle, updated at checkout
+        """
+        CREATE INDEX IF NOT EXISTS idx_vehicle_logs_open
+        ON vehicle_logs(license_plate) WHERE checkout_time IS NULL
+        """,
+        # Check-in time ranges (analytics)
+        """
+        CREATE INDEX IF NOT EXISTS idx_vehicle_logs_checkin
+        ON vehicle_logs(checkin_time)
+        """,
+    ]),
+    (3, "state engine checkpoint", [
+        # Last journal record flushed by the in-memory engine (database/db_utils.py)
+        """
+        CREATE TABLE IF NOT EXISTS engine_checkpoint (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            seq INTEGER NOT NULL
+        )
+        """,
+    ]),
+    (4, "list filter indexes", [
+        # Filtered, keyset-paginated listings (slot_manager.iter_slots,
+        # vehicle_manager.iter_vehicles); both columns never change
+        """
+        CREATE INDEX IF NOT EXISTS idx_slots_level
+        ON slots(level, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_vehicles_type
+        ON vehicles(vehicle_type, license_plate)
+        """,
+    ]),
+    (5, "idempotency keys", [
+        # Responses of POSTs sent with an Idempotency-Key (core/idempotency.py)
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            key TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            status INTEGER NOT NULL,
+            content_type TEXT,
+            body BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+        # Expiry sweep
+        """
+        CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created
+        ON idempotency_keys(created_at)
+        """,
+    ]),
+    (6, "slot bucket counts", [
+        # Totals and free counts per (slot_type, level), read from the
+        # index alone and without a sort (availability.table_counts)
+        """
+        CREATE INDEX IF NOT EXISTS idx_slots_bucket
+        ON slots(level, slot_type, is_occupied)
+        """,
+    ]),
+    (7, "change counters", [
+        # Rows written per table, by any connection: tells a process which
+        # of its cached tables another process changed (core/read_cache.py)
+        """
+        CREATE TABLE IF NOT EXISTS change_counters (
+            name TEXT PRIMARY KEY,
+            counter INTEGER NOT NULL
+        )
+        """,
+        """
+        INSERT OR IGNORE INTO change_counters (name, counter) VALUES ('slots', 0), ('vehicles', 0)
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS slots_changed_insert AFTER INSERT ON slots
+        BEGIN UPDATE change_counters SET counter = counter + 1 WHERE name = 'slots'; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS slots_changed_update AFTER UPDATE ON slots
+        BEGIN UPDATE change_counters SET counter = counter + 1 WHERE name = 'slots'; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS slots_changed_delete AFTER DELETE ON slots
+        BEGIN UPDATE change_counters SET counter = counter + 1 WHERE name = 'slots'; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS vehicles_changed_insert AFTER INSERT ON vehicles
+        BEGIN UPDATE change_counters SET counter = counter + 1 WHERE name = 'vehicles'; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS vehicles_changed_update AFTER UPDATE ON vehicles
+        BEGIN UPDATE change_counters SET counter = counter + 1 WHERE name = 'vehicles'; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS vehicles_changed_delete AFTER DELETE ON vehicles
+        BEGIN UPDATE change_counters SET counter = counter + 1 WHERE name = 'vehicles'; END
+        """,
+    ]),
+    (8, "failed payment captures", [
+        # Authorizations of committed checkouts whose capture failed, kept
+        # until vehicle_manager.retry_failed_captures() charges them
+        """
+        CREATE TABLE IF NOT EXISTS failed_captures (
+            idempotency_key TEXT PRIMARY KEY,
+            license_plate TEXT NOT NULL,
+            authorization TEXT NOT NULL,
+            error TEXT,
+            failed_at REAL NOT NULL
+        )
+        """,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    """Schema version of the database behind `conn` (0 if unversioned)."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def apply_migrations(conn) -> List[int]:
+    """
+    Bring the schema up to date inside the caller's transaction.
+    Returns the versions that were applied.
+    """
+    version = current_version(conn)
+    applied = []
+    for step_version, name, statements in MIGRATIONS:
+        if step_version <= version:
+            continue
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (step_version, name))
+        applied.append(step_version)
+    return applied
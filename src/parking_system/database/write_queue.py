@@ -0,0 +1,192 @@
+# src/parking_system/database/write_queue.py
+"""
+Single-writer command queue
+
+SQLite allows one writer at a time; when every request thread writes
+through get_conn, they queue on the database lock, sleep in busy retries
+and occasionally fail with "database is locked". Instead, writes are
+submitted here and executed by one writer thread, so there is never more
+than one writer.
+
+The writer drains whatever has queued up (up to `max_batch` commands) and
+group-commits it: transaction bodies (body(cur, tx, *args), see
+db.run_in_transaction) run back to back in one BEGIN IMMEDIATE ...
+COMMIT, each inside its own SAVEPOINT, so a failing command is rolled
+back alone while the others still commit. One commit (one fsync) then
+covers the whole group. Commit hooks run after the group commits.
+
+    future = write_queue.submit_tx(slot_manager._allocate_slot_tx, plate)
+    slot = future.result()
+
+Plain callables that manage their own transaction can be submitted too
+(`submit`); they run alone, in queue order. Reads do not go through the
+queue: they keep using pooled connections, which WAL lets run alongside
+the writer.
+"""
+
+import atexit
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+from parking_system.config import get_config
+from parking_system.database import db
+
+
+class _Command:
+    __slots__ = ("func", "args", "kwargs", "future", "grouped")
+
+    def __init__(self, func, args, kwargs, grouped):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.grouped = grouped
+
+
+class WriteQueue:
+    def __init__(self, max_batch: int = 64, queue_size: int = 10000, retries: int = 6):
+        self.max_batch = max_batch
+        self.retries = retries
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.commands = 0
+        self.commits = 0
+        self.largest_group = 0
+
+    @classmethod
+    def from_config(cls) -> "WriteQueue":
+        settings = (get_config().get("database") or {}).get("write_queue") or {}
+        return cls(
+            max_batch=int(settings.get("max_batch", 64)),
+            queue_size=int(settings.get("queue_size", 10000)),
+        )
+
+    def start(self) -> "WriteQueue":
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Execute everything already queued, then stop the writer."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def submit_tx(self, body: Callable, *args, **kwargs) -> Future:
+        """Queue a transaction body for group commit."""
+        return self._submit(_Command(body, args, kwargs, grouped=True))
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Queue a self-contained write operation; it runs on its own."""
+        return self._submit(_Command(func, args, kwargs, grouped=False))
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "commands": self.commands,
+            "commits": self.commits,
+            "largest_group": self.largest_group,
+        }
+
+    def _submit(self, command: _Command) -> Future:
+        if self._thread is None:
+            self.start()
+        self._queue.put(command)
+        return command.future
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            command = self._queue.get()
+            if command is None:
+                break
+            batch = [command]
+            while len(batch) < self.max_batch:
+                try:
+                    command = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if command is None:
+                    stopping = True
+                    break
+                batch.append(command)
+            self._execute(batch)
+
+    def _execute(self, batch: List[_Command]) -> None:
+        group = []
+        for command in batch:
+            if command.grouped:
+                group.append(command)
+                continue
+            if group:
+                self._commit_group(group)
+                group = []
+            self._run_alone(command)
+        if group:
+            self._commit_group(group)
+
+    def _run_alone(self, command: _Command) -> None:
+        self.commands += 1
+        try:
+            result = command.func(*command.args, **command.kwargs)
+        except BaseException as e:
+            command.future.set_exception(e)
+        else:
+            command.future.set_result(result)
+
+    def _commit_group(self, group: List[_Command]) -> None:
+        for attempt in range(self.retries):
+            outcomes = []
+            try:
+                with db.get_conn(immediate=True) as conn:
+                    cur = conn.cursor()
+                    for command in group:
+                        tx = db.TxContext()
+                        cur.execute("SAVEPOINT command")
+                        try:
+                            result = command.func(cur, tx, *command.args, **command.kwargs)
+                        except Exception as e:
+                            cur.execute("ROLLBACK TO command")
+                            cur.execute("RELEASE command")
+                            tx.rolled_back()
+                            outcomes.append((command, tx, None, e))
+                        else:
+                            cur.execute("RELEASE command")
+                            outcomes.append((command, tx, result, None))
+                break
+            except Exception as e:
+                # The whole group rolled back: undo what the bodies did in memory
+                for _, tx, _, error in outcomes:
+                    if error is None:
+                        tx.rolled_back()
+                if db.is_busy_error(e) and attempt < self.retries - 1:
+                    time.sleep(0.002 * (2 ** attempt) * random.uniform(0.5, 1.5))
+                    continue
+                self.commands += len(group)
+                for command in group:
+                    command.future.set_exception(e)
+                return
+
+        self.commands += len(group)
+        self.commits += 1
+        self.largest_group = max(self.largest_group, len(group))
+        for command, tx, result, error in outcomes:
+            if error is not None:
+                command.future.set_exception(error)
+            else:
+                tx.committed()
+                command.future.set_result(result)
+
+
+# Process-wide writer; the thread starts on first use
+write_queue = WriteQueue.from_config()
+atexit.register(write_queue.stop)
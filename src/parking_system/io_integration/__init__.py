@@ -1,4 +1,17 @@
 # Expose all IoT modules for Phase 4
-from .sensor_reader import update_slots_from_sensors
-from .camera_plate_recognition import simulate_camera_checkins
-from .mqtt_publisher import publish_loop
+#
+# Resolved on first access: importing one IoT module (e.g. sensor_reader)
+# does not pull in the others, nor paho through mqtt_publisher.
+import importlib
+
+_EXPORTS = {
+    "update_slots_from_sensors": "sensor_reader",
+    "simulate_camera_checkins": "camera_plate_recognition",
+    "publish_loop": "mqtt_publisher",
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
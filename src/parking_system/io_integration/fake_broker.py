@@ -0,0 +1,97 @@
+# src/parking_system/io_integration/fake_broker.py
+"""
+In-process stand-in for an MQTT broker, for tests and simulations
+
+FakeBroker records every message published to it and keeps retained
+ones per topic, like a broker would; FakeClient implements the part of
+paho.mqtt.client.Client that mqtt_publisher uses. No network and no
+paho needed:
+
+    broker = FakeBroker()
+    publisher = MqttPublisher(client_factory=broker.client).start()
+    ...
+    broker.retained["parking/slots/level/1"]
+"""
+
+import json
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+
+class Message(NamedTuple):
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+
+    def json(self):
+        return json.loads(self.payload)
+
+
+class FakeBroker:
+    def __init__(self):
+        self.messages: List[Message] = []
+        self.retained: Dict[str, Message] = {}
+        self.clients: List["FakeClient"] = []
+        self._lock = threading.Lock()
+
+    def client(self) -> "FakeClient":
+        client = FakeClient(self)
+        self.clients.append(client)
+        return client
+
+    def receive(self, message: Message) -> None:
+        with self._lock:
+            self.messages.append(message)
+            if message.retain:
+                self.retained[message.topic] = message
+
+    def drop_connections(self) -> None:
+        """Disconnect every client, as a broker restart would; they reconnect."""
+        for client in list(self.clients):
+            client.reconnect()
+
+    def topics(self, since: int = 0) -> List[str]:
+        with self._lock:
+            return [m.topic for m in self.messages[since:]]
+
+
+class FakeClient:
+    def __init__(self, broker: FakeBroker):
+        self.broker = broker
+        self.connected = False
+        self.on_connect = None
+        self.on_disconnect = None
+        self.host: Optional[str] = None
+
+    def connect_async(self, host: str, port: int = 1883, keepalive: int = 60) -> None:
+        self.host = host
+
+    def loop_start(self) -> None:
+        # paho connects on its network thread once the loop runs
+        self._connected()
+
+    def loop_stop(self) -> None:
+        pass
+
+    def reconnect(self) -> None:
+        self.disconnect()
+        self._connected()
+
+    def disconnect(self) -> None:
+        if self.connected:
+            self.connected = False
+            if self.on_disconnect is not None:
+                self.on_disconnect(self, None, 0)
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False):
+        if not self.connected:
+            return None
+        if isinstance(payload, str):
+            payload = payload.encode()
+        self.broker.receive(Message(topic, payload or b"", qos, retain))
+
+    def _connected(self) -> None:
+        self.connected = True
+        if self.on_connect is not None:
+            self.on_connect(self, None, {}, 0)
@@ -1,51 +1,202 @@
-import time
+# src/parking_system/io_integration/mqtt_publisher.py
+"""
+Slot occupancy over MQTT, driven by changes
+
+Every committed slot write (slot_manager, including the sensor path
+through set_slot_occupancy) publishes its slot ids to the change feed
+(core/slot_events.py). The publisher thread sleeps until the feed moves,
+waits `window` seconds so a burst of changes goes out together, loads
+the changed rows with one query and sends one message per level:
+
+    parking/slots/level/<n>           retained snapshot of the level,
+                                      sent on (re)connect
+    parking/slots/level/<n>/changes   the level's slots changed since
+
+Payloads are {"version": v, "slots": [{"id", "slot_type", "level",
+"is_occupied"}, ...]}; versions increase, so a subscriber applies the
+changes newer than the snapshot it got from the broker. Nothing is sent
+while nothing changes. If the feed lost track of what changed (e.g. the
+index was reloaded), the snapshots are sent again instead.
+
+paho runs its network loop on its own thread (loop_start) and publish()
+only queues, so neither slot writes nor the publisher wait for the
+broker; paho is imported when the publisher starts. Anything with the
+same client interface can be used instead (io_integration/fake_broker.py).
+"""
+
 import json
-import paho.mqtt.client as mqtt
-from parking_system.core import slot_manager
+import threading
+from collections import defaultdict
+from typing import Callable, Optional
 
-# MQTT configuration
-MQTT_BROKER = "localhost"
-MQTT_PORT = 1883
-MQTT_TOPIC = "parking/slots"
+from parking_system.config import get_config
+from parking_system.core import slot_events, slot_manager
 
-# MQTT client instance
-client = mqtt.Client()
+# Fields of a slot sent to subscribers
+FIELDS = ("id", "slot_type", "level", "is_occupied")
 
-def connect_mqtt():
-    """
-    Connect to the MQTT broker safely.
-    """
-    try:
-        client.connect(MQTT_BROKER, MQTT_PORT)
-        client.loop_start()
-        print(f"[MQTT] Connected to broker at {MQTT_BROKER}:{MQTT_PORT}")
-    except Exception as e:
-        print(f"[MQTT] Connection failed: {e}")
-
-def publish_slot_status(slot_id: int):
-    """
-    Publish the current slot occupancy via MQTT.
-    """
-    slot = slot_manager.get_slot_by_id(slot_id)
-    if slot:
-        payload = json.dumps(slot)
+
+def _paho_client():
+    import paho.mqtt.client as mqtt
+
+    if hasattr(mqtt, "CallbackAPIVersion"):
+        # paho-mqtt 2.x asks which callback signatures we use: the 1.x ones
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
+    return mqtt.Client()
+
+
+class MqttPublisher:
+    def __init__(
+        self,
+        client_factory: Callable = _paho_client,
+        broker: str = "localhost",
+        port: int = 1883,
+        topic: str = "parking/slots",
+        window: float = 0.2,
+        feed: Optional[slot_events.ChangeFeed] = None,
+        load_rows: Callable = slot_manager.get_slots_by_id,
+        load_all: Callable = slot_manager.list_slots,
+    ):
+        self.client_factory = client_factory
+        self.broker = broker
+        self.port = port
+        self.topic = topic
+        self.window = window
+        self.feed = feed or slot_events.feed
+        self.load_rows = load_rows      # (ids) -> [row]
+        self.load_all = load_all        # () -> [row]
+        self.client = None
+        self.connected = False
+        self.version = 0
+        self.messages = 0
+        self.snapshots = 0
+        self.batches = 0
+        self.loads = 0
+        self._snapshot_due = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls) -> "MqttPublisher":
+        settings = get_config().get("mqtt") or {}
+        return cls(
+            broker=settings.get("broker", "localhost"),
+            port=int(settings.get("port", 1883)),
+            topic=settings.get("topic", "parking/slots"),
+            window=float(settings.get("window_ms", 200)) / 1000,
+        )
+
+    def start(self) -> "MqttPublisher":
+        if self._thread is not None:
+            return self
         try:
-            client.publish(MQTT_TOPIC, payload)
-            print(f"[MQTT] Published slot {slot_id} status")
+            client = self.client_factory()
+            client.on_connect = self._on_connect
+            client.on_disconnect = self._on_disconnect
+            self.client = client
+            self.version = self.feed.version
+            self.feed.add_listener(self._wake.set)
+            client.connect_async(self.broker, self.port)
+            client.loop_start()
         except Exception as e:
-            print(f"[MQTT] Publish failed for slot {slot_id}: {e}")
+            self.feed.remove_listener(self._wake.set)
+            print(f"[MQTT] Connection failed: {e}")
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="mqtt-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self.feed.remove_listener(self._wake.set)
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self.client.loop_stop()
+        self.client.disconnect()
+
+    def join(self) -> None:
+        """Block until the publisher is stopped."""
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.connected,
+            "messages": self.messages,
+            "snapshots": self.snapshots,
+            "batches": self.batches,
+            "loads": self.loads,
+        }
+
+    def publish_pending(self) -> None:
+        """Send what changed since the last call (or the snapshots, when due)."""
+        version, changed = self.feed.changes_since(self.version)
+        if not self.connected:
+            # The snapshot sent on connect covers these
+            self.version = version
+            return
+        if self._snapshot_due or changed is None:
+            self._snapshot_due = False
+            self.loads += 1
+            self._publish_levels(version, self.load_all(), retain=True)
+            self.snapshots += 1
+        elif changed:
+            self.loads += 1
+            rows = [row for row in self.load_rows(sorted(changed)) if row is not None]
+            self._publish_levels(version, rows, retain=False)
+            self.batches += 1
+        self.version = version
+
+    def _publish_levels(self, version: int, rows: list, retain: bool) -> None:
+        levels = defaultdict(list)
+        for row in rows:
+            levels[row["level"]].append({field: row[field] for field in FIELDS})
+        suffix = "" if retain else "/changes"
+        for level, slots in sorted(levels.items()):
+            payload = json.dumps({"version": version, "slots": slots})
+            self.client.publish(f"{self.topic}/level/{level}{suffix}", payload, qos=1, retain=retain)
+            self.messages += 1
+
+    def _on_connect(self, client, userdata, flags, rc, *args) -> None:
+        # Called on paho's network thread: only hand the snapshot to ours
+        if rc != 0:
+            print(f"[MQTT] Connection refused: {rc}")
+            return
+        print(f"[MQTT] Connected to broker at {self.broker}:{self.port}")
+        self.connected = True
+        self._snapshot_due = True
+        self._wake.set()
+
+    def _on_disconnect(self, client, userdata, *args) -> None:
+        self.connected = False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            # Let the burst that woke us finish: it goes out as one batch
+            if self._stop.wait(self.window):
+                return
+            self._wake.clear()
+            try:
+                self.publish_pending()
+            except Exception as e:
+                print(f"[MQTT] Publish failed: {e}")
+
+
+# Process-wide publisher; nothing runs (and paho is not imported) until start()
+publisher = MqttPublisher.from_config()
+
 
 def publish_loop():
     """
-    Continuously publish all slots every 2 seconds.
-    Safe against broker connection issues.
+    Publish slot changes until the publisher is stopped (thread target of
+    the demo pipelines).
     """
-    connect_mqtt()
-    while True:
-        try:
-            slots = slot_manager.list_slots()
-            for s in slots:
-                publish_slot_status(s["id"])
-        except Exception as e:
-            print(f"[MQTT] Loop error: {e}")
-        time.sleep(2)
+    publisher.start()
+    publisher.join()
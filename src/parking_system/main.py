@@ -1,26 +1,147 @@
-from fastapi import FastAPI
-from parking_system.database.db import init_db
+"""
+API entry point
 
-from parking_system.api.slot_routes import router as slot_router
-from parking_system.api.vehicle_routes import router as vehicle_router
+    uvicorn parking_system.main:create_app --factory
+    uvicorn parking_system.main:app        (built by create_app on first access)
+    python -m parking_system.main --cli
 
-# Initialize DB once at startup
-init_db()
+Importing this module does no work. create_app() builds the app, and
+the database, free-slot index and background threads are set up by its
+startup hook (start_services) rather than at import; FastAPI and the
+routers are only imported by create_app, so the CLI does not load them.
+"""
 
-# Create FastAPI app
-app = FastAPI(
-    title="Parking Allocation System",
-    version="0.1.0"
+import sys
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from parking_system.config import get_config, set_config
+
+# Modules that build process-wide components from the configuration when
+# imported (or, for slot_manager, the arrival batcher on first use):
+# these keep the configuration that was active then
+CONFIGURED_MODULES = (
+    "parking_system.metrics",
+    "parking_system.core.read_cache",
+    "parking_system.core.slot_events",
+    "parking_system.core.availability",
+    "parking_system.core.idempotency",
+    "parking_system.core.reservations",
+    "parking_system.core.slot_manager",
+    "parking_system.database.write_queue",
+    "parking_system.database.async_db",
+    "parking_system.api.admission",
+    "parking_system.notifications.dispatcher",
+    "parking_system.security.audit",
+    "parking_system.io_integration.mqtt_publisher",
 )
 
-# Include routers (routers themselves have prefixes)
-app.include_router(slot_router)
-app.include_router(vehicle_router)
 
-# Optional health check
-@app.get("/health")
-def health_check():
-    return {"status": "ok"}
+def start_services() -> None:
+    """Schema and migrations, free-slot index, background threads."""
+    from parking_system.database.db import init_db
+    from parking_system.core import slot_manager, reservations, availability
+
+    init_db()
+    slot_manager.load_free_slot_index()
+    reservations.book.start()
+    availability.reconciler.start()
+
+
+def stop_services() -> None:
+    """Stop the background threads, writing out what is queued first."""
+    from parking_system.core import reservations, availability, slot_manager
+    from parking_system.database import db, db_utils
+    from parking_system.database.async_db import async_db
+    from parking_system.notifications import notification_dispatcher
+    from parking_system.security.audit import audit_sink
+
+    reservations.book.stop()
+    availability.reconciler.stop()
+    slot_manager.stop_arrival_batcher()
+    async_db.shutdown()
+    async_db.writes.stop()
+    notification_dispatcher.stop()
+    audit_sink.close()
+    db_utils.shutdown_engine()
+    db.close_pools()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start_services()
+    try:
+        yield
+    finally:
+        stop_services()
+
+
+def create_app(config: Optional[dict] = None):
+    """
+    Build the API. `config` (see config.load_config) becomes the
+    process-wide configuration first; components read it when first
+    imported, so pass it before anything has imported them. Raises
+    RuntimeError if some were already built from another configuration,
+    rather than running with a mix of both.
+    """
+    if config is not None:
+        built = [name for name in CONFIGURED_MODULES if name in sys.modules]
+        if built and config != get_config():
+            raise RuntimeError(
+                "create_app(config) called after these modules were set up from another "
+                f"configuration: {', '.join(built)}; pass the configuration before importing them"
+            )
+        set_config(config)
+
+    from fastapi import FastAPI
+    from parking_system.api.slot_routes import router as slot_router
+    from parking_system.api.vehicle_routes import router as vehicle_router
+    from parking_system.api.reservation_routes import router as reservation_router
+    from parking_system.api.gate_routes import router as gate_router
+    from parking_system.api.availability_routes import router as availability_router
+    from parking_system.api.admission_routes import router as admission_router
+    from parking_system.api.metrics_routes import router as metrics_router
+    from parking_system.api.metrics import MetricsMiddleware
+    from parking_system.api.admission import AdmissionMiddleware
+    from parking_system.api.idempotency import IdempotencyMiddleware
+
+    app = FastAPI(
+        title="Parking Allocation System",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
+
+    # Include routers (routers themselves have prefixes)
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    app.include_router(reservation_router)
+    app.include_router(gate_router)
+    app.include_router(availability_router)
+    app.include_router(admission_router)
+    app.include_router(metrics_router)
+
+    # Idempotency-Key on check-in, check-out and allocation POSTs
+    app.add_middleware(IdempotencyMiddleware)
+    # Added after these, so it runs first: rejected requests do no other work
+    app.add_middleware(AdmissionMiddleware)
+    # Outermost: request latency includes everything above
+    app.add_middleware(MetricsMiddleware)
+
+    # Optional health check
+    @app.get("/health")
+    def health_check():
+        return {"status": "ok"}
+
+    return app
+
+
+def __getattr__(name):
+    # `parking_system.main:app`, built with the process configuration on first access
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # CLI entry point
 if __name__ == "__main__":
@@ -50,4 +171,8 @@ if __name__ == "__main__":
             else: print("Invalid choice")
 
     if "--cli" in sys.argv:
-        run_cli()
+        start_services()
+        try:
+            run_cli()
+        finally:
+            stop_services()
@@ -0,0 +1,378 @@
+# src/parking_system/metrics.py
+"""
+In-process metrics, exported in Prometheus text format at /metrics
+
+No client library or agent is needed: counters, gauges and histograms
+are kept in this process and rendered on each scrape.
+
+    Counter    monotonically increasing value
+    Gauge      value set by the code (or reported by a scrape-time collector)
+    Histogram  observations counted into fixed buckets, with sum and count
+
+Metrics with labels hand out one child per label combination; hot paths
+look the child up once (e.g. at import) or call labels() with the same
+values each time (a dict hit); inc() costs a lock and an addition,
+observe() a deque append (bucketing happens in batches, see
+_HistogramValue). Everything is a no-op while
+`enabled` is false (metrics.enabled in config).
+
+The metrics of the app itself are defined at the bottom of this module;
+api/metrics_routes.py adds scrape-time collectors and serves /metrics.
+"""
+
+import contextvars
+import functools
+import inspect
+import math
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from parking_system.config import get_config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from sub-millisecond DB work to slow external calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Observations a histogram child buffers before counting them into buckets
+FOLD_EVERY = 1024
+
+enabled = bool((get_config().get("metrics") or {}).get("enabled", True))
+
+# (metric name suffix, labels, value) rows of one metric
+Samples = List[Tuple[str, Dict[str, str], float]]
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lookup: Dict[tuple, object] = {}      # label values as passed -> child
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The child for these label values (created on first use)."""
+        child = self._lookup.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+                self._lookup[values] = child
+        return child
+
+    def samples(self) -> Samples:
+        rows = []
+        for values, child in list(self._children.items()):
+            rows.extend(child._samples(dict(zip(self.labelnames, values))))
+        return rows
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    # Unlabelled metrics are their own single child
+    def _default(self):
+        return self.labels()
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        if enabled:
+            with self._lock:
+                self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def _samples(self, labels):
+        return [("", labels, self.value)]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default().dec(amount)
+
+
+class _HistogramValue:
+    """
+    observe() only appends the value to a deque (thread-safe without a
+    lock); the values are counted into the buckets in batches, when
+    FOLD_EVERY have piled up or on scrape, under the lock.
+    """
+
+    __slots__ = ("upper_bounds", "counts", "sum", "_pending", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)      # last one: +Inf
+        self.sum = 0.0
+        self._pending = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        if enabled:
+            pending = self._pending
+            pending.append(value)
+            if len(pending) >= FOLD_EVERY:
+                self._fold()
+
+    def time(self) -> "_Timer":
+        """Context manager observing the seconds spent in its block."""
+        return _Timer(self)
+
+    def _fold(self) -> None:
+        pending, counts, upper_bounds = self._pending, self.counts, self.upper_bounds
+        with self._lock:
+            # Only folds pop, under the lock: a non-empty deque stays so until popleft()
+            total = 0.0
+            while pending:
+                value = pending.popleft()
+                counts[bisect_left(upper_bounds, value)] += 1
+                total += value
+            self.sum += total
+
+    def _samples(self, labels):
+        self._fold()
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        rows, cumulative = [], 0
+        for bound, count in zip(self.upper_bounds + (math.inf,), counts):
+            cumulative += count
+            rows.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+        rows.append(("_sum", labels, total))
+        rows.append(("_count", labels, cumulative))
+        return rows
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: _HistogramValue):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        return self._default().time()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Tuple[_Metric, Samples]]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[_Metric, Samples]]]) -> None:
+        """
+        Scrape-time source of values kept elsewhere (occupancy, queue
+        depths): collector() yields (metric, samples); the metric only
+        provides the name, help and type.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (0.0.4)."""
+        families = [(metric, metric.samples()) for metric in list(self._metrics)]
+        for collector in list(self._collectors):
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print(f"[METRICS] Collector failed: {e}")
+        lines = []
+        for metric, samples in families:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in samples:
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+# Process-wide registry
+registry = Registry()
+
+
+# --------------------------------------------------
+# Metrics of the app
+# --------------------------------------------------
+
+http_request_seconds = registry.histogram(
+    "parking_http_request_duration_seconds", "API request latency by route", ("method", "route", "status"),
+)
+db_connection_seconds = registry.histogram(
+    "parking_db_connection_seconds", "Time a pooled SQLite connection was held (one transaction)", ("mode",),
+)
+external_call_seconds = registry.histogram(
+    "parking_external_call_seconds", "Duration of calls to payment and notification providers", ("service", "outcome"),
+)
+operations = registry.counter(
+    "parking_operations_total", "Allocations, check-ins, check-outs and gate entries by outcome", ("operation", "outcome"),
+)
+
+# service -> (ok, failed) children of external_call_seconds
+_external_children: Dict[str, tuple] = {}
+
+_tracking = contextvars.ContextVar("metrics_tracking", default=False)
+
+
+def track(operation: str):
+    """
+    Decorator counting calls of an operation in parking_operations_total
+    by outcome (ok / failed). Works on sync and async functions; a tracked
+    operation called from another one (e.g. the sync variant used by the
+    async one) is counted once, as the outer operation.
+    """
+    ok = operations.labels(operation, "ok")
+    failed = operations.labels(operation, "failed")
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not enabled or _tracking.get():
+                    return await func(*args, **kwargs)
+                token = _tracking.set(True)
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    failed.inc()
+                    raise
+                finally:
+                    _tracking.reset(token)
+                ok.inc()
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not enabled or _tracking.get():
+                    return func(*args, **kwargs)
+                token = _tracking.set(True)
+                try:
+                    result = func(*args, **kwargs)
+                except Exception:
+                    failed.inc()
+                    raise
+                finally:
+                    _tracking.reset(token)
+                ok.inc()
+                return result
+        return wrapper
+
+    return decorate
+
+
+def timed_call(service: str, func: Callable, *args, **kwargs):
+    """Call an external provider, observing its duration and outcome."""
+    if not enabled:
+        return func(*args, **kwargs)
+    children = _external_children.get(service)
+    if children is None:
+        children = _external_children[service] = (
+            external_call_seconds.labels(service, "ok"), external_call_seconds.labels(service, "failed"),
+        )
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except Exception:
+        children[1].observe(time.perf_counter() - start)
+        raise
+    children[0].observe(time.perf_counter() - start)
+    return result
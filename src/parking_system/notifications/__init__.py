@@ -1,9 +1,21 @@
 from .email_service import send_email_notification
 from .sms_service import send_sms_notification
 from .push_service import send_push_notification
+from .dispatcher import (
+    NotificationDispatcher,
+    notification_dispatcher,
+    notify_email,
+    notify_sms,
+    notify_push,
+)
 
 __all__ = [
     "send_email_notification",
     "send_sms_notification",
     "send_push_notification",
+    "NotificationDispatcher",
+    "notification_dispatcher",
+    "notify_email",
+    "notify_sms",
+    "notify_push",
 ]
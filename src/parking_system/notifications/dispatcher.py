@@ -0,0 +1,162 @@
+# src/parking_system/notifications/dispatcher.py
+"""
+Asynchronous notification dispatcher
+
+Email, SMS and push sends are queued and delivered by per-channel worker
+threads, so a slow provider never holds a DB transaction (or the caller)
+open. Each channel has a bounded queue; when it is full the notification
+is dropped and counted instead of blocking the gate.
+
+Callers enqueue only after their transaction has committed.
+"""
+
+import atexit
+import queue
+import threading
+from typing import Callable, Dict, Optional
+
+from parking_system import metrics
+from parking_system.config import get_config
+from .email_service import send_email_notification
+from .sms_service import send_sms_notification
+from .push_service import send_push_notification
+
+DEFAULT_SENDERS = {
+    "email": send_email_notification,
+    "sms": send_sms_notification,
+    "push": send_push_notification,
+}
+
+
+class _Channel:
+    def __init__(self, name: str, sender: Callable, workers: int, queue_size: int):
+        self.name = name
+        self.sender = sender
+        self.workers = workers
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.threads = []
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+
+class NotificationDispatcher:
+    def __init__(self, senders: Optional[Dict[str, Callable]] = None,
+                 workers: Optional[Dict[str, int]] = None, queue_size: int = 1000):
+        senders = senders or DEFAULT_SENDERS
+        workers = workers or {}
+        self._channels = {
+            name: _Channel(name, sender, int(workers.get(name, 1)), queue_size)
+            for name, sender in senders.items()
+        }
+        self._lock = threading.Lock()
+        self._started = False
+
+    @classmethod
+    def from_config(cls) -> "NotificationDispatcher":
+        settings = get_config().get("notifications") or {}
+        return cls(workers=settings.get("workers"), queue_size=int(settings.get("queue_size", 1000)))
+
+    def start(self) -> "NotificationDispatcher":
+        with self._lock:
+            if self._started:
+                return self
+            for channel in self._channels.values():
+                for i in range(channel.workers):
+                    thread = threading.Thread(
+                        target=self._worker, args=(channel,), name=f"notify-{channel.name}-{i}", daemon=True
+                    )
+                    thread.start()
+                    channel.threads.append(thread)
+            self._started = True
+        return self
+
+    def notify(self, channel: str, *args) -> bool:
+        """
+        Queue a send on `channel`. Never blocks; returns False if the
+        notification was dropped because the channel queue is full.
+        """
+        if not self._started:
+            self.start()
+        ch = self._channels[channel]
+        try:
+            ch.queue.put_nowait(args)
+            return True
+        except queue.Full:
+            with self._lock:
+                ch.dropped += 1
+            return False
+
+    def flush(self) -> None:
+        """Block until every queued notification has been handled."""
+        for channel in self._channels.values():
+            channel.queue.join()
+
+    def stop(self, drain: bool = True) -> None:
+        """Stop the workers, delivering what is queued first if `drain`."""
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        for channel in self._channels.values():
+            if not drain:
+                self._discard_pending(channel)
+            for _ in channel.threads:
+                channel.queue.put(None)
+            for thread in channel.threads:
+                thread.join()
+            channel.threads = []
+
+    def stats(self) -> dict:
+        return {
+            name: {
+                "queued": ch.queue.qsize(),
+                "sent": ch.sent,
+                "failed": ch.failed,
+                "dropped": ch.dropped,
+            }
+            for name, ch in self._channels.items()
+        }
+
+    def _worker(self, channel: _Channel) -> None:
+        while True:
+            args = channel.queue.get()
+            try:
+                if args is None:
+                    return
+                metrics.timed_call(channel.name, channel.sender, *args)
+                with self._lock:
+                    channel.sent += 1
+            except Exception as e:
+                with self._lock:
+                    channel.failed += 1
+                print(f"[NOTIFY] {channel.name} send failed: {e}")
+            finally:
+                channel.queue.task_done()
+
+    def _discard_pending(self, channel: _Channel) -> None:
+        while True:
+            try:
+                channel.queue.get_nowait()
+            except queue.Empty:
+                return
+            channel.queue.task_done()
+            with self._lock:
+                channel.dropped += 1
+
+
+# Process-wide dispatcher; workers start on first use
+notification_dispatcher = NotificationDispatcher.from_config()
+atexit.register(notification_dispatcher.stop)
+
+
+def notify_email(to_email: str, subject: str, message: str) -> bool:
+    return notification_dispatcher.notify("email", to_email, subject, message)
+
+
+def notify_sms(phone: str, message: str) -> bool:
+    return notification_dispatcher.notify("sms", phone, message)
+
+
+def notify_push(username: str, message: str) -> bool:
+    return notification_dispatcher.notify("push", username, message)
@@ -1,9 +1,15 @@
 from .payment_gateway import (
+    PaymentGatewayError,
+    authorize_payment,
+    capture_payment,
     process_payment,
     validate_payment_credentials,
 )
 
 __all__ = [
+    "PaymentGatewayError",
+    "authorize_payment",
+    "capture_payment",
     "process_payment",
     "validate_payment_credentials",
 ]
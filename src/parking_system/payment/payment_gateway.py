@@ -1,4 +1,36 @@
 # src/parking_system/payment/payment_gateway.py
+"""
+Mock payment gateway
+
+Payments are taken in two steps, so that an operation that may be
+retried (e.g. a checkout group-committed by the write queue) never
+charges twice:
+
+    authorize_payment   validates the payment before the operation runs;
+                        nothing is charged, an uncaptured authorization
+                        simply lapses
+    capture_payment     charges it once the operation has committed;
+                        idempotent per authorization key, like a real
+                        gateway's idempotency keys
+
+process_payment does both at once. ValueError means the payment itself
+is invalid; PaymentGatewayError that the gateway could not be reached or
+failed, so the same payment may go through when retried.
+"""
+
+import threading
+import uuid
+from collections import OrderedDict
+
+# Idempotency keys of captured payments -> capture result (bounded)
+_CAPTURED_KEYS = 10000
+_captured: "OrderedDict[str, dict]" = OrderedDict()
+_captured_lock = threading.Lock()
+
+
+class PaymentGatewayError(Exception):
+    """The gateway could not take the payment right now (outage, timeout)."""
+
 
 def validate_payment_credentials(method: str) -> bool:
     """
@@ -9,9 +41,10 @@ def validate_payment_credentials(method: str) -> bool:
     return method in allowed_methods
 
 
-def process_payment(license_plate: str, amount: float, method: str = "mock"):
+def authorize_payment(license_plate: str, amount: float, method: str = "mock", idempotency_key: str = None) -> dict:
     """
-    Simulate payment processing.
+    Check that a payment can be taken; returns the authorization to
+    capture. Raises ValueError for an invalid method or amount.
     """
     if not validate_payment_credentials(method):
         raise ValueError(f"Invalid payment method: {method}")
@@ -19,10 +52,33 @@ def process_payment(license_plate: str, amount: float, method: str = "mock"):
     if amount < 0:
         raise ValueError("Payment amount cannot be negative")
 
-    # Mock success
     return {
         "license_plate": license_plate,
         "amount": amount,
         "method": method,
-        "status": "SUCCESS",
+        "idempotency_key": idempotency_key or uuid.uuid4().hex,
+        "status": "AUTHORIZED",
     }
+
+
+def capture_payment(authorization: dict) -> dict:
+    """
+    Charge an authorization. Capturing the same key again returns the
+    first result without charging a second time.
+    """
+    key = authorization["idempotency_key"]
+    with _captured_lock:
+        result = _captured.get(key)
+        if result is None:
+            # Mock success
+            result = _captured[key] = {**authorization, "status": "SUCCESS"}
+            while len(_captured) > _CAPTURED_KEYS:
+                _captured.popitem(last=False)
+        return result
+
+
+def process_payment(license_plate: str, amount: float, method: str = "mock"):
+    """
+    Simulate payment processing.
+    """
+    return capture_payment(authorize_payment(license_plate, amount, method))
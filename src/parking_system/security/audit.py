@@ -1,10 +1,131 @@
 """
 Audit logging module
 Tracks sensitive and security-critical actions
+
+Entries are persisted to the audit_logs table through an AuditSink:
+
+    - sync:    every entry is inserted in its own transaction before
+               log_action returns
+    - batched: entries are buffered in memory and written by a background
+               thread with one executemany per batch, when `batch_size`
+               entries are waiting or every `flush_interval` seconds;
+               the buffer is flushed on shutdown
+
+The mode is set by `audit.mode` in configs/*.yaml.
 """
 
+import atexit
+import json
+import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional, Tuple
+
+from parking_system.config import get_config
+from parking_system.database.db import get_conn
+from .auth import get_user_role
+
+AuditRow = Tuple[int, str, str, str, str]
+
+INSERT_SQL = "INSERT INTO audit_logs (timestamp, user, role, action, details) VALUES (?, ?, ?, ?, ?)"
+
+
+class AuditSink:
+    def __init__(self, mode: str = "batched", batch_size: int = 200,
+                 flush_interval: float = 1.0, max_buffer: int = 100_000):
+        if mode not in ("sync", "batched"):
+            raise ValueError(f"Invalid audit mode: {mode}")
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[AuditRow] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_config(cls) -> "AuditSink":
+        settings = get_config().get("audit") or {}
+        return cls(
+            mode=settings.get("mode", "batched"),
+            batch_size=int(settings.get("batch_size", 200)),
+            flush_interval=float(settings.get("flush_interval_seconds", 1.0)),
+            max_buffer=int(settings.get("max_buffer", 100_000)),
+        )
+
+    def write(self, row: AuditRow) -> None:
+        if self.mode == "sync":
+            with get_conn() as conn:
+                conn.execute(INSERT_SQL, row)
+            self.written += 1
+            return
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        if self._thread is None:
+            self._start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write everything buffered so far in one transaction."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                with get_conn() as conn:
+                    conn.executemany(INSERT_SQL, rows)
+            except Exception as e:
+                # Keep the entries for the next attempt (bounded by max_buffer)
+                with self._lock:
+                    keep = max(self.max_buffer - len(self._buffer), 0)
+                    self.dropped += max(len(rows) - keep, 0)
+                    self._buffer[:0] = rows[:keep]
+                print(f"[AUDIT] Flush failed: {e}")
+                return 0
+            self.written += len(rows)
+            return len(rows)
+
+    def close(self) -> None:
+        """Stop the flusher and write what is left."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+# Process-wide sink
+audit_sink = AuditSink.from_config()
+atexit.register(audit_sink.close)
 
 
 def log_action(
@@ -33,6 +154,13 @@ def log_action(
         "status": status,
     }
 
-    # For now: console log
-    # Later: DB / file / SIEM
     print(f"[AUDIT] {log_entry}")
+
+    user = user_id or "system"
+    audit_sink.write((
+        int(time.time()),
+        user,
+        get_user_role(user),
+        action,
+        json.dumps({"resource": resource, "status": status}),
+    ))
@@ -55,3 +55,13 @@ def check_user_role(username: str, role: str) -> bool:
     if not user:
         return False
     return role in user["roles"]
+
+
+def get_user_role(username: str) -> str:
+    """
+    Primary role of a user, as recorded in the audit trail.
+    """
+    user = _USERS.get(username)
+    if not user:
+        return "Unknown"
+    return sorted(user["roles"])[0]
@@ -0,0 +1,20 @@
+# tests/conftest.py
+import pytest
+
+from parking_system.database import db
+from parking_system.core import slot_manager
+from parking_system.security.audit import audit_sink
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    """Point the app at an empty SQLite file for the duration of a test."""
+    monkeypatch.setattr(db, "DB_FILE", tmp_path / "parking.db")
+    monkeypatch.setattr(slot_manager, "held_slots", {})
+    monkeypatch.setattr(slot_manager, "held_by_slot", set())
+    db.init_db()
+    slot_manager.load_free_slot_index()
+    yield db.DB_FILE
+    # Write buffered audit entries while the test DB is still active
+    audit_sink.flush()
+    db.close_pools()
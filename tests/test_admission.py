@@ -0,0 +1,74 @@
+# tests/test_admission.py
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.admission import AdmissionController, AdmissionMiddleware
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.config import load_config
+from parking_system.core import vehicle_manager
+
+
+def make_app(controller):
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    return app
+
+
+def test_token_bucket_per_gate(fresh_db):
+    controller = AdmissionController(rate_per_second=0.01, burst=3, clients={"gate-vip": {"rate_per_second": 100}})
+    client = TestClient(make_app(controller))
+
+    def get(gate):
+        return client.get("/api/slots/", headers={"X-Gate-Id": gate})
+
+    assert [get("camera-7").status_code for _ in range(4)] == [200, 200, 200, 429]
+    limited = get("camera-7")
+    assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+    # Other gates keep their own buckets
+    assert get("gate-1").status_code == 200
+    assert all(get("gate-vip").status_code == 200 for _ in range(20))
+    stats = controller.stats()
+    assert stats["rate_limited"] == 2 and stats["clients"] == 3
+
+
+def test_writes_beyond_the_cap_are_shed(fresh_db, monkeypatch):
+    controller = AdmissionController(max_concurrent_writes=2)
+    release = asyncio.Event()
+
+    async def stuck_register(license_plate, vehicle_type):
+        await release.wait()
+        return {"license_plate": license_plate}
+
+    monkeypatch.setattr(vehicle_manager, "register_vehicle_async", stuck_register)
+
+    async def run():
+        transport = httpx.ASGITransport(app=make_app(controller))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            writes = [
+                asyncio.ensure_future(client.post("/api/vehicles/", json={"license_plate": f"P{i}", "vehicle_type": "Car"}))
+                for i in range(2)
+            ]
+            while controller.writes_in_flight < 2:
+                await asyncio.sleep(0.001)
+            shed = await client.post("/api/vehicles/", json={"license_plate": "P9", "vehicle_type": "Car"})
+            read = await client.get("/api/slots/")
+            release.set()
+            return shed, read, await asyncio.gather(*writes)
+
+    shed, read, admitted = asyncio.run(run())
+    assert shed.status_code == 503 and shed.headers["Retry-After"] == "1"
+    assert read.status_code == 200
+    assert [r.status_code for r in admitted] == [200, 200]
+    assert controller.stats()["shed"] == 1 and controller.writes_in_flight == 0
+
+
+def test_limits_come_from_prod_config():
+    assert not load_config("dev")["admission"]["enabled"]
+    settings = load_config("prod")["admission"]
+    assert settings["enabled"] and settings["rate_per_second"] > 0 and settings["max_concurrent_writes"] > 0
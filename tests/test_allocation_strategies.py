@@ -0,0 +1,92 @@
+# tests/test_allocation_strategies.py
+import pytest
+
+from parking_system.core import allocation, slot_manager, vehicle_manager
+from parking_system.core.slot_index import FreeSlotIndex
+
+SETTINGS = {
+    "entrance_level": 2,
+    "slot_fit": {"car": ["compact", "large"], "truck": ["large"]},
+}
+
+LOT = [
+    (1, "large", 1, 0),
+    (2, "compact", 1, 0),
+    (3, "compact", 2, 0),
+    (4, "large", 2, 0),
+    (5, "large", 3, 0),
+    (6, "compact", 3, 0),
+]
+
+
+def make(name):
+    index = FreeSlotIndex()
+    index.load(LOT)
+    return allocation.STRATEGIES[name](SETTINGS), index
+
+
+def test_registry_contains_all_strategies():
+    assert {"first_free", "best_fit", "lowest_level", "spread_levels", "nearest_entrance"} <= set(allocation.STRATEGIES)
+    with pytest.raises(ValueError):
+        allocation.get_strategy("no_such_strategy")
+
+
+def test_first_free_ignores_type():
+    strategy, index = make("first_free")
+    assert strategy.select(index, "Car") == 1
+
+
+def test_best_fit_keeps_large_slots_for_trucks():
+    strategy, index = make("best_fit")
+    assert strategy.select(index, "Car") == 2
+    assert strategy.select(index, "Truck") == 1
+    assert strategy.select(index, "Car") == 3
+    assert strategy.select(index, "Car") == 6
+    # Compacts exhausted: cars overflow into large slots
+    assert strategy.select(index, "Car") == 4
+
+
+def test_truck_never_gets_compact():
+    strategy, index = make("best_fit")
+    for slot_id in (1, 4, 5):
+        index.discard(slot_id)
+    assert strategy.select(index, "Truck") is None
+
+
+def test_lowest_level_first():
+    strategy, index = make("lowest_level")
+    assert [strategy.select(index, "Car") for _ in range(3)] == [2, 1, 3]
+
+
+def test_spread_levels_picks_emptiest_level():
+    strategy, index = make("spread_levels")
+    index.discard(2)
+    index.discard(3)
+    # Level 3 has two free slots, levels 1 and 2 one each
+    assert strategy.select(index, "Car") == 6
+
+
+def test_nearest_entrance():
+    strategy, index = make("nearest_entrance")
+    assert strategy.select(index, "Car") == 3
+    assert strategy.select(index, "Car") == 4
+    assert strategy.select(index, "Truck") in (1, 5)
+
+
+def test_ordering_recomputed_when_layout_changes():
+    strategy, index = make("best_fit")
+    first = strategy.ordering(index, "Car")
+    assert strategy.ordering(index, "Car") is first
+    index.add_slot(7, "compact", 0)
+    assert ("compact", 0) == strategy.ordering(index, "Car")[0]
+
+
+def test_allocate_slot_uses_configured_strategy(fresh_db, monkeypatch):
+    monkeypatch.setattr(allocation, "get_config", lambda: {"allocation": {**SETTINGS, "strategy": "best_fit"}})
+    monkeypatch.setattr(allocation, "_instances", {})
+    large = slot_manager.create_slot("large", 1)
+    compact = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("TRUCK1", "Truck")
+    vehicle_manager.register_vehicle("CAR1", "Car")
+    assert slot_manager.allocate_slot("CAR1")["id"] == compact["id"]
+    assert slot_manager.allocate_slot("TRUCK1")["id"] == large["id"]
@@ -0,0 +1,105 @@
+# tests/test_async_db.py
+import asyncio
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database import db_utils
+from parking_system.database.async_db import AsyncDatabase
+from parking_system.database.db import get_conn
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_writes_run_on_one_thread_reads_in_parallel():
+    adb = AsyncDatabase(readers=2)
+    try:
+        writers = await asyncio.gather(*(adb.write(threading.get_ident) for _ in range(20)))
+        readers = await asyncio.gather(*(adb.read(threading.get_ident) for _ in range(20)))
+        assert len(set(writers)) == 1
+        assert set(writers).isdisjoint(readers)
+        assert threading.get_ident() not in writers
+    finally:
+        adb.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate():
+    adb = AsyncDatabase()
+
+    def fail():
+        raise ValueError("No available slots")
+
+    try:
+        with pytest.raises(ValueError, match="No available slots"):
+            await adb.write(fail)
+    finally:
+        adb.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_async_operations_match_sync(fresh_db):
+    slot = await slot_manager.create_slot_async("compact", 1)
+    await vehicle_manager.register_vehicle_async("ASYNC1", "Car")
+    allocated = await slot_manager.allocate_slot_async("ASYNC1")
+    assert allocated["id"] == slot["id"]
+    checked_in = await vehicle_manager.checkin_vehicle_async("ASYNC1")
+    assert checked_in["checked_in"] == 1
+    assert (await slot_manager.get_slot_by_id_async(slot["id"]))["vehicle_plate"] == "ASYNC1"
+    assert [v["license_plate"] for v in await vehicle_manager.list_vehicles_async()] == ["ASYNC1"]
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_writes_leave_the_event_loop(fresh_db, tmp_path, monkeypatch):
+    engine = db_utils.StateEngine(journal_dir=tmp_path / "journal", index=slot_manager.free_slot_index)
+    engine.recover()
+    monkeypatch.setattr(db_utils, "_engine", engine)
+    threads = []
+    record = engine._record
+    monkeypatch.setattr(engine, "_record", lambda *args: threads.append(threading.current_thread().name) or record(*args))
+    try:
+        slot = await slot_manager.create_slot_async("compact", 1)
+        await vehicle_manager.register_vehicle_async("MEM1", "Car")
+        await slot_manager.allocate_slot_async("MEM1")
+        await vehicle_manager.checkin_vehicle_async("MEM1")
+        await vehicle_manager.checkout_vehicle_async("MEM1", 2.0)
+        await vehicle_manager.gate_entry_async("MEM2", "Car")
+        await slot_manager.set_slot_occupancy_async(slot["id"], False)
+
+        # Every journaled write ran on the writer thread; reads stay inline
+        assert len(threads) == 9 and set(threads) == {"db-writer"}
+        assert (await slot_manager.get_slot_by_id_async(slot["id"]))["is_occupied"] == 0
+    finally:
+        engine.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_api_allocations(fresh_db):
+    for i in range(20):
+        slot_manager.create_slot("compact", i % 3 + 1)
+    plates = [f"API{i:03d}" for i in range(30)]
+    async with make_client() as client:
+        await asyncio.gather(*(
+            client.post("/api/vehicles/", json={"license_plate": p, "vehicle_type": "Car"}) for p in plates
+        ))
+        responses = await asyncio.gather(*(
+            client.post("/api/slots/allocate/", json={"license_plate": p}) for p in plates
+        ))
+        listed = await client.get("/api/slots/")
+
+    assert sorted(r.status_code for r in responses) == [200] * 20 + [400] * 10
+    assert len({r.json()["id"] for r in responses if r.status_code == 200}) == 20
+    assert sum(s["is_occupied"] for s in listed.json()) == 20
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM vehicles WHERE slot_id IS NOT NULL").fetchone()[0] == 20
@@ -0,0 +1,127 @@
+# tests/test_audit.py
+import json
+import time
+
+import pytest
+
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database.db import get_conn
+from parking_system.payment import payment_gateway
+from parking_system.security import audit
+from parking_system.security.audit import AuditSink
+
+
+def audit_rows():
+    with get_conn() as conn:
+        return conn.execute("SELECT user, role, action, details FROM audit_logs ORDER BY id").fetchall()
+
+
+def row(action="TEST"):
+    return (int(time.time()), "staff", "Staff", action, "{}")
+
+
+def test_sync_mode_writes_immediately(fresh_db):
+    sink = AuditSink(mode="sync")
+    sink.write(row())
+    assert len(audit_rows()) == 1
+
+
+def test_batched_mode_flushes_on_size(fresh_db):
+    sink = AuditSink(mode="batched", batch_size=3, flush_interval=60)
+    try:
+        for _ in range(3):
+            sink.write(row())
+        deadline = time.time() + 5
+        while sink.pending() and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(audit_rows()) == 3
+    finally:
+        sink.close()
+
+
+def test_batched_mode_flushes_on_interval(fresh_db):
+    sink = AuditSink(mode="batched", batch_size=1000, flush_interval=0.05)
+    try:
+        sink.write(row())
+        time.sleep(0.3)
+        assert len(audit_rows()) == 1
+    finally:
+        sink.close()
+
+
+def test_close_flushes_buffer(fresh_db):
+    sink = AuditSink(mode="batched", batch_size=1000, flush_interval=60)
+    for _ in range(10):
+        sink.write(row())
+    assert audit_rows() == []
+    sink.close()
+    assert len(audit_rows()) == 10
+    assert sink.written == 10
+
+
+def test_failed_flush_keeps_entries(tmp_path, monkeypatch):
+    from parking_system.database import db
+    monkeypatch.setattr(db, "DB_FILE", tmp_path / "no_tables.db")
+    sink = AuditSink(mode="batched", batch_size=1000, flush_interval=60, max_buffer=5)
+    for _ in range(5):
+        sink.write(row())
+    sink.write(row())
+    assert sink.dropped == 1
+    assert sink.flush() == 0
+    assert sink.pending() == 5
+    sink._buffer.clear()
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        AuditSink(mode="eventually")
+
+
+def test_vehicle_operations_are_audited(fresh_db, monkeypatch):
+    monkeypatch.setattr(audit, "audit_sink", AuditSink(mode="sync"))
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    slot_manager.allocate_slot("ABC123")
+    vehicle_manager.checkin_vehicle("ABC123")
+    vehicle_manager.checkout_vehicle("ABC123", amount=10)
+
+    rows = audit_rows()
+    assert [r["action"] for r in rows] == ["REGISTER_VEHICLE", "CHECKIN_VEHICLE", "CHECKOUT_VEHICLE"]
+    assert rows[0]["user"] == "system" and rows[0]["role"] == "Admin"
+    assert rows[1]["user"] == "staff" and rows[1]["role"] == "Staff"
+    assert json.loads(rows[2]["details"]) == {"resource": "ABC123", "status": "SUCCESS"}
+
+
+def test_gate_entry_audits_the_registration(fresh_db, monkeypatch):
+    monkeypatch.setattr(audit, "audit_sink", AuditSink(mode="sync"))
+    slot_manager.create_slot("compact", 1)
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    vehicle_manager.gate_entry("ABC123", "Car")
+    vehicle_manager.gate_entry("NEW123", "Car")
+
+    assert [r["action"] for r in audit_rows()] == ["REGISTER_VEHICLE", "GATE_ENTRY", "REGISTER_VEHICLE", "GATE_ENTRY"]
+
+
+def test_failed_capture_is_kept_for_retry(fresh_db, monkeypatch, caplog):
+    monkeypatch.setattr(audit, "audit_sink", AuditSink(mode="sync"))
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.gate_entry("ABC123", "Car")
+    real_capture = payment_gateway.capture_payment
+
+    def outage(payment):
+        raise payment_gateway.PaymentGatewayError("gateway timeout")
+
+    monkeypatch.setattr(payment_gateway, "capture_payment", outage)
+    # The checkout has committed; its charge must not be lost
+    assert vehicle_manager.checkout_vehicle("ABC123", amount=10)["amount"] == 10
+    assert "Transaction hook _capture_payment failed" in caplog.text
+    assert vehicle_manager.retry_failed_captures() == 0
+    captures = [r for r in audit_rows() if r["action"] == "PAYMENT_CAPTURE"]
+    assert [json.loads(r["details"])["status"] for r in captures] == ["FAILURE"]
+
+    monkeypatch.setattr(payment_gateway, "capture_payment", real_capture)
+    assert vehicle_manager.retry_failed_captures() == 1
+    assert vehicle_manager.retry_failed_captures() == 0
+    captures = [r for r in audit_rows() if r["action"] == "PAYMENT_CAPTURE"]
+    assert [json.loads(r["details"])["status"] for r in captures] == ["FAILURE", "SUCCESS"]
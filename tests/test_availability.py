@@ -0,0 +1,106 @@
+# tests/test_availability.py
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.availability_routes import router as availability_router
+from parking_system.core import availability, reservations, slot_manager, vehicle_manager
+from parking_system.database.db import get_conn
+
+
+def free_by_bucket():
+    return {(row["slot_type"], row["level"]): row["free"] for row in availability.summary()["levels"]}
+
+
+def test_counters_follow_every_change(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    slot_manager.create_slot("compact", 1)
+    large = slot_manager.create_slot("large", 2)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    assert availability.summary()["total"] == 3
+    assert free_by_bucket() == {("compact", 1): 2, ("large", 2): 1}
+
+    slot_manager.allocate_slot("ABC123")
+    assert free_by_bucket()[("compact", 1)] == 1
+
+    vehicle_manager.checkin_vehicle("ABC123")
+    vehicle_manager.checkout_vehicle("ABC123")
+    assert free_by_bucket()[("compact", 1)] == 2
+
+    slot_manager.set_slot_occupancy(large["id"], True)      # sensor
+    assert free_by_bucket()[("large", 2)] == 0
+    slot_manager.set_slot_occupancy(large["id"], False)
+
+    vehicle_manager.register_vehicle("RES1", "Truck")
+    reservations.book.reserve("RES1", slot_type="large")
+    assert free_by_bucket()[("large", 2)] == 0
+    assert availability.summary()["free"] == 2
+    reservations.book.cancel("RES1")
+    assert availability.summary()["free"] == 3
+
+
+def test_endpoint_reuses_body_until_a_change(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    client = TestClient(_app())
+
+    response = client.get("/api/availability")
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 1, "free": 1,
+        "levels": [{"level": 1, "slot_type": "compact", "total": 1, "free": 1}],
+    }
+    assert availability.summary_json() is availability.summary_json()
+
+    body = availability.summary_json()
+    slot_manager.set_slot_occupancy(1, True)
+    assert availability.summary_json() is not body
+    assert client.get("/api/availability").json()["free"] == 0
+
+
+def test_reconciler_corrects_drift(fresh_db):
+    for _ in range(3):
+        slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("RES1", "Car")
+    reservations.book.reserve("RES1")
+    reconciler = availability.Reconciler(interval=0)
+    assert reconciler.reconcile() == {}
+
+    # Changed behind the index's back
+    with get_conn() as conn:
+        conn.execute("UPDATE slots SET is_occupied=1 WHERE id=3")
+        conn.execute("INSERT INTO slots (slot_type, level) VALUES ('large', 2)")
+
+    assert reconciler.reconcile() == {("compact", 1): (3, 1), ("large", 2): (1, 1)}
+    assert reconciler.corrections == 1
+    assert free_by_bucket() == {("compact", 1): 1, ("large", 2): 1}
+    assert reconciler.reconcile() == {}
+    reservations.book.cancel("RES1")
+
+
+def test_reconciler_waits_for_claims_in_flight(fresh_db):
+    for _ in range(2):
+        slot_manager.create_slot("compact", 1)
+    index = slot_manager.get_free_slot_index()
+    reconciler = availability.Reconciler(interval=0)
+    results = []
+
+    with get_conn(immediate=True) as conn:
+        # An allocation between taking its slot and committing the claim
+        slot_id = index.pop()
+        thread = threading.Thread(target=lambda: results.append(reconciler.reconcile()))
+        thread.start()
+        time.sleep(0.2)
+        assert results == []
+        conn.execute("UPDATE slots SET is_occupied=1 WHERE id=?", (slot_id,))
+    thread.join()
+
+    assert results == [{}] and reconciler.corrections == 0
+    assert slot_id not in index
+
+
+def _app():
+    app = FastAPI()
+    app.include_router(availability_router)
+    return app
@@ -0,0 +1,127 @@
+# tests/test_batch_assignment.py
+import asyncio
+import itertools
+
+import numpy as np
+
+from parking_system.config import get_config
+from parking_system.core import batch_assignment, reservations, slot_manager, vehicle_manager
+from parking_system.core.batch_assignment import ArrivalBatcher, allocate_batch, solve_assignment
+
+
+def brute_force(cost):
+    n, m = cost.shape
+    if n <= m:
+        return min(sum(cost[i, c] for i, c in enumerate(cols)) for cols in itertools.permutations(range(m), n))
+    return brute_force(cost.T)
+
+
+def test_solver_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for shape in [(1, 1), (3, 3), (3, 6), (6, 3), (5, 7)]:
+        for _ in range(5):
+            cost = rng.integers(0, 20, size=shape).astype(float)
+            rows, cols = solve_assignment(cost)
+            assert len(rows) == min(shape)
+            assert len(set(rows)) == len(set(cols)) == min(shape)
+            assert cost[rows, cols].sum() == brute_force(cost)
+
+
+def test_cost_matrix_marks_misfits_infeasible():
+    cost = batch_assignment.build_cost_matrix(
+        ["Truck", "Car"], [1, 1],
+        np.array([1, 2]), np.array(["compact", "large"], dtype=object), np.array([1, 1]),
+    )
+    assert cost[0, 0] == batch_assignment.INFEASIBLE
+    assert cost[0, 1] < batch_assignment.INFEASIBLE
+    assert cost[1, 0] < cost[1, 1]
+
+
+def test_batch_beats_greedy_on_type_mix(fresh_db):
+    large = slot_manager.create_slot("large", 1)
+    compact = slot_manager.create_slot("compact", 2)
+    vehicle_manager.register_vehicle("CAR1", "Car")
+    vehicle_manager.register_vehicle("TRUCK1", "Truck")
+
+    results = allocate_batch([("CAR1", 1), ("TRUCK1", 1)])
+
+    # Greedy would give the car the level-1 large slot and strand the truck
+    assert results[0]["slot"]["id"] == compact["id"]
+    assert results[1]["slot"]["id"] == large["id"]
+
+
+def test_batch_reports_per_vehicle_errors(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("CAR1", "Car")
+    vehicle_manager.register_vehicle("CAR2", "Car")
+
+    results = allocate_batch([("CAR1", None), ("GHOST", None), ("CAR2", None)])
+
+    assert "slot" in results[0]
+    assert results[1]["error"] == "Vehicle does not exist"
+    assert results[2]["error"] == "No available slots"
+    assert len(slot_manager.free_slot_index) == 0
+
+
+def test_reserved_vehicle_in_batch_gets_its_held_slot(fresh_db, monkeypatch):
+    s1 = slot_manager.create_slot("compact", 1)
+    s2 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("AAA", "Car")
+    vehicle_manager.register_vehicle("BBB", "Car")
+    book = reservations.ReservationBook()
+    monkeypatch.setattr(reservations, "book", book)
+    assert book.reserve("AAA")["slot_id"] == s1["id"]
+
+    results = allocate_batch([("AAA", None), ("BBB", None)])
+
+    assert results[0]["slot"]["id"] == s1["id"]
+    assert results[1]["slot"]["id"] == s2["id"]
+    assert slot_manager.held_slots == {} and slot_manager.held_by_slot == set()
+
+
+def test_batcher_collects_window(fresh_db):
+    for level in (1, 2):
+        slot_manager.create_slot("compact", level)
+    vehicle_manager.register_vehicle("CAR1", "Car")
+    vehicle_manager.register_vehicle("CAR2", "Car")
+
+    batcher = ArrivalBatcher(window_ms=200).start()
+    try:
+        futures = [batcher.submit("CAR1", 1), batcher.submit("CAR2", 2)]
+        slots = [f.result(timeout=5) for f in futures]
+    finally:
+        batcher.stop()
+    assert batcher.batches == 1
+    assert {s["level"] for s in slots} == {1, 2}
+
+
+def test_batcher_single_arrival_is_greedy(fresh_db, monkeypatch):
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("CAR1", "Car")
+    monkeypatch.setattr(batch_assignment, "_allocate_batch", lambda arrivals: 1 / 0)
+
+    batcher = ArrivalBatcher(window_ms=10).start()
+    try:
+        assert batcher.allocate("CAR1", timeout=5)["vehicle_plate"] == "CAR1"
+    finally:
+        batcher.stop()
+
+
+def test_api_allocations_are_batched_when_enabled(fresh_db, monkeypatch):
+    large = slot_manager.create_slot("large", 1)
+    compact = slot_manager.create_slot("compact", 2)
+    vehicle_manager.register_vehicle("CAR1", "Car")
+    vehicle_manager.register_vehicle("TRUCK1", "Truck")
+    allocation = get_config().get("allocation") or {}
+    batch = {**(allocation.get("batch") or {}), "enabled": True, "window_ms": 200}
+    monkeypatch.setitem(get_config(), "allocation", {**allocation, "batch": batch})
+
+    async def arrive():
+        return await asyncio.gather(slot_manager.allocate_slot_async("CAR1"), slot_manager.allocate_slot_async("TRUCK1"))
+
+    try:
+        car, truck = asyncio.run(arrive())
+        assert slot_manager._batcher.batches == 1
+    finally:
+        slot_manager.stop_arrival_batcher()
+    assert (car["id"], truck["id"]) == (compact["id"], large["id"])
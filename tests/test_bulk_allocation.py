@@ -0,0 +1,43 @@
+# tests/test_bulk_allocation.py
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database.db import get_conn
+
+
+def test_bulk_allocation_partial_failures(fresh_db):
+    for _ in range(3):
+        slot_manager.create_slot("compact", 1)
+    for plate in ("BUS1", "BUS2", "BUS3", "BUS4"):
+        vehicle_manager.register_vehicle(plate, "Car")
+
+    results = slot_manager.allocate_slots_bulk(["BUS1", "GHOST", "BUS2", "BUS1", "BUS3", "BUS4"])
+
+    assert [r["license_plate"] for r in results] == ["BUS1", "GHOST", "BUS2", "BUS1", "BUS3", "BUS4"]
+    assert results[1]["error"] == "Vehicle does not exist"
+    assert results[3]["error"] == "Vehicle already allocated"
+    assert results[5]["error"] == "No available slots"
+    slot_ids = [r["slot"]["id"] for r in results if "slot" in r]
+    assert len(slot_ids) == len(set(slot_ids)) == 3
+
+    with get_conn() as conn:
+        rows = conn.execute("SELECT license_plate, slot_id FROM vehicles ORDER BY license_plate").fetchall()
+    assert [r["slot_id"] is not None for r in rows] == [True, True, True, False]
+    assert len(slot_manager.free_slot_index) == 0
+
+
+def test_bulk_allocation_endpoint(fresh_db):
+    app = FastAPI()
+    app.include_router(slot_router)
+    client = TestClient(app)
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("BUS1", "Car")
+
+    response = client.post("/api/slots/allocate/bulk", json={"license_plates": ["BUS1", "BUS2"]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body[0]["slot"]["vehicle_plate"] == "BUS1"
+    assert body[1] == {"license_plate": "BUS2", "error": "Vehicle does not exist"}
@@ -0,0 +1,88 @@
+# tests/test_concurrent_allocation.py
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from parking_system.core import slot_manager
+from parking_system.database import db
+from parking_system.database.db import get_conn
+
+N_SLOTS = 60
+N_VEHICLES = 100
+
+
+def seed(n_slots=N_SLOTS, n_vehicles=N_VEHICLES):
+    with get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO slots (slot_type, level) VALUES ('compact', ?)",
+            ((i % 3 + 1,) for i in range(n_slots)),
+        )
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')",
+            ((f"CAR{i:04d}",) for i in range(n_vehicles)),
+        )
+    slot_manager.load_free_slot_index()
+
+
+def try_allocate(plate):
+    try:
+        return slot_manager.allocate_slot(plate)["id"]
+    except ValueError:
+        return None
+
+
+def assert_consistent(expected_allocated):
+    with get_conn() as conn:
+        slots = conn.execute("SELECT id, vehicle_plate FROM slots WHERE is_occupied=1").fetchall()
+        vehicles = conn.execute("SELECT license_plate, slot_id FROM vehicles WHERE slot_id IS NOT NULL").fetchall()
+    plates = [s["vehicle_plate"] for s in slots]
+    assert len(plates) == len(set(plates)) == expected_allocated
+    assert len(vehicles) == expected_allocated
+    assert {(v["slot_id"], v["license_plate"]) for v in vehicles} == {(s["id"], s["vehicle_plate"]) for s in slots}
+
+
+def test_threads_never_double_allocate(fresh_db):
+    seed()
+    plates = [f"CAR{i:04d}" for i in range(N_VEHICLES)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(try_allocate, plates))
+    won = [r for r in results if r is not None]
+    assert len(won) == len(set(won)) == N_SLOTS
+    assert_consistent(N_SLOTS)
+
+
+def test_same_plate_allocated_once(fresh_db):
+    seed()
+    barrier = threading.Barrier(8)
+
+    def race():
+        barrier.wait()
+        return try_allocate("CAR0001")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [f.result() for f in [pool.submit(race) for _ in range(8)]]
+    assert sum(r is not None for r in results) == 1
+    assert_consistent(1)
+
+
+def _process_worker(db_file, plates, queue):
+    db.DB_FILE = db_file
+    slot_manager.load_free_slot_index()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        queue.put([r for r in pool.map(try_allocate, plates) if r is not None])
+
+
+def test_processes_never_double_allocate(fresh_db):
+    seed()
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    # Every process competes for every vehicle and every slot
+    plates = [f"CAR{i:04d}" for i in range(N_VEHICLES)]
+    procs = [ctx.Process(target=_process_worker, args=(fresh_db, plates[i::2] + plates, queue)) for i in range(4)]
+    for p in procs:
+        p.start()
+    won = [slot_id for _ in procs for slot_id in queue.get(timeout=60)]
+    for p in procs:
+        p.join(timeout=60)
+    assert len(won) == len(set(won)) == N_SLOTS
+    assert_consistent(N_SLOTS)
@@ -0,0 +1,72 @@
+# tests/test_conditional_get.py
+import sqlite3
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import slot_manager, vehicle_manager
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    return TestClient(app)
+
+
+def test_unchanged_listing_answers_304_without_loading(fresh_db, monkeypatch):
+    slot_manager.create_slot("compact", 1)
+    client = make_client()
+
+    first = client.get("/api/slots/")
+    tag = first.headers["ETag"]
+    assert first.status_code == 200 and len(first.json()) == 1
+
+    def no_db_access(*args, **kwargs):
+        raise AssertionError("listing was loaded")
+
+    monkeypatch.setattr(slot_manager, "list_slots_async", no_db_access)
+    monkeypatch.setattr(slot_manager, "query_slots_async", no_db_access)
+    response = client.get("/api/slots/", headers={"If-None-Match": tag})
+    assert response.status_code == 304 and response.headers["ETag"] == tag
+    assert client.get("/api/slots/", params={"level": 1}, headers={"If-None-Match": f'"other", W/{tag}'}).status_code == 304
+
+    # Full body served again from memory for this version
+    again = client.get("/api/slots/")
+    assert again.status_code == 200 and again.content == first.content
+
+
+def test_writes_move_the_etag(fresh_db):
+    slot = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    client = make_client()
+    slots_tag = client.get("/api/slots/").headers["ETag"]
+    vehicles_tag = client.get("/api/vehicles/").headers["ETag"]
+
+    slot_manager.set_slot_occupancy(slot["id"], True)       # sensor: slots only
+    response = client.get("/api/slots/", headers={"If-None-Match": slots_tag})
+    assert response.status_code == 200 and response.json()[0]["is_occupied"] == 1
+    assert response.headers["ETag"] != slots_tag
+    assert client.get("/api/vehicles/", headers={"If-None-Match": vehicles_tag}).status_code == 304
+
+    slot_manager.set_slot_occupancy(slot["id"], False)
+    slot_manager.allocate_slot("ABC123")
+    response = client.get("/api/vehicles/", headers={"If-None-Match": vehicles_tag})
+    assert response.status_code == 200 and response.json()[0]["slot_id"] == slot["id"]
+
+
+def test_writes_by_another_worker_move_the_etag(fresh_db):
+    slot = slot_manager.create_slot("compact", 1)
+    client = make_client()
+    tag = client.get("/api/slots/").headers["ETag"]
+
+    other = sqlite3.connect(fresh_db)
+    with other:
+        other.execute("UPDATE slots SET is_occupied = 1 WHERE id = ?", (slot["id"],))
+    other.close()
+
+    response = client.get("/api/slots/", headers={"If-None-Match": tag})
+    assert response.status_code == 200 and response.json()[0]["is_occupied"] == 1
+    assert response.headers["ETag"] != tag
@@ -0,0 +1,85 @@
+# tests/test_connection_pool.py
+import sqlite3
+import threading
+
+import pytest
+
+from parking_system.database import db
+from parking_system.core import slot_manager
+
+
+def test_connections_are_reused(fresh_db):
+    pool = db.get_pool()
+    with db.get_conn() as conn:
+        first = conn
+    with db.get_conn() as conn:
+        assert conn is first
+    stats = db.pool_stats()
+    assert stats["open"] == 1 and stats["idle"] == 1
+    assert stats["checkouts"] >= 2
+    assert pool.path == str(fresh_db)
+
+
+def test_pragmas_applied(fresh_db):
+    with db.get_conn() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_pool_follows_db_file(fresh_db, tmp_path, monkeypatch):
+    first = db.get_pool()
+    monkeypatch.setattr(db, "DB_FILE", tmp_path / "other.db")
+    assert db.get_pool() is not first
+    assert db.get_pool().path == str(tmp_path / "other.db")
+
+
+def test_rollback_keeps_connection_clean(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    with pytest.raises(RuntimeError):
+        with db.get_conn(immediate=True) as conn:
+            conn.execute("UPDATE slots SET is_occupied=1")
+            raise RuntimeError("boom")
+    with db.get_conn() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT SUM(is_occupied) FROM slots").fetchone()[0] == 0
+
+
+def test_pool_waits_when_exhausted(tmp_path):
+    pool = db.ConnectionPool(tmp_path / "small.db", size=1, timeout=5)
+    conn = pool.acquire()
+    got = []
+
+    def worker():
+        c = pool.acquire()
+        got.append(c)
+        pool.release(c)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join(0.1)
+    assert not got
+    pool.release(conn)
+    thread.join()
+    assert got == [conn]
+    assert pool.stats()["waits"] == 1
+    pool.close()
+
+
+def test_pool_timeout(tmp_path):
+    pool = db.ConnectionPool(tmp_path / "small.db", size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    pool.release(conn)
+    pool.close()
+
+
+def test_unpooled_mode_closes_connections(tmp_path):
+    pool = db.ConnectionPool(tmp_path / "unpooled.db", size=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    assert pool.stats()["open"] == 0
@@ -0,0 +1,92 @@
+# tests/test_gate_entry.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.gate_routes import router as gate_router
+from parking_system.core import reservations, slot_manager, vehicle_manager
+from parking_system.database.db import get_conn
+
+
+def fetch_state(plate):
+    with get_conn() as conn:
+        vehicle = conn.execute("SELECT * FROM vehicles WHERE license_plate=?", (plate,)).fetchone()
+        logs = conn.execute("SELECT * FROM vehicle_logs WHERE license_plate=?", (plate,)).fetchall()
+    return vehicle, logs
+
+
+def test_gate_entry_registers_allocates_and_checks_in(fresh_db):
+    slot = slot_manager.create_slot("compact", 1)
+
+    result = vehicle_manager.gate_entry("NEW123", "Car")
+
+    assert result == {"license_plate": "NEW123", "vehicle_type": "Car", "checked_in": 1, "slot_id": slot["id"]}
+    vehicle, logs = fetch_state("NEW123")
+    assert vehicle["checked_in"] == 1 and vehicle["slot_id"] == slot["id"]
+    assert len(logs) == 1 and logs[0]["checkout_time"] is None
+    assert slot_manager.get_slot_by_id(slot["id"])["vehicle_plate"] == "NEW123"
+
+
+def test_gate_entry_uses_existing_allocation(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    second = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    slot_manager.set_slot_occupancy(1, True)
+    slot_manager.allocate_slot("ABC123")
+
+    assert vehicle_manager.gate_entry("ABC123", "Car")["slot_id"] == second["id"]
+
+
+def test_gate_entry_rolls_back_when_full(fresh_db):
+    with pytest.raises(ValueError, match="No available slots"):
+        vehicle_manager.gate_entry("NEW123", "Car")
+    vehicle, logs = fetch_state("NEW123")
+    assert vehicle is None and logs == []
+
+
+def test_rolled_back_gate_entry_keeps_the_reservation(fresh_db, monkeypatch):
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    held = reservations.reserve_slot("ABC123")["slot_id"]
+
+    class BrokenClock:
+        @staticmethod
+        def now():
+            raise RuntimeError("clock failed")
+
+    # Fails after the held slot was claimed
+    with monkeypatch.context() as m:
+        m.setattr(vehicle_manager, "datetime", BrokenClock)
+        with pytest.raises(RuntimeError):
+            vehicle_manager.gate_entry("ABC123", "Car")
+
+    assert slot_manager.held_slots == {"ABC123": held}
+    assert held not in slot_manager.free_slot_index
+    assert vehicle_manager.gate_entry("ABC123", "Car")["slot_id"] == held
+
+
+def test_gate_entry_twice_is_rejected(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.gate_entry("NEW123", "Car")
+    with pytest.raises(ValueError, match="already checked in"):
+        vehicle_manager.gate_entry("NEW123", "Car")
+    assert len(slot_manager.free_slot_index) == 1
+
+
+def test_gate_entry_then_checkout(fresh_db):
+    slot = slot_manager.create_slot("compact", 1)
+    vehicle_manager.gate_entry("NEW123", "Car")
+    vehicle_manager.checkout_vehicle("NEW123", amount=20)
+    vehicle, logs = fetch_state("NEW123")
+    assert vehicle["slot_id"] is None and logs[0]["amount"] == 20
+    assert slot["id"] in slot_manager.free_slot_index
+
+
+def test_gate_entry_endpoint(fresh_db):
+    app = FastAPI()
+    app.include_router(gate_router)
+    slot_manager.create_slot("compact", 1)
+    response = TestClient(app).post("/api/gate/entry", json={"license_plate": "NEW123", "vehicle_type": "Car"})
+    assert response.status_code == 200
+    assert response.json()["checked_in"] == 1
@@ -0,0 +1,158 @@
+# tests/test_idempotency.py
+import asyncio
+import sqlite3
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.idempotency import IdempotencyMiddleware
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.core.idempotency import IdempotencyStore
+from parking_system.database.db import get_conn
+
+
+def make_app(store):
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    app.add_middleware(IdempotencyMiddleware, store=store)
+    return app
+
+
+def allocated_vehicle():
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    slot_manager.allocate_slot("ABC123")
+
+
+def checked_in_vehicle():
+    allocated_vehicle()
+    vehicle_manager.checkin_vehicle("ABC123")
+
+
+def log_rows():
+    with get_conn() as conn:
+        return conn.execute("SELECT COUNT(*) FROM vehicle_logs").fetchone()[0]
+
+
+def test_retry_replays_first_response(fresh_db, monkeypatch):
+    allocated_vehicle()
+    client = TestClient(make_app(IdempotencyStore()))
+    headers = {"Idempotency-Key": "gate-1-0001"}
+
+    first = client.post("/api/vehicles/checkin/", json={"license_plate": "ABC123"}, headers=headers)
+    assert first.status_code == 200
+
+    def no_work(*args, **kwargs):
+        raise AssertionError("retry reached vehicle_manager")
+
+    monkeypatch.setattr(vehicle_manager, "checkin_vehicle_async", no_work)
+    retry = client.post("/api/vehicles/checkin/", json={"license_plate": "ABC123"}, headers=headers)
+    assert retry.status_code == 200 and retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert log_rows() == 1
+
+    # Same key, other request
+    other = client.post("/api/vehicles/checkin/", json={"license_plate": "XYZ999"}, headers=headers)
+    assert other.status_code == 422
+
+
+def test_concurrent_duplicates_run_once(fresh_db, monkeypatch):
+    checked_in_vehicle()
+    store = IdempotencyStore()
+    calls = []
+    original = vehicle_manager.checkout_vehicle_async
+
+    async def slow_checkout(*args, **kwargs):
+        calls.append(args)
+        await asyncio.sleep(0.05)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(vehicle_manager, "checkout_vehicle_async", slow_checkout)
+
+    async def run():
+        transport = httpx.ASGITransport(app=make_app(store))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/vehicles/checkout/", json={"license_plate": "ABC123"}, headers={"Idempotency-Key": "k"})
+                for _ in range(10)
+            ))
+
+    responses = asyncio.run(run())
+    assert len(calls) == 1
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.content for r in responses}) == 1
+    assert store.stats()["coalesced"] == 9
+
+
+def test_keys_survive_the_memory_cache(fresh_db):
+    checked_in_vehicle()
+    headers = {"Idempotency-Key": "gate-1-0002"}
+    first = TestClient(make_app(IdempotencyStore())).post(
+        "/api/vehicles/checkout/", json={"license_plate": "ABC123"}, headers=headers
+    )
+    assert first.status_code == 200
+
+    # A new process: empty LRU, the key is found in the table
+    retry = TestClient(make_app(IdempotencyStore())).post(
+        "/api/vehicles/checkout/", json={"license_plate": "ABC123"}, headers=headers
+    )
+    assert retry.status_code == 200 and retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    # Without a key the request runs again (and fails: already checked out)
+    assert TestClient(make_app(IdempotencyStore())).post(
+        "/api/vehicles/checkout/", json={"license_plate": "ABC123"}
+    ).status_code == 400
+
+
+def test_failures_are_not_stored(fresh_db, monkeypatch):
+    checked_in_vehicle()
+    client = TestClient(make_app(IdempotencyStore()))
+    headers = {"Idempotency-Key": "gate-1-0003"}
+    original = vehicle_manager.checkout_vehicle_async
+    calls = []
+
+    async def locked_once(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(vehicle_manager, "checkout_vehicle_async", locked_once)
+    first = client.post("/api/vehicles/checkout/", json={"license_plate": "ABC123"}, headers=headers)
+    assert first.status_code == 503 and first.headers["Retry-After"] == "1"
+
+    retry = client.post("/api/vehicles/checkout/", json={"license_plate": "ABC123"}, headers=headers)
+    assert retry.status_code == 200 and "Idempotent-Replayed" not in retry.headers
+    assert len(calls) == 2
+
+    # A 400 that may pass later (no slot free yet) is not stored either
+    vehicle_manager.register_vehicle("XYZ999", "Car")
+    vehicle_manager.register_vehicle("LATE01", "Car")
+    slot_manager.allocate_slot("XYZ999")
+    headers = {"Idempotency-Key": "gate-1-0004"}
+    assert client.post("/api/slots/allocate/", json={"license_plate": "LATE01"}, headers=headers).status_code == 400
+    slot_manager.create_slot("compact", 1)
+    assert client.post("/api/slots/allocate/", json={"license_plate": "LATE01"}, headers=headers).status_code == 200
+
+
+def test_bugs_are_server_errors_not_retry_hints(fresh_db, monkeypatch):
+    allocated_vehicle()
+    client = TestClient(make_app(IdempotencyStore()), raise_server_exceptions=False)
+    headers = {"Idempotency-Key": "gate-1-0005"}
+    calls = []
+
+    async def broken(*args, **kwargs):
+        calls.append(args)
+        raise sqlite3.IntegrityError("UNIQUE constraint failed: vehicle_logs.id")
+
+    monkeypatch.setattr(vehicle_manager, "checkin_vehicle_async", broken)
+    for _ in range(2):
+        response = client.post("/api/vehicles/checkin/", json={"license_plate": "ABC123"}, headers=headers)
+        assert response.status_code == 500 and "Retry-After" not in response.headers
+    # Not stored either: each attempt ran
+    assert len(calls) == 2
@@ -0,0 +1,121 @@
+# tests/test_metrics.py
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system import metrics
+from parking_system.api.metrics import MetricsMiddleware
+from parking_system.api.availability_routes import router as availability_router
+from parking_system.api.gate_routes import router as gate_router
+from parking_system.api.metrics_routes import router as metrics_router
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import slot_manager
+
+
+def scrape(client) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    values = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            values[series] = float(value)
+    return values
+
+
+def test_text_format():
+    registry = metrics.Registry()
+    hits = registry.counter("test_hits_total", "Hits", ("path",))
+    latency = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1))
+    hits.labels('/a"b').inc(2)
+    latency.observe(0.05)
+    latency.observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP test_hits_total Hits",
+        "# TYPE test_hits_total counter",
+        'test_hits_total{path="/a\\"b"} 2',
+        "# HELP test_latency_seconds Latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{le="0.1"} 1',
+        'test_latency_seconds_bucket{le="1"} 1',
+        'test_latency_seconds_bucket{le="+Inf"} 2',
+        "test_latency_seconds_sum 5.05",
+        "test_latency_seconds_count 2",
+    ]
+
+
+def test_histogram_counts_observations_from_many_threads():
+    latency = metrics.Registry().histogram("test_threads_seconds", "Latency", buckets=(0.1,))
+    per_thread = metrics.FOLD_EVERY + 7     # folds while observing, the rest on scrape
+
+    def observe():
+        for _ in range(per_thread):
+            latency.observe(0.05)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    samples = {suffix + labels.get("le", ""): value for suffix, labels, value in latency.samples()}
+    assert samples["_bucket0.1"] == samples["_count"] == 4 * per_thread
+
+
+def test_nested_operations_count_once():
+    @metrics.track("test_inner")
+    def inner():
+        return 1
+
+    @metrics.track("test_outer")
+    def outer():
+        return inner()
+
+    outer()
+    values = {tuple(labels.values()): value for _, labels, value in metrics.operations.samples()}
+    assert values[("test_outer", "ok")] == 1
+    assert values[("test_inner", "ok")] == 0
+
+
+def test_api_requests_are_measured(fresh_db):
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    app.include_router(gate_router)
+    app.include_router(metrics_router)
+    app.include_router(availability_router)
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    for _ in range(3):
+        slot_manager.create_slot("compact", 2)
+    before = scrape(client)
+
+    client.post("/api/vehicles/", json={"license_plate": "ABC123", "vehicle_type": "Car"})
+    assert client.post("/api/slots/allocate/", json={"license_plate": "ABC123"}).status_code == 200
+    assert client.post("/api/vehicles/checkin/", json={"license_plate": "ABC123"}).status_code == 200
+    assert client.post("/api/vehicles/checkout/", json={"license_plate": "ABC123"}).status_code == 200
+    assert client.post("/api/vehicles/checkout/", json={"license_plate": "ABC123"}).status_code == 400
+    client.post("/api/slots/allocate/", json={"license_plate": "XYZ789"})
+    # A plain route (router.add_route) is labelled with its path, not "unmatched"
+    assert client.get("/api/availability").status_code == 200
+    # Runs on the writer thread: still counted once
+    assert client.post("/api/gate/entry", json={"license_plate": "GATE1", "vehicle_type": "Car"}).status_code == 200
+    after = scrape(client)
+
+    def delta(series):
+        return after.get(series, 0) - before.get(series, 0)
+
+    assert delta('parking_operations_total{operation="allocate",outcome="ok"}') == 1
+    assert delta('parking_operations_total{operation="checkin",outcome="ok"}') == 1
+    assert delta('parking_operations_total{operation="checkout",outcome="ok"}') == 1
+    assert delta('parking_operations_total{operation="checkout",outcome="failed"}') == 1
+    assert delta('parking_operations_total{operation="allocate",outcome="failed"}') == 1
+    assert delta('parking_operations_total{operation="gate_entry",outcome="ok"}') == 1
+    assert delta('parking_http_request_duration_seconds_count{method="POST",route="/api/vehicles/checkout/",status="400"}') == 1
+    assert delta('parking_http_request_duration_seconds_count{method="GET",route="/api/availability",status="200"}') == 1
+    assert delta('parking_external_call_seconds_count{service="payment",outcome="ok"}') == 1
+    assert delta('parking_db_connection_seconds_count{mode="immediate"}') >= 4
+    assert after['parking_slots{slot_type="compact",level="2",state="free"}'] == 2
@@ -0,0 +1,75 @@
+# tests/test_migrations.py
+import sqlite3
+
+import pytest
+
+from parking_system.analytics import reports
+from parking_system.core import availability, slot_manager, vehicle_manager
+from parking_system.database import db
+from parking_system.database.migrations import LATEST_VERSION, MIGRATIONS, current_version
+
+# Hot queries, built by the code issuing them, with the index each must use
+HOT_QUERIES = [
+    (availability.TABLE_COUNTS_SQL, (), "idx_slots_bucket"),
+    (slot_manager._FREE_ROWS_SQL, (), "idx_slots_free"),
+    # Listings: keyset pages, filtered or not
+    (*slot_manager._slots_sql("*", None, None, None, 100, 50), "INTEGER PRIMARY KEY"),
+    (*slot_manager._slots_sql("*", None, 2, None, 100, 50), "idx_slots_level"),
+    (*slot_manager._slots_sql("*", "compact", None, False, None, 50), "idx_slots_free"),
+    (*vehicle_manager._vehicles_sql("*", None, None, "ABC123", 50), "sqlite_autoindex_vehicles_1"),
+    (*vehicle_manager._vehicles_sql("*", "Car", None, "ABC123", 50), "idx_vehicles_type"),
+    (*reports._vehicle_logs_sql("2024-01-01", "2024-02-01"), "idx_vehicle_logs_checkin"),
+    # Checkout (vehicle_manager._checkout_vehicle_tx) and the key sweep (core/idempotency.py)
+    (
+        "UPDATE vehicle_logs SET checkout_time=?, amount=? WHERE license_plate=? AND checkout_time IS NULL",
+        ("2024-01-01T10:00:00", 0, "ABC123"),
+        "idx_vehicle_logs_open",
+    ),
+    (
+        "DELETE FROM idempotency_keys WHERE created_at < ?",
+        (0,),
+        "idx_idempotency_keys_created",
+    ),
+]
+
+
+def test_fresh_db_is_at_latest_version(fresh_db):
+    with db.get_conn() as conn:
+        assert current_version(conn) == LATEST_VERSION
+        versions = [r[0] for r in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == [version for version, _, _ in MIGRATIONS]
+
+
+def test_init_db_is_idempotent(fresh_db):
+    assert db.init_db() == []
+    with db.get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(MIGRATIONS)
+
+
+def test_upgrades_unversioned_database(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE slots (id INTEGER PRIMARY KEY AUTOINCREMENT, slot_type TEXT NOT NULL, "
+                 "level INTEGER NOT NULL, is_occupied INTEGER NOT NULL DEFAULT 0, vehicle_plate TEXT UNIQUE)")
+    conn.execute("INSERT INTO slots (slot_type, level) VALUES ('compact', 1)")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, "DB_FILE", path)
+    try:
+        assert db.init_db() == [version for version, _, _ in MIGRATIONS]
+        with db.get_conn() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM slots").fetchone()[0] == 1
+            indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        assert {"idx_slots_free", "idx_vehicle_logs_open", "idx_vehicle_logs_checkin"} <= indexes
+    finally:
+        db.close_pools()
+
+
+@pytest.mark.parametrize("query,params,index", HOT_QUERIES)
+def test_hot_queries_use_indexes(fresh_db, query, params, index):
+    with db.get_conn() as conn:
+        plan = [row["detail"] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+    assert any(index in step for step in plan), plan
+    # The indexed table is searched or scanned through the index, never as a whole
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in plan), plan
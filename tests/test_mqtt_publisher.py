@@ -0,0 +1,63 @@
+# tests/test_mqtt_publisher.py
+import time
+
+from parking_system.core import slot_manager
+from parking_system.io_integration.fake_broker import FakeBroker
+from parking_system.io_integration.mqtt_publisher import MqttPublisher
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def make_lot():
+    return {level: [slot_manager.create_slot("compact", level)["id"] for _ in range(3)] for level in (1, 2)}
+
+
+def test_snapshot_on_connect_then_one_message_per_level(fresh_db):
+    lot = make_lot()
+    broker = FakeBroker()
+    publisher = MqttPublisher(client_factory=broker.client, window=0.3).start()
+    try:
+        wait_for(lambda: publisher.snapshots == 1)
+        snapshot = broker.retained["parking/slots/level/1"].json()
+        assert [s["id"] for s in snapshot["slots"]] == lot[1]
+        assert set(broker.retained) == {"parking/slots/level/1", "parking/slots/level/2"}
+
+        # A burst within the window: slot 1 flips twice, only its last state is sent
+        seen = len(broker.messages)
+        slot_manager.set_slot_occupancy(lot[1][0], True)
+        slot_manager.set_slot_occupancy(lot[1][1], True)
+        slot_manager.set_slot_occupancy(lot[1][0], False)
+        slot_manager.set_slot_occupancy(lot[2][2], True)
+        wait_for(lambda: publisher.batches == 1)
+
+        messages = {m.topic: m for m in broker.messages[seen:]}
+        assert sorted(messages) == ["parking/slots/level/1/changes", "parking/slots/level/2/changes"]
+        level1 = messages["parking/slots/level/1/changes"].json()
+        assert level1["version"] > snapshot["version"]
+        assert [(s["id"], s["is_occupied"]) for s in level1["slots"]] == [(lot[1][0], 0), (lot[1][1], 1)]
+        assert not any(m.retain for m in messages.values())
+        assert publisher.stats()["loads"] == 2      # the snapshot, then one query for the batch
+    finally:
+        publisher.stop()
+
+
+def test_silent_without_changes_and_snapshot_again_on_reconnect(fresh_db):
+    make_lot()
+    broker = FakeBroker()
+    publisher = MqttPublisher(client_factory=broker.client, window=0.01).start()
+    try:
+        wait_for(lambda: publisher.snapshots == 1)
+        time.sleep(0.1)
+        assert len(broker.messages) == 2
+
+        broker.drop_connections()
+        wait_for(lambda: publisher.snapshots == 2)
+        assert broker.topics(since=2) == ["parking/slots/level/1", "parking/slots/level/2"]
+    finally:
+        publisher.stop()
+    assert publisher.stats()["connected"] is False
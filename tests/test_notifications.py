@@ -0,0 +1,69 @@
+# tests/test_notifications.py
+import threading
+import time
+
+import pytest
+
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.notifications import NotificationDispatcher
+from parking_system.notifications import dispatcher as dispatcher_module
+
+PROVIDER_DELAY = 0.3
+
+
+def test_dispatcher_delivers_and_counts():
+    sent = []
+    dispatcher = NotificationDispatcher(senders={"sms": lambda *args: sent.append(args)})
+    assert dispatcher.notify("sms", "+1", "hello")
+    dispatcher.flush()
+    assert sent == [("+1", "hello")]
+    assert dispatcher.stats()["sms"] == {"queued": 0, "sent": 1, "failed": 0, "dropped": 0}
+    dispatcher.stop()
+
+
+def test_dispatcher_drops_when_queue_full():
+    gate = threading.Event()
+    dispatcher = NotificationDispatcher(senders={"email": lambda *args: gate.wait()}, queue_size=1)
+    dispatcher.notify("email", "a")          # taken by the worker, blocks there
+    time.sleep(0.05)
+    assert dispatcher.notify("email", "b")   # fills the queue
+    assert not dispatcher.notify("email", "c")
+    assert dispatcher.stats()["email"]["dropped"] == 1
+    assert dispatcher.stats()["email"]["queued"] == 1
+    gate.set()
+    dispatcher.stop()
+    assert dispatcher.stats()["email"]["sent"] == 2
+
+
+def test_failed_send_is_counted():
+    dispatcher = NotificationDispatcher(senders={"push": lambda *args: 1 / 0})
+    dispatcher.notify("push", "staff", "msg")
+    dispatcher.flush()
+    assert dispatcher.stats()["push"]["failed"] == 1
+    dispatcher.stop()
+
+
+@pytest.fixture
+def slow_providers(monkeypatch):
+    slow = lambda *args: time.sleep(PROVIDER_DELAY)
+    dispatcher = NotificationDispatcher(senders={"email": slow, "sms": slow, "push": slow})
+    monkeypatch.setattr(dispatcher_module, "notification_dispatcher", dispatcher)
+    yield dispatcher
+    dispatcher.stop()
+
+
+def test_checkin_latency_independent_of_providers(fresh_db, slow_providers):
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    slot_manager.allocate_slot("ABC123")
+
+    start = time.perf_counter()
+    vehicle_manager.checkin_vehicle("ABC123")
+    vehicle_manager.checkout_vehicle("ABC123")
+    elapsed = time.perf_counter() - start
+
+    # Six sends at PROVIDER_DELAY each would take 1.8 s if done inline
+    assert elapsed < PROVIDER_DELAY
+    slow_providers.flush()
+    stats = slow_providers.stats()
+    assert sum(ch["sent"] for ch in stats.values()) == 6
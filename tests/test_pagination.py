@@ -0,0 +1,131 @@
+# tests/test_pagination.py
+import json
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.api.vehicle_routes import router as vehicle_router
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database import db
+from parking_system.database.db import get_conn
+
+
+def make_client():
+    app = FastAPI()
+    app.include_router(slot_router)
+    app.include_router(vehicle_router)
+    return TestClient(app)
+
+
+def make_lot():
+    with get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO slots (slot_type, level, is_occupied) VALUES (?, ?, ?)",
+            [("compact" if i % 2 else "large", i % 3 + 1, int(i % 4 == 0)) for i in range(30)],
+        )
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type, checked_in) VALUES (?, ?, ?)",
+            [(f"P{i:03d}", "Car" if i % 2 else "Truck", int(i % 3 == 0)) for i in range(30)],
+        )
+
+
+def test_query_slots_filters_and_pages(fresh_db):
+    make_lot()
+    everything = slot_manager.query_slots(slot_type="compact", level=2, is_occupied=False)
+    assert everything and all(
+        s["slot_type"] == "compact" and s["level"] == 2 and not s["is_occupied"] for s in everything
+    )
+
+    pages, after = [], None
+    while True:
+        page = slot_manager.query_slots(slot_type="compact", level=2, is_occupied=False, after=after, limit=2)
+        pages.extend(page)
+        if len(page) < 2:
+            break
+        after = page[-1]["id"]
+    assert pages == everything
+
+
+def test_query_vehicles_in_plate_order(fresh_db):
+    make_lot()
+    rows = vehicle_manager.query_vehicles(vehicle_type="Car", checked_in=True)
+    assert [v["license_plate"] for v in rows] == [f"P{i:03d}" for i in range(30) if i % 2 and i % 3 == 0]
+    assert vehicle_manager.query_vehicles(after="P027") == vehicle_manager.query_vehicles()[-2:]
+
+
+def test_api_pages_with_next_cursor_header(fresh_db):
+    make_lot()
+    client = make_client()
+
+    plates, cursor = [], None
+    while True:
+        params = {"limit": 7, "checked_in": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/vehicles/", params=params)
+        assert response.status_code == 200
+        plates += [v["license_plate"] for v in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert plates == [f"P{i:03d}" for i in range(30) if i % 3]
+
+    assert len(client.get("/api/slots/").json()) == 30
+    assert client.get("/api/slots/", params={"limit": 0}).status_code == 422
+
+
+def test_api_streams_ndjson(fresh_db):
+    make_lot()
+    client = make_client()
+
+    with client.stream("GET", "/api/slots/", params={"format": "ndjson", "level": 1}) as response:
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.iter_lines() if line]
+    assert rows == slot_manager.query_slots(level=1)
+
+
+def test_stream_holds_no_connection_between_batches(fresh_db):
+    make_lot()
+    rows = db.iter_rows(lambda after, limit: slot_manager._slots_sql("*", None, 1, None, after, limit), "id", batch_size=4)
+    first = [next(rows) for _ in range(4)]
+    stats = db.pool_stats()
+    assert stats["open"] == stats["idle"]
+
+    # The next batch is a new read: it sees what was committed meanwhile
+    with get_conn() as conn:
+        conn.execute("UPDATE slots SET is_occupied = 1 WHERE level = 1")
+    rest = list(rows)
+    assert [r["id"] for r in first + rest] == [s["id"] for s in slot_manager.query_slots(level=1)]
+    assert all(r["is_occupied"] for r in rest)
+
+
+def test_json_pages_match_rows(fresh_db):
+    make_lot()
+    with get_conn() as conn:
+        conn.execute("UPDATE slots SET vehicle_plate = 'P003' WHERE id = 1")
+        conn.execute("UPDATE vehicles SET slot_id = 1 WHERE license_plate = 'P003'")
+
+    page = slot_manager.query_slots_json(level=1, after=1, limit=4)
+    rows = slot_manager.query_slots(level=1, after=1, limit=4)
+    assert json.loads(page.body) == rows
+    assert (page.count, page.last_key) == (4, rows[-1]["id"])
+    assert json.loads(slot_manager.query_slots_json(limit=1).body)[0]["vehicle_plate"] == "P003"
+    assert json.loads(vehicle_manager.query_vehicles_json(checked_in=True).body) == vehicle_manager.query_vehicles(checked_in=True)
+    assert slot_manager.query_slots_json(after=1000) == (b"[]", 0, None)
+
+
+@pytest.mark.parametrize("ordered_aggregates", [False, db._ORDERED_AGGREGATES])
+def test_json_arrays_keep_key_order(fresh_db, monkeypatch, ordered_aggregates):
+    monkeypatch.setattr(db, "_ORDERED_AGGREGATES", ordered_aggregates)
+    plates = [f"R{i:05d}" for i in range(5000)]
+    random.Random(3).shuffle(plates)
+    with get_conn() as conn:
+        conn.executemany("INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')", ((p,) for p in plates))
+
+    page = vehicle_manager.query_vehicles_json()
+    listed = [v["license_plate"] for v in json.loads(page.body)]
+    assert listed == sorted(plates)
+    assert (page.count, page.last_key) == (5000, max(plates))
@@ -0,0 +1,150 @@
+# tests/test_read_cache.py
+import sqlite3
+import threading
+
+from parking_system.core import read_cache, slot_manager, vehicle_manager
+from parking_system.database.db import get_conn
+
+
+def db_slots():
+    with get_conn() as conn:
+        return [dict(r) for r in conn.execute("SELECT * FROM slots ORDER BY id")]
+
+
+def test_lru_is_bounded_and_counts():
+    cache = read_cache.LRUCache(max_size=2)
+    loads = []
+    loader = lambda key: loads.append(key) or key * 10
+
+    assert cache.get(1, loader) == 10
+    assert cache.get(1, loader) == 10
+    cache.get(2, loader)
+    cache.get(3, loader)          # evicts 1
+    cache.get(1, loader)
+
+    assert loads == [1, 2, 3, 1]
+    assert cache.stats()["size"] == 2
+    assert cache.hits == 1 and cache.misses == 4
+
+
+def test_get_many_loads_misses_in_one_call():
+    cache = read_cache.LRUCache()
+    calls = []
+    loader = lambda keys: calls.append(list(keys)) or {k: k * 10 for k in keys if k != 4}
+
+    assert cache.get_many([1, 2], loader) == [10, 20]
+    assert cache.get_many([2, 3, 1, 4], loader) == [20, 30, 10, None]
+    assert cache.get_many([4, 3], loader) == [None, 30]
+    assert calls == [[1, 2], [3, 4]]
+    assert cache.hits == 4 and cache.misses == 4
+
+
+def test_fill_racing_an_invalidation_is_dropped():
+    cache = read_cache.LRUCache()
+    snapshot = read_cache.SnapshotCache()
+
+    def stale_row(key):
+        cache.invalidate([key])   # a write commits while the row is loaded
+        return "stale"
+
+    def stale_table():
+        snapshot.invalidate()
+        return ["stale"]
+
+    assert cache.get(1, stale_row) == "stale"
+    assert cache.get(1, lambda key: "fresh") == "fresh"
+    assert snapshot.get(stale_table) == ["stale"]
+    assert snapshot.get(lambda: ["fresh"]) == ["fresh"]
+
+
+def test_reads_are_cached_until_a_write(fresh_db):
+    slot = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+
+    slot_manager.list_slots()
+    slot_manager.get_slot_by_id(slot["id"])
+    vehicle_manager.list_vehicles()
+    before = read_cache.stats()
+    slot_manager.list_slots()
+    slot_manager.get_slot_by_id(slot["id"])
+    vehicle_manager.list_vehicles()
+    after = read_cache.stats()
+    assert after["slot"]["hits"] == before["slot"]["hits"] + 1
+    assert after["slot_list"]["hits"] == before["slot_list"]["hits"] + 1
+    assert after["vehicle_list"]["hits"] == before["vehicle_list"]["hits"] + 1
+
+    slot_manager.allocate_slot("ABC123")
+    assert slot_manager.get_slot_by_id(slot["id"])["vehicle_plate"] == "ABC123"
+    assert vehicle_manager.list_vehicles()[0]["slot_id"] == slot["id"]
+
+    vehicle_manager.checkin_vehicle("ABC123")
+    assert slot_manager.list_slots()[0]["is_occupied"] == 1
+    assert vehicle_manager.list_vehicles()[0]["checked_in"] == 1
+
+    vehicle_manager.checkout_vehicle("ABC123", amount=5)
+    assert slot_manager.get_slot_by_id(slot["id"])["vehicle_plate"] is None
+    assert vehicle_manager.list_vehicles()[0]["slot_id"] is None
+
+    vehicle_manager.gate_entry("NEW123", "Car")
+    assert slot_manager.list_slots() == db_slots()
+    assert {v["license_plate"] for v in vehicle_manager.list_vehicles()} == {"ABC123", "NEW123"}
+
+
+def test_missing_slot_is_cached_until_created(fresh_db):
+    assert slot_manager.get_slot_by_id(1) is None
+    slot = slot_manager.create_slot("compact", 1)
+    assert slot_manager.get_slot_by_id(1) == slot
+
+
+def test_writes_by_another_process_clear_the_caches(fresh_db):
+    slot = slot_manager.create_slot("compact", 1)
+    assert slot_manager.get_slot_by_id(slot["id"])["level"] == 1
+    slot_manager.list_slots()
+
+    # Not through any of our write paths, so nothing is invalidated
+    other = sqlite3.connect(fresh_db)
+    with other:
+        other.execute("UPDATE slots SET level = 7 WHERE id = ?", (slot["id"],))
+    other.close()
+
+    assert slot_manager.get_slot_by_id(slot["id"])["level"] == 7
+    assert slot_manager.list_slots()[0]["level"] == 7
+
+
+def test_concurrent_reads_never_see_older_writes(fresh_db):
+    slots = [slot_manager.create_slot("compact", 1)["id"] for _ in range(4)]
+    stop = threading.Event()
+    errors = []
+
+    def writer(slot_id):
+        try:
+            for i in range(150):
+                occupied = i % 2 == 0
+                slot_manager.set_slot_occupancy(slot_id, occupied)
+                # Read-your-writes through both caches
+                assert slot_manager.get_slot_by_id(slot_id)["is_occupied"] == occupied
+                row = next(s for s in slot_manager.list_slots() if s["id"] == slot_id)
+                assert row["is_occupied"] == occupied
+        except BaseException as e:
+            errors.append(e)
+
+    def reader():
+        while not stop.is_set():
+            for slot_id in slots:
+                slot_manager.get_slot_by_id(slot_id)
+            slot_manager.list_slots()
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    writers = [threading.Thread(target=writer, args=(s,)) for s in slots]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+
+    assert not errors, errors[0]
+    assert slot_manager.list_slots() == db_slots()
+    assert [slot_manager.get_slot_by_id(s) for s in slots] == db_slots()
+    assert read_cache.slot_cache.hits > 0
@@ -0,0 +1,157 @@
+# tests/test_reservations.py
+import pytest
+
+from parking_system.core import reservations, slot_manager, vehicle_manager
+from parking_system.core.reservations import ReservationBook, TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# ----------------- TimerWheel -----------------
+
+def test_timer_wheel_fires_in_order():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=1.0, wheel_size=8, clock=clock)
+    wheel.schedule("a", clock.now + 2)
+    wheel.schedule("b", clock.now + 5)
+    wheel.schedule("c", clock.now + 20)  # more than one revolution away
+    assert wheel.advance(clock.now + 1) == []
+    assert wheel.advance(clock.now + 2) == ["a"]
+    assert wheel.advance(clock.now + 10) == ["b"]
+    assert wheel.advance(clock.now + 19) == []
+    assert wheel.advance(clock.now + 20) == ["c"]
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_cancel_and_reschedule():
+    clock = FakeClock()
+    wheel = TimerWheel(tick=1.0, wheel_size=8, clock=clock)
+    wheel.schedule("a", clock.now + 2)
+    wheel.schedule("b", clock.now + 2)
+    assert wheel.cancel("a")
+    wheel.schedule("b", clock.now + 4)
+    assert wheel.advance(clock.now + 3) == []
+    assert wheel.advance(clock.now + 100) == ["b"]
+
+
+# ----------------- ReservationBook -----------------
+
+@pytest.fixture
+def book():
+    return ReservationBook(default_ttl=60, tick=1.0, wheel_size=16, clock=FakeClock())
+
+
+def test_held_slot_is_skipped_by_allocation(fresh_db, book):
+    s1 = slot_manager.create_slot("compact", 1)
+    s2 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("WALKIN", "Car")
+    vehicle_manager.register_vehicle("BOOKED", "Car")
+
+    hold = book.reserve("BOOKED", vehicle_type="Car")
+
+    assert hold["slot_id"] == s1["id"]
+    assert slot_manager.allocate_slot("WALKIN")["id"] == s2["id"]
+
+
+def test_confirm_allocates_held_slot(fresh_db, book):
+    s1 = slot_manager.create_slot("compact", 1)
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("BOOKED", "Car")
+    book.reserve("BOOKED")
+
+    slot = book.confirm("BOOKED")
+
+    assert slot["id"] == s1["id"] and slot["vehicle_plate"] == "BOOKED"
+    assert book.get("BOOKED") is None
+    assert len(book.wheel) == 0
+
+
+def test_hold_expires_back_to_free_index(fresh_db, book):
+    s1 = slot_manager.create_slot("large", 1)
+    vehicle_manager.register_vehicle("BOOKED", "Truck")
+    book.reserve("BOOKED", slot_type="large", ttl=30)
+    assert s1["id"] not in slot_manager.free_slot_index
+
+    book.clock.now += 29
+    assert book.expire_due() == []
+    book.clock.now += 2
+    assert book.expire_due() == ["BOOKED"]
+    assert s1["id"] in slot_manager.free_slot_index
+    assert book.expired_count == 1
+    assert s1["id"] not in slot_manager.held_by_slot
+
+
+def test_slot_type_must_fit_the_vehicle(fresh_db, book):
+    compact = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("BOOKED", "Truck")
+    with pytest.raises(ValueError, match="does not fit"):
+        book.reserve("BOOKED", slot_type="compact")
+    assert compact["id"] in slot_manager.free_slot_index
+    assert book.get("BOOKED") is None
+
+
+def test_cancel_and_duplicate_reservation(fresh_db, book):
+    s1 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("BOOKED", "Car")
+    book.reserve("BOOKED")
+    with pytest.raises(ValueError, match="already has a reservation"):
+        book.reserve("BOOKED")
+    assert book.cancel("BOOKED")
+    assert s1["id"] in slot_manager.free_slot_index
+    assert not book.cancel("BOOKED")
+
+
+def test_checkin_confirms_reservation(fresh_db, monkeypatch, book):
+    monkeypatch.setattr(reservations, "book", book)
+    s1 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("BOOKED", "Car")
+    book.reserve("BOOKED")
+
+    result = vehicle_manager.checkin_vehicle("BOOKED")
+
+    assert result["slot_id"] == s1["id"]
+    assert "BOOKED" not in slot_manager.held_slots
+
+
+def test_only_registered_vehicles_without_a_slot_can_reserve(fresh_db, book):
+    s1 = slot_manager.create_slot("compact", 1)
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("PARKED", "Car")
+    slot_manager.allocate_slot("PARKED")
+
+    with pytest.raises(ValueError, match="does not exist"):
+        book.reserve("UNKNOWN")
+    with pytest.raises(ValueError, match="already allocated"):
+        book.reserve("PARKED")
+    # Nothing was taken out of the pool
+    assert len(book) == 0
+    assert len(slot_manager.free_slot_index) == 1 and s1["id"] not in slot_manager.free_slot_index
+
+
+def test_sensor_update_keeps_held_slot_out_of_index(fresh_db, book):
+    s1 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("BOOKED", "Car")
+    book.reserve("BOOKED")
+    assert slot_manager.held_by_slot == {s1["id"]}
+
+    slot_manager.set_slot_occupancy(s1["id"], True)
+    slot_manager.set_slot_occupancy(s1["id"], False)
+    assert s1["id"] not in slot_manager.free_slot_index
+
+    book.cancel("BOOKED")
+    assert slot_manager.held_by_slot == set()
+    assert s1["id"] in slot_manager.free_slot_index
+
+
+def test_reload_keeps_held_slots_out_of_index(fresh_db, book):
+    s1 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("BOOKED", "Car")
+    book.reserve("BOOKED")
+    slot_manager.load_free_slot_index()
+    assert s1["id"] not in slot_manager.free_slot_index
@@ -0,0 +1,114 @@
+# tests/test_slot_allocation.py
+import pytest
+
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.core.slot_index import FreeSlotIndex
+from parking_system.database.db import get_conn
+
+
+# ----------------- FreeSlotIndex -----------------
+
+def test_index_pops_lowest_free_id():
+    index = FreeSlotIndex()
+    index.load([(3, "compact", 1, 0), (1, "large", 1, 1), (2, "large", 2, 0)])
+    assert len(index) == 2
+    assert index.pop() == 2
+    assert index.pop() == 3
+    assert index.pop() is None
+
+
+def test_index_filters_by_type_and_level():
+    index = FreeSlotIndex()
+    index.load([(1, "compact", 1, 0), (2, "large", 1, 0), (3, "large", 2, 0)])
+    assert index.count(slot_type="large") == 2
+    assert index.pop(slot_type="large", level=2) == 3
+    assert index.pop(slot_type="large") == 2
+    assert index.pop(slot_type="large") is None
+    assert index.count() == 1
+
+
+def test_index_release_and_discard():
+    index = FreeSlotIndex()
+    index.load([(1, "compact", 1, 0), (2, "compact", 1, 0)])
+    assert index.pop() == 1
+    index.release(1)
+    index.discard(2)
+    assert 1 in index and 2 not in index
+    assert index.pop() == 1
+    assert index.pop() is None
+    assert index.release(99) is False
+
+
+# ----------------- slot_manager integration -----------------
+
+def test_allocate_uses_index_and_checkout_releases(fresh_db):
+    s1 = slot_manager.create_slot("compact", 1)
+    s2 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    vehicle_manager.register_vehicle("XYZ789", "Car")
+
+    assert slot_manager.allocate_slot("ABC123")["id"] == s1["id"]
+    assert slot_manager.allocate_slot("XYZ789")["id"] == s2["id"]
+    assert len(slot_manager.free_slot_index) == 0
+
+    vehicle_manager.checkin_vehicle("ABC123")
+    vehicle_manager.checkout_vehicle("ABC123")
+    assert s1["id"] in slot_manager.free_slot_index
+
+
+def test_allocate_no_free_slot(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    vehicle_manager.register_vehicle("XYZ789", "Car")
+    slot_manager.allocate_slot("ABC123")
+    with pytest.raises(ValueError, match="No available slots"):
+        slot_manager.allocate_slot("XYZ789")
+
+
+def test_stale_index_entry_is_skipped(fresh_db):
+    s1 = slot_manager.create_slot("compact", 1)
+    s2 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    # Another process occupies slot 1 behind our back
+    with get_conn() as conn:
+        conn.execute("UPDATE slots SET is_occupied=1 WHERE id=?", (s1["id"],))
+    assert slot_manager.allocate_slot("ABC123")["id"] == s2["id"]
+
+
+def test_index_refreshes_when_empty(fresh_db):
+    s1 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    slot_manager.set_slot_occupancy(s1["id"], True)
+    # Freed directly in the DB by another process
+    with get_conn() as conn:
+        conn.execute("UPDATE slots SET is_occupied=0 WHERE id=?", (s1["id"],))
+    assert slot_manager.allocate_slot("ABC123")["id"] == s1["id"]
+
+
+def test_empty_index_picks_up_freed_rows_without_reload(fresh_db, monkeypatch):
+    s1 = slot_manager.create_slot("compact", 1)
+    vehicle_manager.register_vehicle("ABC123", "Car")
+    vehicle_manager.register_vehicle("XYZ789", "Car")
+    slot_manager.allocate_slot("ABC123")
+
+    def no_reload(conn=None):
+        raise AssertionError("full reload on the allocation path")
+
+    monkeypatch.setattr(slot_manager, "load_free_slot_index", no_reload)
+    layout = slot_manager.free_slot_index.layout_version
+    with pytest.raises(ValueError, match="No available slots"):
+        slot_manager.allocate_slot("XYZ789")
+    assert slot_manager.free_slot_index.layout_version == layout
+
+    # Created by another process: picked up from the free rows
+    with get_conn() as conn:
+        s2 = conn.execute("INSERT INTO slots (slot_type, level) VALUES ('compact', 1) RETURNING id").fetchone()[0]
+    assert slot_manager.allocate_slot("XYZ789")["id"] == s2 != s1["id"]
+
+
+def test_set_slot_occupancy_updates_index(fresh_db):
+    s1 = slot_manager.create_slot("large", 2)
+    slot_manager.set_slot_occupancy(s1["id"], True)
+    assert s1["id"] not in slot_manager.free_slot_index
+    slot_manager.set_slot_occupancy(s1["id"], False)
+    assert s1["id"] in slot_manager.free_slot_index
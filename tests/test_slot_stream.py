@@ -0,0 +1,130 @@
+# tests/test_slot_stream.py
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from parking_system.api.slot_routes import router as slot_router
+from parking_system.core import slot_events, slot_manager
+
+
+def make_app():
+    app = FastAPI()
+    app.include_router(slot_router)
+    return app
+
+
+def test_feed_coalesces_and_detects_gaps():
+    feed = slot_events.ChangeFeed(history=3)
+    feed.publish([1])
+    feed.publish([2, 1])
+    assert feed.changes_since(0) == (2, {1, 2})
+    assert feed.changes_since(1) == (2, {1, 2})
+    assert feed.changes_since(2) == (2, set())
+
+    feed.publish([3])
+    feed.publish([4])
+    assert feed.changes_since(0) == (4, None)      # fell out of the history
+    assert feed.changes_since(2) == (4, {3, 4})
+    feed.publish_all()
+    assert feed.changes_since(4) == (5, None)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_latest_state_only():
+    subscription = slot_events.Subscription(keepalive=1)
+    subscription.offer(slot_events._Message("snapshot", 1, {1: {"id": 1, "is_occupied": 0}}), initial=True)
+    assert json.loads(await subscription.next_message())["type"] == "snapshot"
+
+    for version, occupied in ((2, 1), (3, 0), (4, 1)):
+        subscription.offer(slot_events._Message("delta", version, {1: {"id": 1, "is_occupied": occupied}}))
+    message = json.loads(await subscription.next_message())
+    assert message == {"type": "delta", "version": 4, "slots": [{"id": 1, "is_occupied": 1}]}
+    assert subscription.coalesced == 2
+
+
+def test_websocket_snapshot_then_deltas(fresh_db):
+    slot_manager.create_slot("compact", 1)
+    second = slot_manager.create_slot("large", 2)
+
+    with TestClient(make_app()).websocket_connect("/api/slots/stream") as ws:
+        snapshot = json.loads(ws.receive_text())
+        assert snapshot["type"] == "snapshot" and len(snapshot["slots"]) == 2
+
+        slot_manager.set_slot_occupancy(second["id"], True)
+        delta = json.loads(ws.receive_text())
+        assert delta["type"] == "delta"
+        assert delta["slots"] == [slot_manager.get_slot_by_id(second["id"])]
+
+
+@pytest.mark.asyncio
+async def test_one_worker_serves_1000_sse_subscribers(fresh_db):
+    slots = [slot_manager.create_slot("compact", 1)["id"] for _ in range(20)]
+    app = make_app()
+    clients = [_SSEClient(app) for _ in range(1000)]
+    tasks = [asyncio.ensure_future(client.run()) for client in clients]
+    await asyncio.wait_for(asyncio.gather(*(c.snapshot.wait() for c in clients)), 60)
+    assert len(slot_events.get_broadcaster()) == 1000
+
+    for i, slot_id in enumerate(slots):
+        slot_manager.set_slot_occupancy(slot_id, True)
+        if i % 2:
+            slot_manager.set_slot_occupancy(slot_id, False)
+    expected = {s["id"]: s for s in slot_manager.list_slots()}
+
+    async def converged(client):
+        while client.view != expected:
+            await client.changed.wait()
+            client.changed.clear()
+
+    await asyncio.wait_for(asyncio.gather(*(converged(c) for c in clients)), 60)
+
+    for client in clients:
+        client.disconnect.set()
+    await asyncio.wait_for(asyncio.gather(*tasks), 30)
+    assert len(slot_events.get_broadcaster()) == 0
+
+
+class _SSEClient:
+    """Minimal in-process client of GET /api/slots/stream (raw ASGI)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.view = {}
+        self.buffer = ""
+        self.snapshot = asyncio.Event()
+        self.changed = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self._requested = False
+
+    async def run(self):
+        scope = {
+            "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/api/slots/stream", "raw_path": b"/api/slots/stream", "root_path": "",
+            "query_string": b"", "headers": [], "client": ("test", 0), "server": ("test", 80),
+        }
+        await self.app(scope, self.receive, self.send)
+
+    async def receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] != "http.response.body":
+            return
+        self.buffer += message.get("body", b"").decode()
+        *events, self.buffer = self.buffer.split("\n\n")
+        for event in events:
+            if not event.startswith("data: "):
+                continue
+            payload = json.loads(event[len("data: "):])
+            if payload["type"] == "snapshot":
+                self.view = {}
+                self.snapshot.set()
+            self.view.update((s["id"], s) for s in payload["slots"])
+            self.changed.set()
@@ -0,0 +1,74 @@
+# tests/test_startup.py
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from parking_system.core import reservations, slot_manager
+from parking_system.database import db
+from parking_system.main import create_app
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_python(code: str) -> str:
+    env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_imports_do_no_work_and_skip_heavy_packages():
+    loaded = run_python(
+        "import sys, json\n"
+        "import parking_system.main, parking_system.io_integration.sensor_reader\n"
+        "import parking_system.io_integration.mqtt_publisher, parking_system.analytics.reports\n"
+        "import parking_system.analytics.prediction\n"
+        "from parking_system.database import db\n"
+        "heavy = ('fastapi', 'pandas', 'numpy', 'matplotlib', 'sklearn', 'paho')\n"
+        "print(json.dumps({'heavy': [m for m in heavy if m in sys.modules], 'pools': len(db._pools)}))"
+    )
+    assert json.loads(loaded) == {"heavy": [], "pools": 0}
+
+
+def test_create_app_config_is_used_by_components():
+    active = run_python(
+        "from parking_system.config import load_config\n"
+        "from parking_system.main import create_app\n"
+        "create_app(load_config('prod'))\n"
+        "from parking_system.api.admission import admission\n"
+        "print(admission.active)"
+    )
+    assert active == "True"
+
+
+def test_create_app_rejects_config_after_components_were_built():
+    error = run_python(
+        "from parking_system.config import load_config\n"
+        "from parking_system.main import create_app\n"
+        "import parking_system.core.slot_manager\n"
+        "create_app(load_config('dev'))\n"
+        "try:\n"
+        "    create_app(load_config('prod'))\n"
+        "except RuntimeError as e:\n"
+        "    print(e)"
+    )
+    assert "parking_system.api.admission" in error and "parking_system.database.async_db" in error
+
+
+def test_startup_and_shutdown_hooks(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_FILE", tmp_path / "parking.db")
+    monkeypatch.setattr(slot_manager, "held_slots", {})
+    monkeypatch.setattr(slot_manager, "held_by_slot", set())
+    app = create_app()
+    assert not db.DB_FILE.exists()
+
+    with TestClient(app) as client:
+        assert db.DB_FILE.exists()
+        assert client.get("/health").json() == {"status": "ok"}
+        assert client.get("/api/slots/").json() == []
+        assert reservations.book._thread is not None
+    assert reservations.book._thread is None
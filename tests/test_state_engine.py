@@ -0,0 +1,198 @@
+# tests/test_state_engine.py
+import shutil
+
+import pytest
+
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database import db_utils
+from parking_system.database.db import get_conn
+from parking_system.database.db_utils import StateEngine
+from parking_system.payment import payment_gateway
+
+
+@pytest.fixture
+def engine(fresh_db, tmp_path):
+    eng = StateEngine(journal_dir=tmp_path / "journal")
+    eng.recover()
+    yield eng
+    eng.stop()
+
+
+def reopen(tmp_path):
+    eng = StateEngine(journal_dir=tmp_path / "journal")
+    replayed = eng.recover()
+    return eng, replayed
+
+
+def crash(eng):
+    """Drop the engine without flushing, like a killed process."""
+    eng._journal.close()
+    eng._journal = None
+
+
+def db_rows(sql):
+    with get_conn() as conn:
+        return [tuple(r) for r in conn.execute(sql)]
+
+
+def test_allocate_checkin_checkout(engine):
+    for level in (1, 2):
+        engine.create_slot("compact", level)
+    large = engine.create_slot("large", 1)
+    engine.register_vehicle("CAR1", "Car")
+    engine.register_vehicle("TRK1", "Truck")
+
+    assert engine.allocate_slot("TRK1")["id"] == large["id"]
+    car_slot = engine.allocate_slot("CAR1")
+    assert (car_slot["slot_type"], car_slot["level"]) == ("compact", 1)
+    with pytest.raises(ValueError, match="Vehicle already allocated"):
+        engine.allocate_slot("CAR1")
+    with pytest.raises(ValueError, match="Vehicle does not exist"):
+        engine.allocate_slot("NOPE")
+
+    engine.checkin_vehicle("CAR1")
+    assert engine.get_vehicle("CAR1")["checked_in"] == 1
+    assert engine.checkout_vehicle("CAR1", 4.5) == car_slot["id"]
+    assert engine.get_slot(car_slot["id"])["is_occupied"] == 0
+    assert car_slot["id"] in engine.index
+
+
+def test_register_is_idempotent(engine):
+    assert engine.register_vehicle("CAR1", "Car")[1] is True
+    assert engine.register_vehicle("CAR1", "Car")[1] is False
+    assert len(engine.list_vehicles()) == 1
+
+
+def test_flush_writes_rows_logs_and_checkpoint(engine):
+    slot = engine.create_slot("compact", 1)
+    engine.register_vehicle("CAR1", "Car")
+    engine.allocate_slot("CAR1")
+    engine.checkin_vehicle("CAR1")
+    assert db_rows("SELECT * FROM vehicles") == []
+
+    assert engine.flush() > 0
+    assert db_rows("SELECT id, is_occupied, vehicle_plate FROM slots") == [(slot["id"], 1, "CAR1")]
+    assert db_rows("SELECT license_plate, checked_in, slot_id FROM vehicles") == [("CAR1", 1, slot["id"])]
+    assert db_rows("SELECT license_plate, slot_id FROM vehicle_logs WHERE checkout_time IS NULL") == [("CAR1", slot["id"])]
+    assert db_rows("SELECT seq FROM engine_checkpoint") == [(engine._seq,)]
+
+    engine.checkout_vehicle("CAR1", 3.0)
+    engine.flush()
+    assert db_rows("SELECT amount FROM vehicle_logs WHERE checkout_time IS NOT NULL") == [(3.0,)]
+    assert db_rows("SELECT is_occupied, vehicle_plate FROM slots") == [(0, None)]
+
+
+def test_recovery_replays_unflushed_journal(engine, tmp_path):
+    engine.create_slot("compact", 1)
+    engine.create_slot("compact", 2)
+    engine.register_vehicle("CAR1", "Car")
+    engine.flush()
+    slot = engine.allocate_slot("CAR1")
+    engine.checkin_vehicle("CAR1")
+    crash(engine)
+
+    recovered, replayed = reopen(tmp_path)
+    try:
+        assert replayed == 2
+        assert recovered.get_vehicle("CAR1") == {
+            "license_plate": "CAR1", "vehicle_type": "Car", "checked_in": 1, "slot_id": slot["id"],
+        }
+        assert slot["id"] not in recovered.index and len(recovered.index) == 1
+        # Recovery persisted the replayed state
+        assert db_rows("SELECT checked_in FROM vehicles") == [(1,)]
+        assert len(db_rows("SELECT * FROM vehicle_logs")) == 1
+    finally:
+        recovered.stop()
+
+
+def test_recovery_skips_records_already_flushed(engine, tmp_path):
+    engine.create_slot("compact", 1)
+    engine.register_vehicle("CAR1", "Car")
+    engine.allocate_slot("CAR1")
+    engine.checkin_vehicle("CAR1")
+    # Crash after SQLite committed but before the old segments were deleted
+    kept = tmp_path / "kept"
+    shutil.copytree(tmp_path / "journal", kept)
+    engine.flush()
+    crash(engine)
+    shutil.rmtree(tmp_path / "journal")
+    shutil.copytree(kept, tmp_path / "journal")
+
+    recovered, replayed = reopen(tmp_path)
+    try:
+        assert replayed == 0
+        assert len(db_rows("SELECT * FROM vehicle_logs")) == 1
+    finally:
+        recovered.stop()
+
+
+def test_torn_journal_tail_is_ignored(engine, tmp_path):
+    engine.create_slot("compact", 1)
+    crash(engine)
+    segment = sorted((tmp_path / "journal").glob("journal.*.log"))[-1]
+    with open(segment, "a") as f:
+        f.write("(99, 'register', 'HALF")
+
+    recovered, replayed = reopen(tmp_path)
+    try:
+        assert replayed == 1
+        assert len(recovered.list_slots()) == 1 and recovered.list_vehicles() == []
+    finally:
+        recovered.stop()
+
+
+def test_managers_use_memory_backend(fresh_db, tmp_path, monkeypatch):
+    eng = StateEngine(journal_dir=tmp_path / "journal", index=slot_manager.free_slot_index)
+    eng.recover()
+    monkeypatch.setattr(db_utils, "_engine", eng)
+    try:
+        slot = slot_manager.create_slot("compact", 1)
+        vehicle_manager.register_vehicle("MEM1", "Car")
+        assert slot_manager.allocate_slot("MEM1")["id"] == slot["id"]
+        assert vehicle_manager.checkin_vehicle("MEM1")["slot_id"] == slot["id"]
+        assert slot_manager.get_slot_by_id(slot["id"])["vehicle_plate"] == "MEM1"
+        # Write-behind: SQLite only sees it after a flush
+        assert db_rows("SELECT * FROM vehicles") == []
+        vehicle_manager.checkout_vehicle("MEM1", 2.0)
+        eng.flush()
+        assert db_rows("SELECT checked_in, slot_id FROM vehicles") == [(0, None)]
+        assert db_rows("SELECT amount FROM vehicle_logs") == [(2.0,)]
+    finally:
+        eng.stop()
+
+
+def test_memory_checkout_is_claimed_before_payment(fresh_db, tmp_path, monkeypatch):
+    eng = StateEngine(journal_dir=tmp_path / "journal", index=slot_manager.free_slot_index)
+    eng.recover()
+    monkeypatch.setattr(db_utils, "_engine", eng)
+    real_capture = payment_gateway.capture_payment
+    captures, concurrent = [], []
+
+    def capture(payment):
+        # Another checkout of the same vehicle while this one is being paid for
+        with pytest.raises(ValueError, match="Checkout already in progress"):
+            vehicle_manager.checkout_vehicle(payment["license_plate"], 9.0)
+        concurrent.append(payment["license_plate"])
+        if payment["amount"] < 0.01:
+            raise RuntimeError("payment declined")
+        captures.append(payment)
+        return real_capture(payment)
+
+    monkeypatch.setattr(payment_gateway, "capture_payment", capture)
+    try:
+        slot = slot_manager.create_slot("compact", 1)
+        vehicle_manager.register_vehicle("MEM1", "Car")
+        slot_manager.allocate_slot("MEM1")
+
+        # A failed payment gives the claim back
+        with pytest.raises(RuntimeError):
+            vehicle_manager.checkout_vehicle("MEM1", 0.001)
+        assert eng.get_vehicle("MEM1")["slot_id"] == slot["id"]
+
+        vehicle_manager.checkout_vehicle("MEM1", 2.0)
+        assert [p["amount"] for p in captures] == [2.0]
+        assert concurrent == ["MEM1", "MEM1"]
+        with pytest.raises(ValueError, match="not allocated"):
+            vehicle_manager.checkout_vehicle("MEM1", 2.0)
+    finally:
+        eng.stop()
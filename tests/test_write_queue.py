@@ -0,0 +1,145 @@
+# tests/test_write_queue.py
+import contextlib
+import sqlite3
+import threading
+
+import pytest
+
+from parking_system.core import slot_manager, vehicle_manager
+from parking_system.database import db
+from parking_system.database.db import get_conn
+from parking_system.payment import payment_gateway
+from parking_system.database.write_queue import WriteQueue
+
+
+@pytest.fixture
+def writer(fresh_db):
+    wq = WriteQueue(max_batch=64).start()
+    yield wq
+    wq.stop()
+
+
+def seed(slots, vehicles):
+    with get_conn() as conn:
+        conn.executemany("INSERT INTO slots (slot_type, level) VALUES ('compact', ?)", ((i % 3 + 1,) for i in range(slots)))
+        conn.executemany(
+            "INSERT INTO vehicles (license_plate, vehicle_type) VALUES (?, 'Car')",
+            ((f"WQ{i:04d}",) for i in range(vehicles)),
+        )
+    slot_manager.load_free_slot_index()
+
+
+def hold_writer(wq):
+    """Park the writer thread so the next submissions pile up into one group."""
+    gate = threading.Event()
+    wq.submit(gate.wait, 5)
+    return gate
+
+
+def test_pending_writes_commit_as_one_group(writer):
+    seed(10, 10)
+    gate = hold_writer(writer)
+    futures = [writer.submit_tx(slot_manager._allocate_slot_tx, f"WQ{i:04d}") for i in range(10)]
+    gate.set()
+    slots = [f.result(5) for f in futures]
+
+    assert len({s["id"] for s in slots}) == 10
+    assert writer.stats()["commits"] == 1
+    assert writer.stats()["largest_group"] == 10
+
+
+def test_failing_command_rolls_back_alone(writer):
+    seed(2, 2)
+    gate = hold_writer(writer)
+    ok = writer.submit_tx(slot_manager._allocate_slot_tx, "WQ0000")
+    missing = writer.submit_tx(slot_manager._allocate_slot_tx, "NOPE")
+    twice = writer.submit_tx(slot_manager._allocate_slot_tx, "WQ0000")
+    other = writer.submit_tx(slot_manager._allocate_slot_tx, "WQ0001")
+    gate.set()
+
+    assert ok.result(5)["vehicle_plate"] == "WQ0000"
+    with pytest.raises(ValueError, match="Vehicle does not exist"):
+        missing.result(5)
+    with pytest.raises(ValueError, match="Vehicle already allocated"):
+        twice.result(5)
+    assert other.result(5)["vehicle_plate"] == "WQ0001"
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM slots WHERE is_occupied=1").fetchone()[0] == 2
+
+
+def test_rolled_back_command_returns_its_slot(writer):
+    seed(1, 1)
+
+    def allocate_then_fail(cur, tx, plate):
+        slot_manager._allocate_slot_tx(cur, tx, plate)
+        raise RuntimeError("payment declined")
+
+    with pytest.raises(RuntimeError):
+        writer.submit_tx(allocate_then_fail, "WQ0000").result(5)
+    assert len(slot_manager.free_slot_index) == 1
+    assert writer.submit_tx(slot_manager._allocate_slot_tx, "WQ0000").result(5)["vehicle_plate"] == "WQ0000"
+
+
+def test_commit_hooks_run_after_commit(writer):
+    seed(1, 1)
+    writer.submit_tx(slot_manager._allocate_slot_tx, "WQ0000").result(5)
+    writer.submit_tx(vehicle_manager._checkin_vehicle_tx, "WQ0000", "staff").result(5)
+    assert len(slot_manager.free_slot_index) == 0
+
+    payment = vehicle_manager.authorize_checkout("WQ0000", 5.0)
+    result = writer.submit_tx(vehicle_manager._checkout_vehicle_tx, "WQ0000", 5.0, "staff", payment).result(5)
+    assert result["amount"] == 5.0
+    # Released to the index by the commit hook
+    assert len(slot_manager.free_slot_index) == 1
+
+
+def test_retried_group_captures_payment_once(writer, monkeypatch):
+    seed(1, 1)
+    writer.submit_tx(slot_manager._allocate_slot_tx, "WQ0000").result(5)
+    writer.submit_tx(vehicle_manager._checkin_vehicle_tx, "WQ0000", "staff").result(5)
+
+    real_get_conn = db.get_conn
+    attempts = []
+
+    @contextlib.contextmanager
+    def busy_on_first_commit(immediate=False):
+        with real_get_conn(immediate=immediate) as conn:
+            yield conn
+            attempts.append(immediate)
+            if len(attempts) == 1:
+                # The bodies have run; the commit fails and the group is retried
+                raise sqlite3.OperationalError("database is locked")
+
+    captures = []
+    real_capture = payment_gateway.capture_payment
+    monkeypatch.setattr(db, "get_conn", busy_on_first_commit)
+    monkeypatch.setattr(payment_gateway, "capture_payment", lambda p: captures.append(p) or real_capture(p))
+
+    payment = vehicle_manager.authorize_checkout("WQ0000", 5.0)
+    result = writer.submit_tx(vehicle_manager._checkout_vehicle_tx, "WQ0000", 5.0, "staff", payment).result(5)
+
+    assert result["amount"] == 5.0
+    assert len(attempts) == 2
+    assert captures == [payment]
+    assert len(slot_manager.free_slot_index) == 1
+
+
+def test_concurrent_clients_never_double_allocate(writer):
+    seed(50, 64)
+    results = []
+
+    def client(i):
+        try:
+            results.append(writer.submit_tx(slot_manager._allocate_slot_tx, f"WQ{i:04d}").result(10)["id"])
+        except ValueError:
+            results.append(None)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(64)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    allocated = [r for r in results if r is not None]
+    assert len(allocated) == 50 and len(set(allocated)) == 50
+    assert writer.stats()["commits"] < 64